@@ -0,0 +1,181 @@
+"""
+Micro-Benchmarks der zentralen Hot-Paths mit gespeicherten Baselines:
+  hash_password / verify            - bcrypt mit dem Kostenfaktor der Baseline
+  create_token / decode_token       - JWT erstellen und prüfen
+  validate_*                        - pydantic-Validierung von VertragCreate, ZahlungCreate, KundenCreate
+  berechne_mitdauer                 - Mietdauer in Tagen
+  orm_to_*                          - ORM-Objekt -> Antwortschema (model_validate) für Auto, Kunden, Vertrag, Zahlung
+
+Verglichen wird die Zeit pro Aufruf relativ zu einer festen Python-Referenzlast, damit die Baseline
+auf unterschiedlich schnellen Rechnern brauchbar bleibt. Liegt ein Benchmark mehr als --schwelle
+über der Baseline, endet der Lauf mit Exit-Code 1.
+
+    python -m benchmarks.bench_core                   # messen und mit der Baseline vergleichen
+    python -m benchmarks.bench_core --nur jwt         # nur Benchmarks, deren Name "jwt" enthält
+    python -m benchmarks.bench_core --update          # Baseline neu schreiben (nach gewollten Änderungen)
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ.setdefault("SECRET_KEY", "benchmark")  # core.config verlangt einen Schlüssel
+os.environ.setdefault("LOG_LEVEL", "WARNING")  # INFO-Zeilen pro Aufruf würden die Ausgabe fluten
+
+from core.security import hash as password_hash
+from core.security.jwt import create_token, decode_token
+import models.auto, models.kunden, models.vertrag, models.zahlung  # noqa: E401  (Beziehungen auflösen)
+from models.auto import Auto as AutoModel, AutoStatus as AutoStatusModel
+from models.kunden import Kunden as KundenModel
+from models.vertrag import Vertrag as VertragModel, VertragStatus as VertragStatusModel
+from models.zahlung import Zahlung as ZahlungModel, ZahlungsmethodeEnum, ZahlungsStatusEnum
+from schemas.auto import Auto
+from schemas.kunden import Kunden, KundenCreate
+from schemas.vertrag import Vertrag, VertragCreate
+from schemas.zahlung import Zahlung, ZahlungCreate
+from services.vertrag_service import berechne_mitdauer
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "bench_core.json"
+SCHWELLE = 0.30      # erlaubte Verlangsamung gegenüber der Baseline (30 %)
+MIN_ZEIT = 0.1       # Sekunden pro Messung; die Anzahl der Aufrufe wird daran angepasst
+WIEDERHOLUNGEN = 3   # Messungen pro Durchlauf
+DURCHLAEUFE = 3      # verschränkte Durchläufe über alle Benchmarks
+
+VERTRAG_DATEN = {"auto_id": 1, "kunden_id": 1, "beginnt_datum": "2030-01-01", "beendet_datum": "2030-01-08",
+                 "status": "aktiv", "total_preis": 840.0}
+ZAHLUNG_DATEN = {"vertrag_id": 1, "zahlungsmethode": "karte", "datum": "2030-01-01", "status": "bezahlt", "betrag": 420.0}
+KUNDEN_DATEN = {"vorname": "Max", "nachname": "Mustermann", "geb_datum": "1990-05-17",
+                "handy_nummer": "015112345678", "email": "max.mustermann@example.com"}
+
+
+def referenz():
+    """Feste Python-Last (Schleife, Dict, Strings) als Maßstab für die Rechnergeschwindigkeit."""
+    werte = {}
+    for i in range(2_000):
+        werte[f"k{i}"] = i * i % 97
+    return sum(werte.values())
+
+
+def build_benchmarks(bcrypt_rounds: int) -> dict:
+    """Name -> parameterlose Funktion; alle Eingaben werden vorab erstellt."""
+    password_hash.configure_rounds(bcrypt_rounds)
+    gehasht = password_hash.hash_password("Geheim123!")
+    token = create_token("max@example.com", 42, timedelta(minutes=30))
+
+    auto = AutoModel(id=1, brand="BMW", model="X5", jahr=2022, preis_pro_stunde=25.0, status=AutoStatusModel.verfügbar)
+    kunde = KundenModel(id=1, vorname="Max", nachname="Mustermann", geb_datum=date(1990, 5, 17),
+                        handy_nummer="015112345678", email="max.mustermann@example.com")
+    vertrag = VertragModel(id=1, auto_id=1, kunden_id=1, status=VertragStatusModel.aktiv,
+                           beginnt_datum=date(2030, 1, 1), beendet_datum=date(2030, 1, 8), total_preis=840.0)
+    zahlung = ZahlungModel(id=1, vertrag_id=1, zahlungsmethode=ZahlungsmethodeEnum.karte, datum=date(2030, 1, 1),
+                           status=ZahlungsStatusEnum.bezahlt, betrag=420.0)
+
+    return {
+        "referenz": referenz,
+        "hash_password": lambda: password_hash.hash_password("Geheim123!"),
+        "verify": lambda: password_hash.verify("Geheim123!", gehasht),
+        "create_token": lambda: create_token("max@example.com", 42, timedelta(minutes=30)),
+        "decode_token": lambda: decode_token(token),
+        "validate_vertrag_create": lambda: VertragCreate.model_validate(VERTRAG_DATEN),
+        "validate_zahlung_create": lambda: ZahlungCreate.model_validate(ZAHLUNG_DATEN),
+        "validate_kunden_create": lambda: KundenCreate.model_validate(KUNDEN_DATEN),
+        "berechne_mitdauer": lambda: berechne_mitdauer(date(2030, 1, 1), date(2030, 1, 8)),
+        "orm_to_auto": lambda: Auto.model_validate(auto),
+        "orm_to_kunden": lambda: Kunden.model_validate(kunde),
+        "orm_to_vertrag": lambda: Vertrag.model_validate(vertrag),
+        "orm_to_zahlung": lambda: Zahlung.model_validate(zahlung),
+    }
+
+
+def messen(funktion, min_zeit: float = MIN_ZEIT, wiederholungen: int = WIEDERHOLUNGEN) -> float:
+    """Bestes Ergebnis in Sekunden pro Aufruf (Minimum ist am wenigsten von Störungen betroffen)."""
+    timer = timeit.Timer(funktion)
+    anzahl = 1
+    while True:
+        dauer = timer.timeit(anzahl)
+        if dauer >= min_zeit or anzahl >= 1_000_000:
+            break
+        anzahl = max(anzahl * 2, int(anzahl * min_zeit / max(dauer, 1e-9)))
+    zeiten = [dauer] + timer.repeat(repeat=wiederholungen - 1, number=anzahl)
+    return min(zeiten) / anzahl
+
+
+def run(benchmarks: dict, auswahl: str = None, durchlaeufe: int = DURCHLAEUFE) -> dict:
+    """
+    Misst alle (bzw. die ausgewählten) Benchmarks; Ergebnis in µs pro Aufruf und relativ zur Referenz.
+    Mehrere verschränkte Durchläufe, je Benchmark und für die Referenz zählt das Minimum; so treffen
+    kurze Störungen (andere Prozesse, Taktwechsel) weder nur die Referenz noch nur einen Benchmark.
+    """
+    namen = [name for name in benchmarks if name != "referenz" and (not auswahl or auswahl in name)]
+    beste = dict.fromkeys(namen, float("inf"))
+    ref = float("inf")
+    for _ in range(durchlaeufe):
+        for name in namen:
+            ref = min(ref, messen(referenz))
+            beste[name] = min(beste[name], messen(benchmarks[name]))
+    ergebnisse = {}
+    for name in namen:
+        ergebnisse[name] = {"us": round(beste[name] * 1e6, 3), "relativ": round(beste[name] / ref, 4)}
+        print(f"{name:<26} {beste[name] * 1e6:>12.2f} µs", file=sys.stderr)
+    return {"referenz_us": round(ref * 1e6, 3), "ergebnisse": ergebnisse}
+
+
+def compare(baseline: dict, aktuell: dict, schwelle: float = SCHWELLE) -> list[dict]:
+    """Vergleicht relative Zeiten; jede Zeile enthält den Faktor und ob die Schwelle überschritten ist."""
+    zeilen = []
+    for name, werte in aktuell["ergebnisse"].items():
+        alt = baseline["ergebnisse"].get(name)
+        if alt is None:
+            zeilen.append({"name": name, "faktor": None, "regression": False})
+            continue
+        faktor = werte["relativ"] / alt["relativ"]
+        zeilen.append({"name": name, "faktor": round(faktor, 3), "regression": faktor > 1 + schwelle})
+    return zeilen
+
+
+def load_baseline(path: Path = BASELINE_PATH):
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Pfad der Baseline-Datei")
+    parser.add_argument("--schwelle", type=float, default=SCHWELLE, help="Erlaubte Verlangsamung, z.B. 0.3 = 30 %%")
+    parser.add_argument("--nur", help="Nur Benchmarks, deren Name diesen Text enthält")
+    parser.add_argument("--update", action="store_true", help="Baseline mit den aktuellen Messwerten überschreiben")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    rounds = baseline["bcrypt_rounds"] if baseline else password_hash.current_rounds()
+    aktuell = {"bcrypt_rounds": rounds, **run(build_benchmarks(rounds), args.nur)}
+
+    if args.update:
+        if args.nur and baseline:  # Teilaktualisierung: übrige Einträge behalten
+            aktuell["ergebnisse"] = {**baseline["ergebnisse"], **aktuell["ergebnisse"]}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(aktuell, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Baseline geschrieben: {args.baseline}")
+        return
+    if baseline is None:
+        raise SystemExit(f"Keine Baseline unter {args.baseline} (zuerst mit --update erstellen)")
+
+    regressionen = []
+    for zeile in compare(baseline, aktuell, args.schwelle):
+        if zeile["faktor"] is None:
+            print(f"{zeile['name']:<26}   neu (keine Baseline)")
+            continue
+        markierung = "  REGRESSION" if zeile["regression"] else ""
+        print(f"{zeile['name']:<26} {zeile['faktor']:>7.2f}x{markierung}")
+        if zeile["regression"]:
+            regressionen.append(zeile["name"])
+    if regressionen:
+        raise SystemExit(f"Langsamer als Baseline (+{args.schwelle:.0%}): {', '.join(regressionen)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Vergleicht die Serialisierung einer großen Zahlungsliste:
+  fastapi   - Standardpfad: ORM-Objekte -> response_model-Validierung -> json.dumps (wie JSONResponse)
+  adapter   - vorkompilierter TypeAdapter, validate_python + dump_json (core.fast_json.adapter_response)
+  rows      - Spalten-Zeilen ohne ORM-Objekte, orjson (core.fast_json.rows_response)
+
+Aufruf: python -m benchmarks.bench_serialization --rows 50000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from sqlalchemy.engine import result_tuple
+from core.fast_json import adapter_response, rows_response
+import models.auto, models.kunden, models.vertrag  # noqa: F401  (Beziehungen der Zahlung auflösen)
+from models.zahlung import Zahlung as ZahlungModel, ZahlungsmethodeEnum, ZahlungsStatusEnum
+from schemas.pagination import Page
+from schemas.zahlung import Zahlung
+
+SPALTEN = list(Zahlung.model_fields)
+# Alle Enum-Member kommen vor, damit die Gleichheitsprüfung der Pfade jede Abbildung abdeckt
+METHODEN = list(ZahlungsmethodeEnum)
+STATUS = list(ZahlungsStatusEnum)
+
+
+def build_data(anzahl: int) -> tuple[list, list]:
+    """Erzeugt dieselben Zahlungen als ORM-Objekte und als Row-Objekte (reihum mit allen Enum-Werten)."""
+    make_row = result_tuple(SPALTEN)
+    objekte, zeilen = [], []
+    for i in range(1, anzahl + 1):
+        werte = {
+            "vertrag_id": i % 500 + 1,
+            "zahlungsmethode": METHODEN[i % len(METHODEN)],
+            "datum": date(2030, 1, 1) + timedelta(days=i % 365),
+            "status": STATUS[i % len(STATUS)],
+            "betrag": round(10 + i * 0.37, 2),
+            "id": i,
+        }
+        objekte.append(ZahlungModel(**werte))
+        zeilen.append(make_row([werte[spalte] for spalte in SPALTEN]))
+    return objekte, zeilen
+
+
+def fastapi_default(page: dict) -> bytes:
+    field = create_model_field("Response_list_zahlungen", Page[Zahlung])
+    content = asyncio.run(serialize_response(field=field, response_content=page))
+    # Kodierung wie starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def messen(funktion, repeat: int) -> float:
+    zeiten = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append(time.perf_counter() - start)
+    return statistics.median(zeiten)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="Anzahl Zahlungen pro Antwort")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen (Median)")
+    args = parser.parse_args()
+
+    objekte, zeilen = build_data(args.rows)
+    adapter = TypeAdapter(Page[Zahlung])
+    orm_page = {"items": objekte, "next_cursor": None, "limit": args.rows}
+    row_page = {"items": zeilen, "next_cursor": None, "limit": args.rows}
+
+    # Alle Pfade müssen dasselbe JSON liefern
+    erwartet = json.loads(fastapi_default(orm_page))
+    assert json.loads(adapter_response(adapter, orm_page).body) == erwartet
+    assert json.loads(rows_response(row_page, Zahlung).body) == erwartet
+
+    ergebnisse = {
+        "fastapi": messen(lambda: fastapi_default(orm_page), args.repeat),
+        "adapter": messen(lambda: adapter_response(adapter, orm_page), args.repeat),
+        "rows": messen(lambda: rows_response(row_page, Zahlung), args.repeat),
+    }
+    basis = ergebnisse["fastapi"]
+    print(f"{args.rows} Zahlungen, Median aus {args.repeat} Läufen")
+    for name, sekunden in ergebnisse.items():
+        print(f"  {name:<8} {sekunden * 1000:9.1f} ms  {basis / sekunden:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Erzeugt einen synthetischen Datenbestand für Skalierungstests, deterministisch aus --seed und --stichtag:
+Autos, Kunden, Verträge (pro Auto ohne Überschneidung, quer über die Flotte überlappend) und Zahlungen.
+
+Geladen wird unter PostgreSQL per COPY (psycopg2), sonst per Batch-INSERT (SQLite). Die Tabellen
+müssen leer sein (oder --leeren). Enums werden wie von SQLAlchemy gespeichert (Name des Members).
+
+    python -m benchmarks.dataset --database-url postgresql+psycopg2://... --umfang voll --leeren
+    python -m benchmarks.dataset --database-url sqlite:///scale.db --umfang klein
+
+Umfang "voll": 10k Autos, 1M Kunden, 5M Verträge, 10M Zahlungen (einzeln über --autos usw. änderbar).
+"""
+import argparse
+import bisect
+import heapq
+import itertools
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+from sqlalchemy import create_engine, func, select, text
+
+from data_base import Base
+import models.auslastung  # noqa: F401  alle Tabellen für create_all registrieren
+import models.datenversion  # noqa: F401
+import models.user  # noqa: F401
+from models.auto import Auto, AutoStatus
+from models.kunden import Kunden
+from models.vertrag import Vertrag, VertragStatus
+from models.zahlung import Zahlung, ZahlungsmethodeEnum, ZahlungsStatusEnum
+
+UMFANG = {
+    "klein": {"autos": 500, "kunden": 20_000, "vertraege": 100_000, "zahlungen": 200_000},
+    "mittel": {"autos": 2_000, "kunden": 200_000, "vertraege": 1_000_000, "zahlungen": 2_000_000},
+    "voll": {"autos": 10_000, "kunden": 1_000_000, "vertraege": 5_000_000, "zahlungen": 10_000_000},
+}
+
+# Marke -> Modelle mit Preisspanne pro Stunde (EUR)
+KATALOG = {
+    "VW": [("Golf", 8, 14), ("Polo", 6, 10), ("Passat", 11, 18), ("Tiguan", 13, 22)],
+    "BMW": [("1er", 11, 17), ("3er", 15, 25), ("X1", 16, 26), ("X5", 28, 45)],
+    "Mercedes": [("A-Klasse", 12, 19), ("C-Klasse", 17, 28), ("E-Klasse", 24, 38), ("GLC", 25, 40)],
+    "Audi": [("A3", 12, 19), ("A4", 16, 26), ("Q3", 17, 27), ("Q5", 24, 36)],
+    "Toyota": [("Yaris", 6, 10), ("Corolla", 9, 14), ("RAV4", 14, 22)],
+    "Opel": [("Corsa", 6, 10), ("Astra", 8, 13), ("Mokka", 10, 15)],
+    "Ford": [("Fiesta", 6, 10), ("Focus", 8, 13), ("Kuga", 12, 19)],
+    "Skoda": [("Fabia", 6, 9), ("Octavia", 9, 15), ("Kodiaq", 14, 22)],
+    "Tesla": [("Model 3", 20, 32), ("Model Y", 24, 36)],
+}
+MARKEN_GEWICHTE = {"VW": 20, "BMW": 12, "Mercedes": 12, "Audi": 10, "Toyota": 10, "Opel": 9, "Ford": 9, "Skoda": 12, "Tesla": 6}
+
+VORNAMEN = ["Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannah", "Jonas", "Lea", "Leon", "Lina",
+            "Lukas", "Marie", "Max", "Mia", "Noah", "Paul", "Sophie", "Tim", "Tihan", "Yusuf", "Zeynep", "Elias"]
+NACHNAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann",
+             "Koch", "Richter", "Klein", "Wolf", "Neumann", "Schwarz", "Braun", "Zimmermann", "Ibrahim", "Yilmaz"]
+
+# Sonderstatus der Flotte (unabhängig von Verträgen), Rest ergibt sich aus den Verträgen am Stichtag
+SONDERSTATUS = [(AutoStatus.in_wartung, 0.03), (AutoStatus.beschädigt, 0.015), (AutoStatus.außer_betrieb, 0.01)]
+STORNO_QUOTE = 0.04          # Anteil gekündigter Verträge
+HORIZONT_TAGE = 60           # Buchungen reichen bis so weit nach dem Stichtag
+TAGE_PRO_VERTRAG = 10        # mittlere Belegung + Pause pro Vertrag und Auto
+ZAHLUNGSMETHODEN = [
+    (ZahlungsmethodeEnum.karte, 45), (ZahlungsmethodeEnum.überweisung, 20), (ZahlungsmethodeEnum.paypal, 15),
+    (ZahlungsmethodeEnum.stripe, 10), (ZahlungsmethodeEnum.klarna, 10),
+]
+
+BATCH_ROWS = 50_000
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+# =================== Generatoren ===================
+
+class Generator:
+    """Alle Zeilen als Tupel in Spaltenreihenfolge (Datum als ISO-Text); jede Tabelle hat ihren eigenen Zufallsstrom."""
+
+    def __init__(self, seed: int, stichtag: date, autos: int, kunden: int, vertraege: int, zahlungen: int):
+        self.seed = seed
+        self.stichtag = stichtag
+        self.anzahl = {"autos": autos, "kunden": kunden, "vertraege": vertraege, "zahlungen": zahlungen}
+        self.preise = self._auto_stammdaten()
+
+    def _rng(self, *parts: int) -> random.Random:
+        value = self.seed
+        for part in parts:
+            value = value * 1_000_003 + part
+        return random.Random(value)
+
+    def _auto_stammdaten(self) -> list[tuple]:
+        rng = self._rng(1)
+        marken, gewichte = list(MARKEN_GEWICHTE), list(MARKEN_GEWICHTE.values())
+        daten = []
+        for _ in range(self.anzahl["autos"]):
+            marke = rng.choices(marken, gewichte)[0]
+            model, preis_min, preis_max = rng.choice(KATALOG[marke])
+            daten.append((marke, model, rng.randint(2014, self.stichtag.year), float(rng.randint(preis_min, preis_max))))
+        return daten
+
+    def _vertraege_pro_auto(self, auto_id: int) -> int:
+        basis, rest = divmod(self.anzahl["vertraege"], self.anzahl["autos"])
+        return basis + (1 if auto_id <= rest else 0)
+
+    def _spanne(self, auto_id: int) -> int:
+        return max(self._vertraege_pro_auto(auto_id) * TAGE_PRO_VERTRAG, 365)
+
+    def _angelegt_am(self, auto_id: int) -> date:
+        """Beginn der Zeitachse: das Auto gehört ab dem Tag vor seinem ersten möglichen Vertrag zum Fuhrpark."""
+        return date.fromordinal(self.stichtag.toordinal() + HORIZONT_TAGE - self._spanne(auto_id))
+
+    def _zeitachse(self, auto_id: int) -> Iterator[tuple]:
+        """Verträge eines Autos ohne Überschneidung (Tage inklusive): (beginnt, auto_id, beendet, gekündigt, preis).
+
+        Die Pausen werden so skaliert, dass die Zeitachse jedes Autos kurz nach dem Stichtag endet.
+        """
+        anzahl = self._vertraege_pro_auto(auto_id)
+        if anzahl == 0:
+            return
+        rng = self._rng(2, auto_id)
+        spanne = self._spanne(auto_id)
+        mittlere_dauer = spanne / anzahl * 0.6
+        dauern = [min(1 + int(rng.expovariate(1 / mittlere_dauer)), 45) for _ in range(anzahl)]
+        pausen = [rng.expovariate(1.0) for _ in range(anzahl)]
+        faktor = max(spanne - sum(dauern) - anzahl, 0) / sum(pausen)
+        preis = self.preise[auto_id - 1][3]
+        start = self._angelegt_am(auto_id).toordinal()
+        belegt, pause = 0, 0.0
+        for dauer, naechste_pause in zip(dauern, pausen):
+            pause += naechste_pause
+            beginnt = start + belegt + int(pause * faktor)
+            belegt += dauer + 1
+            yield date.fromordinal(beginnt), auto_id, date.fromordinal(beginnt + dauer), rng.random() < STORNO_QUOTE, preis
+
+    def autos(self) -> Iterator[tuple]:
+        """(id, brand, model, jahr, preis_pro_stunde, status, angelegt_am); Status passend zu den Verträgen am Stichtag."""
+        rng = self._rng(3)
+        for auto_id, (marke, model, jahr, preis) in enumerate(self.preise, start=1):
+            status = AutoStatus.verfügbar
+            for beginnt, _, beendet, gekuendigt, _ in self._zeitachse(auto_id):
+                if gekuendigt or beendet <= self.stichtag:
+                    continue
+                status = AutoStatus.vermietet if beginnt <= self.stichtag else AutoStatus.reserviert
+                break
+            if status == AutoStatus.verfügbar:
+                zufall = rng.random()
+                for sonderstatus, anteil in SONDERSTATUS:
+                    if zufall < anteil:
+                        status = sonderstatus
+                        break
+                    zufall -= anteil
+            yield auto_id, marke, model, jahr, preis, status.name, self._angelegt_am(auto_id).isoformat()
+
+    def kunden(self) -> Iterator[tuple]:
+        """(id, vorname, nachname, geb_datum, handy_nummer, email) mit eindeutiger E-Mail."""
+        rng = self._rng(4)
+        geburt_start = date(self.stichtag.year - 80, 1, 1)
+        for kunden_id in range(1, self.anzahl["kunden"] + 1):
+            vorname, nachname = rng.choice(VORNAMEN), rng.choice(NACHNAMEN)
+            geb_datum = geburt_start + timedelta(days=rng.randint(0, 62 * 365))
+            handy = f"01{rng.randint(50, 79)}{rng.randint(1_000_000, 9_999_999)}"
+            email = f"{vorname}.{nachname}.{kunden_id}@example.com".lower()
+            yield kunden_id, vorname, nachname, geb_datum.isoformat(), handy, email
+
+    def _vertraege_chronologisch(self) -> Iterator[tuple]:
+        """Alle Zeitachsen nach Beginn gemischt; IDs steigen damit wie im Betrieb mit dem Datum."""
+        return heapq.merge(*(self._zeitachse(auto_id) for auto_id in range(1, self.anzahl["autos"] + 1)))
+
+    def _vertrag_status(self, beendet: date, gekuendigt: bool) -> VertragStatus:
+        if gekuendigt:
+            return VertragStatus.gekündigt
+        return VertragStatus.beendet if beendet <= self.stichtag else VertragStatus.aktiv
+
+    def vertraege(self) -> Iterator[tuple]:
+        """(id, auto_id, kunden_id, status, beginnt_datum, beendet_datum, total_preis); Stammkunden buchen öfter."""
+        rng = self._rng(5)
+        kunden = self.anzahl["kunden"]
+        for vertrag_id, (beginnt, auto_id, beendet, gekuendigt, preis) in enumerate(self._vertraege_chronologisch(), start=1):
+            kunden_id = 1 + int(kunden * rng.random() ** 2)
+            total = round(preis * 24 * (beendet - beginnt).days, 2)
+            status = self._vertrag_status(beendet, gekuendigt).name
+            yield vertrag_id, auto_id, kunden_id, status, beginnt.isoformat(), beendet.isoformat(), total
+
+    def zahlungen(self) -> Iterator[tuple]:
+        """(id, vertrag_id, zahlungsmethode, datum, status, betrag); exakt --zahlungen Zeilen, gleichmäßig verteilt."""
+        rng = self._rng(6)
+        methoden = [methode.name for methode, _ in ZAHLUNGSMETHODEN]
+        kumuliert = list(itertools.accumulate(gewicht for _, gewicht in ZAHLUNGSMETHODEN))
+        vertraege, zahlungen = self.anzahl["vertraege"], self.anzahl["zahlungen"]
+        zahlung_id = 0
+        for index, (beginnt, _, beendet, gekuendigt, preis) in enumerate(self._vertraege_chronologisch()):
+            anzahl = (index + 1) * zahlungen // vertraege - index * zahlungen // vertraege
+            if anzahl == 0:
+                continue
+            status = self._vertrag_status(beendet, gekuendigt)
+            dauer = (beendet - beginnt).days
+            betrag = round(preis * 24 * dauer / anzahl, 2)
+            for _ in range(anzahl):
+                zahlung_id += 1
+                if status == VertragStatus.gekündigt:
+                    zahlung_status = ZahlungsStatusEnum.zurückerstattet
+                elif status == VertragStatus.beendet:
+                    zufall = rng.random()
+                    zahlung_status = ZahlungsStatusEnum.bezahlt if zufall < 0.92 else (
+                        ZahlungsStatusEnum.offen if zufall < 0.97 else ZahlungsStatusEnum.abgebrochen)
+                else:
+                    zahlung_status = rng.choice([ZahlungsStatusEnum.offen, ZahlungsStatusEnum.teilweise, ZahlungsStatusEnum.bezahlt])
+                datum = beginnt + timedelta(days=rng.randint(0, dauer))
+                yield zahlung_id, index + 1, methoden[bisect.bisect(kumuliert, rng.random() * kumuliert[-1])], datum.isoformat(), zahlung_status.name, betrag
+
+
+# =================== Laden ===================
+
+class CopyStream:
+    """Dateiähnlicher Lesestrom im COPY-Textformat, erzeugt die Zeilen erst beim Lesen."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._buffer = ""
+        self.count = 0
+
+    @staticmethod
+    def _format(value) -> str:
+        return "\\N" if value is None else str(value)
+
+    def _fill(self, size: int):
+        parts = []
+        for row in self._rows:
+            parts.append("\t".join(map(self._format, row)))
+            self.count += 1
+            if len(parts) >= 10_000:
+                break
+        if parts:
+            self._buffer += "\n".join(parts) + "\n"
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            before = self.count
+            self._fill(size)
+            if self.count == before:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+
+def batches(rows: Iterable[tuple], size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_table(engine, table, rows: Iterable[tuple]) -> int:
+    columns = [column.name for column in table.columns if column.server_default is None]  # version setzt die DB
+    start = time.perf_counter()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if engine.dialect.name == "postgresql":
+            stream = CopyStream(rows)
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 20)
+            count = stream.count
+        else:
+            cursor.execute("PRAGMA synchronous=OFF")  # Massenladen; bei Absturz wird ohnehin neu erzeugt
+            sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+            count = 0
+            for batch in batches(rows, BATCH_ROWS):
+                cursor.executemany(sql, batch)
+                count += len(batch)
+        raw.commit()
+    finally:
+        raw.close()
+    dauer = time.perf_counter() - start
+    log(f"{table.name}: {count} Zeilen in {dauer:.1f} s ({count / dauer if dauer else 0:,.0f} Zeilen/s)")
+    return count
+
+
+def prepare(engine, leeren: bool):
+    Base.metadata.create_all(bind=engine)
+    tabellen = [Zahlung.__table__, Vertrag.__table__, Kunden.__table__, Auto.__table__]
+    with engine.begin() as conn:
+        if leeren:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text("TRUNCATE auto_auslastung, zahlung, vertrag, kunden, auto RESTART IDENTITY CASCADE"))
+            else:
+                for name in ("auto_auslastung", "zahlung", "vertrag", "kunden", "auto"):
+                    conn.execute(text(f"DELETE FROM {name}"))
+        for table in tabellen:
+            if conn.execute(select(func.count()).select_from(table)).scalar():
+                raise SystemExit(f"Tabelle {table.name} ist nicht leer (--leeren verwenden)")
+
+
+def finish(engine, mit_auslastung: bool, stichtag: date):
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # Sequenzen hinter die expliziten IDs setzen, Statistiken für den Planer aktualisieren
+            for table in ("auto", "kunden", "vertrag", "zahlung"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+        # Listen-ETags ungültig machen; die Zähler bleiben auch mit --leeren erhalten, damit keine alte Version wiederkehrt
+        jetzt = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+        conn.execute(text(
+            "INSERT INTO datenversion (tabelle, slot, version, geaendert_am) VALUES (:tabelle, 0, 1, :jetzt) "
+            "ON CONFLICT (tabelle, slot) DO UPDATE SET version = datenversion.version + 1, geaendert_am = excluded.geaendert_am"
+        ), [{"tabelle": table, "jetzt": jetzt} for table in ("auto", "kunden", "vertrag", "zahlung")])
+        if mit_auslastung:
+            # Wie services.auslastung_service: Enddatum exklusiv, offene Verträge bis einschließlich Stichtag,
+            # eine Zeile pro Auto und belegtem Tag
+            start = time.perf_counter()
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(
+                    "INSERT INTO auto_auslastung (auto_id, tag) "
+                    "SELECT DISTINCT v.auto_id, g::date FROM vertrag v "
+                    "CROSS JOIN LATERAL generate_series(v.beginnt_datum, COALESCE(v.beendet_datum - 1, CAST(:heute AS date)), interval '1 day') g "
+                    "WHERE v.status IN ('aktiv', 'beendet')"
+                ), {"heute": stichtag})
+            else:
+                conn.execute(text(
+                    "WITH RECURSIVE tage(auto_id, tag, ende) AS ("
+                    " SELECT auto_id, beginnt_datum, COALESCE(date(beendet_datum, '-1 day'), :heute) FROM vertrag"
+                    " WHERE status IN ('aktiv', 'beendet')"
+                    " UNION ALL SELECT auto_id, date(tag, '+1 day'), ende FROM tage WHERE tag < ende)"
+                    " INSERT INTO auto_auslastung (auto_id, tag) SELECT DISTINCT auto_id, tag FROM tage"
+                ), {"heute": stichtag.isoformat()})
+            log(f"auto_auslastung: Rollup in {time.perf_counter() - start:.1f} s erstellt")
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+
+
+def generate(database_url: str, seed: int, stichtag: date, anzahl: dict, leeren: bool = False, mit_auslastung: bool = False) -> dict:
+    """Erzeugt und lädt den Datenbestand; liefert die Zeilenzahlen pro Tabelle."""
+    engine = create_engine(database_url)
+    try:
+        prepare(engine, leeren)
+        generator = Generator(seed, stichtag, **anzahl)
+        counts = {
+            "auto": load_table(engine, Auto.__table__, generator.autos()),
+            "kunden": load_table(engine, Kunden.__table__, generator.kunden()),
+            "vertrag": load_table(engine, Vertrag.__table__, generator.vertraege()),
+            "zahlung": load_table(engine, Zahlung.__table__, generator.zahlungen()),
+        }
+        finish(engine, mit_auslastung, stichtag)
+        return counts
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Synchrone DB-URL (postgresql+psycopg2://... oder sqlite:///...)")
+    parser.add_argument("--umfang", choices=UMFANG, default="klein", help="Voreinstellung der Zeilenzahlen")
+    for name in ("autos", "kunden", "vertraege", "zahlungen"):
+        parser.add_argument(f"--{name}", type=int, help=f"Anzahl {name} (überschreibt --umfang)")
+    parser.add_argument("--seed", type=int, default=42, help="Startwert; gleicher Seed und Stichtag = gleiche Daten")
+    parser.add_argument("--stichtag", type=date.fromisoformat, default=date.today(), help="Bezugsdatum (JJJJ-MM-TT) für Status")
+    parser.add_argument("--leeren", action="store_true", help="Bestehende Daten vorher löschen")
+    parser.add_argument("--mit-auslastung", action="store_true", help="Auslastungs-Rollup (auto_auslastung) befüllen")
+    args = parser.parse_args()
+
+    anzahl = {name: getattr(args, name) or UMFANG[args.umfang][name] for name in ("autos", "kunden", "vertraege", "zahlungen")}
+    if anzahl["autos"] < 1 or anzahl["kunden"] < 1:
+        raise SystemExit("--autos und --kunden müssen mindestens 1 sein")
+
+    start = time.perf_counter()
+    counts = generate(args.database_url, args.seed, args.stichtag, anzahl, args.leeren, args.mit_auslastung)
+    dauer = time.perf_counter() - start
+    log(f"Fertig: {sum(counts.values())} Zeilen in {dauer:.1f} s ({sum(counts.values()) / dauer:,.0f} Zeilen/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+"""
+Lasttest gegen eine laufende API (uvicorn), mit Szenarien nach realem Verkehr:
+Suche, Preisangebot, Buchung (+ Stornierung), Zahlung, Dashboard-Listen und Login.
+
+Ausgabe als JSON pro Endpunkt: Durchsatz, p50/p95/p99, Fehlerquote und Statuscodes.
+
+Lokal (startet uvicorn mit frischer SQLite-DB und Testdaten):
+    python -m benchmarks.loadtest --concurrency 20 --duration 30 --output ergebnis.json
+
+Gegen einen laufenden Server (Benutzer müssen existieren, Dashboard-Szenarien brauchen einen Besitzer;
+Buchung, Zahlung und Preisangebot brauchen die lokal angelegten Testdaten und entfallen hier):
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 \\
+        --owner owner@example.com:Passwort1! --customer kunde@example.com:Passwort1!
+
+Vergleich zweier Läufe (z.B. zwischen Releases):
+    python -m benchmarks.loadtest --compare alt.json neu.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+OWNER = ("owner@loadtest.example.com", "Loadtest1!")
+CUSTOMER = ("kunde@loadtest.example.com", "Loadtest1!")
+BRANDS = ["BMW", "Audi", "VW", "Toyota", "Mercedes", "Opel", "Ford", "Skoda"]
+MODELS = ["X1", "A4", "Golf", "Corolla", "C200", "Astra", "Focus", "Octavia"]
+
+
+# =================== Messwerte ===================
+
+@dataclass
+class EndpointStats:
+    latencies: list = field(default_factory=list)  # Sekunden
+    status: dict = field(default_factory=dict)
+    errors: int = 0
+
+    def record(self, seconds: float, status_code: Optional[int], ok: bool):
+        self.latencies.append(seconds)
+        key = str(status_code) if status_code is not None else "exception"
+        self.status[key] = self.status.get(key, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-Rank-Perzentil einer sortierten Liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(stats: EndpointStats, duration: float) -> dict:
+    values = sorted(stats.latencies)
+    requests = len(values)
+    return {
+        "requests": requests,
+        "errors": stats.errors,
+        "error_rate": round(stats.errors / requests, 4) if requests else 0.0,
+        "throughput_rps": round(requests / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 50) * 1000, 2),
+            "p95": round(percentile(values, 95) * 1000, 2),
+            "p99": round(percentile(values, 99) * 1000, 2),
+            "max": round(values[-1] * 1000, 2) if values else 0.0,
+            "mean": round(sum(values) / requests * 1000, 2) if requests else 0.0,
+        },
+        "status": dict(sorted(stats.status.items())),
+    }
+
+
+def build_report(endpoints: dict[str, EndpointStats], duration: float, meta: dict) -> dict:
+    total = EndpointStats()
+    for stats in endpoints.values():
+        total.latencies.extend(stats.latencies)
+        total.errors += stats.errors
+        for code, count in stats.status.items():
+            total.status[code] = total.status.get(code, 0) + count
+    return {
+        "meta": {**meta, "duration_s": round(duration, 2)},
+        "endpoints": {name: summarize(stats, duration) for name, stats in sorted(endpoints.items())},
+        "total": summarize(total, duration),
+    }
+
+
+# =================== Szenarien ===================
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    rng: random.Random
+    owner_headers: dict
+    customer_headers: dict
+    customer_login: tuple[str, str]
+    booking_auto_id: Optional[int]  # eigenes Auto pro Worker, damit Buchungen nicht kollidieren
+    quote_auto_ids: list
+    kunden_id: Optional[int]
+    vertrag_id: Optional[int]       # bestehender Vertrag für Zahlungen
+    record: Callable[[str, float, Optional[int], bool], None]
+
+    async def call(self, label: str, method: str, url: str, expected: tuple = (200,), **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.record(label, time.perf_counter() - start, None, False)
+            return None
+        self.record(label, time.perf_counter() - start, response.status_code, response.status_code in expected)
+        return response
+
+
+async def scenario_search(ctx: Context):
+    params = {"brand": ctx.rng.choice(BRANDS)}
+    if ctx.rng.random() < 0.3:
+        params["model"] = ctx.rng.choice(MODELS)
+    await ctx.call("GET /api/v1/autos/search", "GET", "/api/v1/autos/search", params=params, headers=ctx.customer_headers)
+
+
+async def scenario_quote(ctx: Context):
+    auto_id = ctx.rng.choice(ctx.quote_auto_ids)
+    await ctx.call(
+        "POST /api/v1/autos/{auto_id}/calculate-price", "POST", f"/api/v1/autos/{auto_id}/calculate-price",
+        params={"mietdauer_stunden": ctx.rng.randint(1, 240)}, headers=ctx.customer_headers,
+    )
+
+
+async def scenario_book(ctx: Context):
+    # Buchung in der Zukunft und anschließende Stornierung, damit das Auto wieder frei wird
+    beginnt = date.today() + timedelta(days=ctx.rng.randint(30, 300))
+    vertrag = {
+        "auto_id": ctx.booking_auto_id,
+        "kunden_id": ctx.kunden_id,
+        "beginnt_datum": beginnt.isoformat(),
+        "beendet_datum": (beginnt + timedelta(days=ctx.rng.randint(1, 14))).isoformat(),
+        "status": "aktiv",
+        "total_preis": round(ctx.rng.uniform(50, 2000), 2),
+    }
+    response = await ctx.call("POST /api/v1/vertraege", "POST", "/api/v1/vertraege", expected=(201,), json=vertrag, headers=ctx.customer_headers)
+    if response is not None and response.status_code == 201:
+        vertrag_id = response.json()["id"]
+        await ctx.call(
+            "POST /api/v1/vertraege/{vertrag_id}/kuendigen", "POST", f"/api/v1/vertraege/{vertrag_id}/kuendigen",
+            headers=ctx.customer_headers,
+        )
+
+
+async def scenario_pay(ctx: Context):
+    zahlung = {
+        "vertrag_id": ctx.vertrag_id,
+        "zahlungsmethode": ctx.rng.choice(["karte", "überweisung", "stripe"]),
+        "datum": date.today().isoformat(),
+        "status": "bezahlt",
+        "betrag": round(ctx.rng.uniform(10, 500), 2),
+    }
+    await ctx.call("POST /api/v1/zahlungen", "POST", "/api/v1/zahlungen", expected=(201,), json=zahlung, headers=ctx.customer_headers)
+
+
+def dashboard_list(path: str) -> Callable[[Context], Awaitable[None]]:
+    async def scenario(ctx: Context):
+        await ctx.call(f"GET {path}", "GET", path, params={"limit": 50}, headers=ctx.owner_headers)
+    return scenario
+
+
+async def scenario_login(ctx: Context):
+    email, password = ctx.customer_login
+    await ctx.call("POST /auth/token", "POST", "/auth/token", data={"username": email, "password": password})
+
+
+# Gewichte nach typischem Verkehr: überwiegend lesend, wenige Schreibzugriffe und Logins
+SCENARIOS = {
+    "search": (35, scenario_search),
+    "quote": (20, scenario_quote),
+    "book": (8, scenario_book),
+    "pay": (7, scenario_pay),
+    "dashboard_autos": (6, dashboard_list("/api/v1/dashboard/autos")),
+    "dashboard_kunden": (6, dashboard_list("/api/v1/dashboard/kunden")),
+    "dashboard_vertraege": (6, dashboard_list("/api/v1/dashboard/vertraege")),
+    "dashboard_zahlungen": (6, dashboard_list("/api/v1/dashboard/zahlungen")),
+    "login": (6, scenario_login),
+}
+
+
+def parse_mix(mix: Optional[str]) -> dict[str, int]:
+    """'search=50,quote=50' überschreibt die Gewichte; nicht genannte Szenarien entfallen."""
+    if not mix:
+        return {name: weight for name, (weight, _) in SCENARIOS.items()}
+    weights = {}
+    for entry in mix.split(","):
+        name, _, weight = entry.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unbekanntes Szenario: {name} (verfügbar: {', '.join(SCENARIOS)})")
+        weights[name] = int(weight or SCENARIOS[name][0])
+    return weights
+
+
+# =================== Testdaten und Server ===================
+
+def seed_database(database_url: str, concurrency: int) -> dict:
+    """Legt Schema, Benutzer und Testdaten an (deterministisch); liefert die IDs für die Worker."""
+    os.environ["DATABASE_URL"] = database_url
+    import main  # noqa: F401  registriert alle Modelle
+    from data_base import Base, get_engine, SessionLocal
+    from core.security.hash import hash_password
+    from models.auto import Auto, AutoStatus
+    from models.kunden import Kunden
+    from models.user import User
+    from models.vertrag import Vertrag, VertragStatus
+
+    Base.metadata.create_all(bind=get_engine())
+    rng = random.Random(0)
+    with SessionLocal() as db:
+        db.add_all([
+            User(email=OWNER[0], hashed_password=hash_password(OWNER[1]), role="owner"),
+            User(email=CUSTOMER[0], hashed_password=hash_password(CUSTOMER[1]), role="customer"),
+        ])
+        autos = [
+            Auto(brand=rng.choice(BRANDS), model=rng.choice(MODELS), jahr=rng.randint(2015, 2024),
+                 preis_pro_stunde=rng.randint(5, 60), status=AutoStatus.verfügbar)
+            for _ in range(concurrency * 2 + 20)
+        ]
+        kunden = [
+            Kunden(vorname="Last", nachname=f"Test{i}", geb_datum=date(1990, 1, 1), handy_nummer="0123456789",
+                   email=f"kunde{i}@loadtest.example.com")
+            for i in range(concurrency)
+        ]
+        db.add_all(autos + kunden)
+        db.flush()
+        start = date.today() - timedelta(days=60)
+        vertraege = [
+            Vertrag(auto_id=autos[-1 - i].id, kunden_id=kunde.id, status=VertragStatus.beendet,
+                    beginnt_datum=start, beendet_datum=start + timedelta(days=3), total_preis=300.0)
+            for i, kunde in enumerate(kunden)
+        ]
+        db.add_all(vertraege)
+        db.commit()
+        return {
+            "booking_auto_ids": [auto.id for auto in autos[:concurrency]],
+            "quote_auto_ids": [auto.id for auto in autos[concurrency:]],
+            "kunden_ids": [kunde.id for kunde in kunden],
+            "vertrag_ids": [vertrag.id for vertrag in vertraege],
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "loadtest-secret"),
+        "DB_CREATE_SCHEMA": "false",
+        "SCHEDULER_ENABLED": "false",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log"],
+        env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/metrics")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"Server unter {base_url} nicht erreichbar")
+
+
+async def login(client: httpx.AsyncClient, credentials: Optional[tuple[str, str]]) -> dict:
+    if credentials is None:
+        return {}
+    response = await client.post("/auth/token", data={"username": credentials[0], "password": credentials[1]})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+# =================== Lauf ===================
+
+async def run_load(base_url: str, args, ids: dict, owner, customer) -> dict:
+    weights = parse_mix(args.mix)
+    if owner is None:
+        weights = {name: w for name, w in weights.items() if not name.startswith("dashboard_")}
+    if not ids.get("booking_auto_ids"):
+        weights = {name: w for name, w in weights.items() if name not in ("book", "pay", "quote")}
+    names = list(weights)
+    scenario_weights = [weights[name] for name in names]
+
+    endpoints: dict[str, EndpointStats] = {}
+    measuring = False
+
+    def record(label, seconds, status_code, ok):
+        if measuring:
+            endpoints.setdefault(label, EndpointStats()).record(seconds, status_code, ok)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        owner_headers = await login(client, owner)
+        customer_headers = await login(client, customer)
+
+        async def worker(index: int, deadline: float):
+            def pick(key):
+                values = ids.get(key) or [None]
+                return values[index % len(values)]
+            ctx = Context(
+                client=client,
+                rng=random.Random(args.seed + index),
+                owner_headers=owner_headers,
+                customer_headers=customer_headers,
+                customer_login=customer,
+                booking_auto_id=pick("booking_auto_ids"),
+                quote_auto_ids=ids.get("quote_auto_ids") or [],
+                kunden_id=pick("kunden_ids"),
+                vertrag_id=pick("vertrag_ids"),
+                record=record,
+            )
+            while time.perf_counter() < deadline:
+                name = ctx.rng.choices(names, weights=scenario_weights)[0]
+                await SCENARIOS[name][1](ctx)
+
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(worker(i, deadline) for i in range(args.concurrency)))
+
+        measuring = True
+        started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(worker(i, deadline) for i in range(args.concurrency)))
+        duration = time.perf_counter() - start
+
+    meta = {
+        "started_at": started_at,
+        "base_url": base_url,
+        "concurrency": args.concurrency,
+        "warmup_s": args.warmup,
+        "seed": args.seed,
+        "mix": weights,
+        "revision": git_revision(),
+    }
+    return build_report(endpoints, duration, meta)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new_path: str) -> str:
+    """Tabelle mit Durchsatz und p95/p99 zweier Berichte (Änderung in Prozent)."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    def delta(a, b):
+        return f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+
+    lines = [f"{'Endpunkt':<48} {'rps':>16} {'p95 ms':>22} {'p99 ms':>22} {'Fehler':>14}"]
+    for name in sorted(set(old["endpoints"]) | set(new["endpoints"])):
+        a, b = old["endpoints"].get(name), new["endpoints"].get(name)
+        if a is None or b is None:
+            lines.append(f"{name:<48} {'nur in ' + ('neu' if a is None else 'alt'):>16}")
+            continue
+        lines.append(
+            f"{name:<48} "
+            f"{b['throughput_rps']:>8.1f} {delta(a['throughput_rps'], b['throughput_rps']):>7} "
+            f"{b['latency_ms']['p95']:>12.1f} {delta(a['latency_ms']['p95'], b['latency_ms']['p95']):>9} "
+            f"{b['latency_ms']['p99']:>12.1f} {delta(a['latency_ms']['p99'], b['latency_ms']['p99']):>9} "
+            f"{a['error_rate']:>6.2%}→{b['error_rate']:.2%}"
+        )
+    return "\n".join(lines)
+
+
+def parse_credentials(value: Optional[str]) -> Optional[tuple[str, str]]:
+    if not value:
+        return None
+    email, _, password = value.partition(":")
+    return email, password
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Laufender Server; ohne Angabe wird uvicorn lokal gestartet")
+    parser.add_argument("--database-url", help="DB für den lokalen Server (Standard: frische SQLite-Datei)")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn-Worker des lokalen Servers")
+    parser.add_argument("--concurrency", type=int, default=10, help="Gleichzeitige virtuelle Benutzer")
+    parser.add_argument("--duration", type=float, default=30.0, help="Messdauer in Sekunden")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Aufwärmzeit in Sekunden (nicht gemessen)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout pro Anfrage in Sekunden")
+    parser.add_argument("--seed", type=int, default=1, help="Startwert für die Szenario-Auswahl")
+    parser.add_argument("--mix", help="Gewichte, z.B. 'search=50,quote=30,login=20' (Standard: alle)")
+    parser.add_argument("--owner", help="E-Mail:Passwort eines Besitzers (nur mit --base-url)")
+    parser.add_argument("--customer", help="E-Mail:Passwort eines Kunden (nur mit --base-url)")
+    parser.add_argument("--output", help="JSON-Bericht in diese Datei schreiben (Standard: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("ALT", "NEU"), help="Zwei Berichte vergleichen")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare(*args.compare))
+        return
+
+    server = None
+    tmpdir = None
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+            owner, customer = parse_credentials(args.owner), parse_credentials(args.customer)
+            if customer is None:
+                raise SystemExit("--customer ist mit --base-url erforderlich")
+            ids = {}
+        else:
+            if args.database_url:
+                database_url = args.database_url
+            else:
+                tmpdir = tempfile.TemporaryDirectory(prefix="autogo-loadtest-")
+                database_url = f"sqlite:///{os.path.join(tmpdir.name, 'loadtest.db')}"
+            os.environ.setdefault("SECRET_KEY", "loadtest-secret")
+            ids = seed_database(database_url, args.concurrency)
+            port = free_port()
+            server = start_server(database_url, port, args.server_workers)
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_until_ready(base_url))
+            owner, customer = OWNER, CUSTOMER
+
+        report = asyncio.run(run_load(base_url, args, ids, owner, customer))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
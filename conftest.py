@@ -0,0 +1,31 @@
+import os
+import pytest
+
+# TestClient startet pro Request eine eigene Event-Loop, daher Async-Verbindungen nicht poolen
+os.environ.setdefault("DATABASE_POOL", "null")
+
+
+# Import von main legt keine Tabellen mehr an (siehe lifespan), daher einmal pro Testlauf
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    import main  # registriert alle Modelle
+    from data_base import Base, get_engine
+    Base.metadata.create_all(bind=get_engine())
+
+
+# Jede Anfrage im Test muss im Query-Budget ihres Endpunkts bleiben (@query_budget in den Routern)
+@pytest.fixture(autouse=True)
+def query_budget_guard():
+    from core.metrics import metrics_registry
+    metrics_registry.budget_violations.clear()
+    yield
+    violations = list(metrics_registry.budget_violations)
+    assert not violations, f"Query-Budget überschritten: {violations}"
+
+
+# Zählt die SQL-Statements der App-Engine, z.B. um zu prüfen, dass eine Liste keine N+1-Abfragen erzeugt
+@pytest.fixture
+def count_app_queries():
+    from core.metrics import count_queries
+    from data_base import get_async_engine
+    return lambda: count_queries(get_async_engine().sync_engine)
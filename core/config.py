@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,3 +9,45 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
 if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY is not set in environment variables")
+
+# Connection-Pool-Einstellungen für die Datenbank-Engines (pro uvicorn-Worker)
+DATABASE_POOL = os.getenv("DATABASE_POOL", "queue")  # "null" schaltet das Pooling ab
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = kein Timeout
+
+# Cache für authentifizierte Benutzer (spart die DB-Abfrage pro Request)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# bcrypt: Kostenfaktor (fest) oder Ziel-Latenz für die Kalibrierung, dazu Größe des Hashing-Pools
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "0"))  # > 0 aktiviert die Kalibrierung
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+
+# In-Memory-Snapshot der Flotte für Suche, Preisberechnung und Autoliste
+FLEET_SNAPSHOT_ENABLED = os.getenv("FLEET_SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+FLEET_SNAPSHOT_TTL_SECONDS = float(os.getenv("FLEET_SNAPSHOT_TTL_SECONDS", "30"))  # Vollständiges Neuladen (andere Worker)
+
+# Leader-Wahl für Hintergrundjobs: "auto" (PostgreSQL-Advisory-Lock bzw. Dateisperre), "postgres", "file" oder "none"
+SCHEDULER_LOCK = os.getenv("SCHEDULER_LOCK", "auto")
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "autogo-scheduler.lock"))
+
+# Start-Aktionen im Lifespan der App. Tabellen werden wie bisher standardmäßig angelegt (Produktion mit
+# eigenen Migrationen: DB_CREATE_SCHEMA=false); Hintergrundjobs explizit einschalten (z.B. im Container)
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "true").lower() in ("1", "true", "yes")  # Tabellen per create_all anlegen
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")  # Hintergrundjobs starten
+
+# Logging: Ausgabeformat und Sampling häufiger INFO-Meldungen pro Logger
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" oder "text"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))  # Anteil behaltener INFO-Meldungen (1.0 = alle)
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")  # pro Logger, z.B. "routers.app.auto=0.1,services.auth_service=0.5"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # volle Queue verwirft Meldungen statt Requests zu blockieren
+
+# Massenimport im Dashboard
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "10000"))  # Obergrenze pro Anfrage
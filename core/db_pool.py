@@ -0,0 +1,128 @@
+import bisect
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+from core.config import (
+    DATABASE_POOL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
+# Obergrenzen (Sekunden) der Histogramm-Buckets für die Wartezeit beim Auschecken einer Verbindung
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Sammelt Checkout-Wartezeiten eines Pools (thread-sicher, überlebt pool.recreate())
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)  # letzter Bucket = +Inf
+        self.count = 0
+        self.wait_sum = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.count += 1
+            self.wait_sum += seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def histogram(self) -> dict:
+        with self._lock:
+            buckets, cumulative = {}, 0
+            for bound, bucket_count in zip(WAIT_BUCKETS + ("+Inf",), self.bucket_counts):
+                cumulative += bucket_count
+                buckets[str(bound)] = cumulative
+            return {
+                "buckets": buckets,
+                "count": self.count,
+                "sum_seconds": round(self.wait_sum, 6),
+                "timeouts": self.timeouts,
+            }
+
+
+# Statistiken pro Pool, Schlüssel ist der pool_logging_name der Engine
+pool_stats: dict[str, PoolStats] = {}
+
+
+# Mixin, das die Zeit bis zur Herausgabe einer Verbindung misst (inkl. Warten auf freie Verbindung und Pre-Ping).
+# Name und Overflow-Grenze werden beim Erzeugen gemerkt (auch bei pool.recreate(), das dieselben Argumente übergibt).
+class _TimedPoolMixin:
+    def __init__(self, *args, max_overflow: int = 10, logging_name: str | None = None, **kw):
+        super().__init__(*args, max_overflow=max_overflow, logging_name=logging_name, **kw)
+        self.stats_name = logging_name or "default"
+        self.max_overflow = max_overflow
+
+    def connect(self):
+        stats = pool_stats.setdefault(self.stats_name, PoolStats())
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.observe(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Baut die Engine-Argumente für Pool-Größe, Overflow, Timeout, Recycle, Pre-Ping und Statement-Timeout
+def build_engine_options(url: str, name: str, is_async: bool = False) -> dict:
+    options = {"pool_logging_name": name}
+
+    if DATABASE_POOL == "null":
+        options["poolclass"] = NullPool
+    elif not (url.startswith("sqlite") and ":memory:" in url):  # In-Memory-SQLite hat eigenen Pool
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgresql"):
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    return options
+
+
+# Momentaufnahme eines Pools: Größe, ausgecheckte Verbindungen, Overflow und Wartezeit-Histogramm
+def pool_snapshot(engine) -> dict:
+    pool = engine.pool
+    snapshot = {"pool_class": type(pool).__name__}
+
+    stats = None
+    if isinstance(pool, _TimedPoolMixin):
+        snapshot.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool.max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+        stats = pool_stats.get(pool.stats_name)
+    else:
+        snapshot["status"] = pool.status()  # NullPool und die Pools der In-Memory-SQLite messen keine Wartezeiten
+
+    snapshot["checkout_wait"] = stats.histogram() if stats else None
+    return snapshot
@@ -0,0 +1,76 @@
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Mapping, Optional, get_args
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # optional, sonst kodiert pydantic_core (langsamer bei Enums)
+    orjson = None
+
+# Schnelle Antwortpfade für große Listen. FastAPI validiert sonst jedes ORM-Objekt über das
+# response_model und kodiert das Ergebnis erneut mit dem json-Modul. Zwei Varianten, pro Route gewählt:
+#   - adapter_response: vorkompilierter TypeAdapter, validiert und schreibt JSON in einem Schritt (Rust)
+#   - rows_response: Spalten-Zeilen ohne ORM-Objekte und ohne Validierung, direkt mit orjson kodiert;
+#     Enum-Spalten werden über die Enums des Schemas abgebildet, damit die Antwort zum response_model passt
+# Benchmark: python -m benchmarks.bench_serialization
+
+
+def dumps(value: Any) -> bytes:
+    """Kodiert dicts/Listen mit Datums- und Enum-Werten zu JSON-Bytes."""
+    return orjson.dumps(value) if orjson is not None else to_json(value)
+
+
+class FastJSONResponse(Response):
+    """JSON-Antwort, deren Inhalt bereits als Bytes vorliegt oder mit dumps kodiert wird."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def schema_columns(model, schema: type[BaseModel]) -> list:
+    """ORM-Spalten in der Feldreihenfolge des Schemas (gleiche JSON-Ausgabe wie über das response_model)."""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+def adapter_response(adapter: TypeAdapter, value: Any, headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+    """Validiert value (auch ORM-Objekte) mit dem vorkompilierten Adapter und kodiert direkt zu Bytes."""
+    return FastJSONResponse(adapter.dump_json(adapter.validate_python(value, from_attributes=True)), headers=headers)
+
+
+@lru_cache(maxsize=None)
+def _enum_fields(schema: type[BaseModel]) -> dict[str, dict[str, str]]:
+    """Feld -> {Membername: JSON-Wert} für alle Enum-Felder des Schemas (auch Optional[Enum])."""
+    felder = {}
+    for name, field in schema.model_fields.items():
+        for typ in (field.annotation, *get_args(field.annotation)):
+            if isinstance(typ, type) and issubclass(typ, Enum):
+                felder[name] = {member.name: member.value for member in typ}
+    return felder
+
+
+def _schema_value(werte: dict[str, str], value):
+    # SQLAlchemy speichert Enum-Member über den Namen; die Werte der ORM-Enums können vom Schema abweichen
+    return werte[value.name] if isinstance(value, Enum) else value
+
+
+def rows_response(page: dict, schema: type[BaseModel], headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+    """
+    Kodiert eine Seite aus Row-Objekten (select(*spalten)) ohne ORM-Objekte und ohne Schema-Validierung.
+    Enum-Spalten werden per Membername auf die Enums von schema abgebildet.
+    """
+    items = page["items"]
+    keys = tuple(items[0]._fields) if items else ()
+    felder = _enum_fields(schema)
+    enums = [(index, felder[key]) for index, key in enumerate(keys) if key in felder]
+    rows = []
+    for row in items:
+        if enums:
+            row = list(row)
+            for index, werte in enums:
+                row[index] = _schema_value(werte, row[index])
+        rows.append(dict(zip(keys, row)))
+    return FastJSONResponse(dumps({**page, "items": rows}), headers=headers)
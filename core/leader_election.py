@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import os
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from core.config import SCHEDULER_LOCK, SCHEDULER_LOCK_FILE
+from core.logger_config import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = setup_logger(__name__)
+
+
+# Stabiler 64-Bit-Schlüssel für pg_advisory_lock aus einem Namen
+def advisory_lock_key(name: str) -> int:
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+# Sitzungsgebundener PostgreSQL-Advisory-Lock auf einer eigenen Verbindung.
+# Stirbt der Prozess oder bricht die Verbindung ab, gibt PostgreSQL den Lock frei.
+class PostgresAdvisoryLock:
+    def __init__(self, database_url: str, name: str):
+        self.key = advisory_lock_key(name)
+        self._engine = create_engine(database_url, poolclass=NullPool)  # Verbindung nicht aus dem App-Pool nehmen
+        self._connection = None
+
+    def try_acquire(self) -> bool:
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))  # Verbindung (und damit Lock) noch vorhanden?
+                return True
+            except Exception:
+                logger.warning("Verbindung des Leader-Locks verloren")
+                self.release()
+        connection = self._engine.connect()
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+        connection.commit()
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+
+    def release(self):
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                self._connection.commit()
+            except Exception:
+                pass  # Mit dem Schließen der Verbindung ist der Lock ohnehin frei
+            finally:
+                self._connection.close()
+                self._connection = None
+
+
+# Exklusive Dateisperre als Ersatz ohne PostgreSQL (mehrere Worker auf einem Host, Tests).
+# Das Betriebssystem gibt die Sperre frei, wenn der Prozess endet.
+class FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        handle = open(self.path, "a+")
+        try:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()  # schließt und gibt die Sperre frei
+            self._file = None
+
+
+# Jeder Worker versucht bei jedem Joblauf, Leader zu werden; nur der Inhaber des Locks führt Jobs aus.
+# Der Leader behält den Lock dauerhaft, fällt er aus, übernimmt beim nächsten Lauf ein anderer Worker.
+class LeaderElection:
+    def __init__(self, lock):
+        self.lock = lock
+        self._mutex = threading.Lock()
+        self.is_leader = False
+
+    def ensure_leader(self) -> bool:
+        with self._mutex:
+            try:
+                leader = self.lock.try_acquire()
+            except Exception:
+                logger.exception("Leader-Wahl fehlgeschlagen")
+                leader = False
+            if leader != self.is_leader:
+                logger.info("Leader-Status geändert (PID %s): %s", os.getpid(), 'Leader' if leader else 'kein Leader')
+            self.is_leader = leader
+            return leader
+
+    def release(self):
+        with self._mutex:
+            self.lock.release()
+            self.is_leader = False
+
+    # Dekorator: Job nur ausführen, wenn dieser Worker Leader ist
+    def leader_only(self, job):
+        @functools.wraps(job)
+        def wrapper(*args, **kwargs):
+            if not self.ensure_leader():
+                logger.debug("Job %s übersprungen, anderer Worker ist Leader", job.__name__)
+                return None
+            return job(*args, **kwargs)
+        return wrapper
+
+
+# Immer Leader, z.B. für einen einzelnen Prozess
+class NoLock:
+    def try_acquire(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+
+def build_leader_election(database_url: str, mode: str = SCHEDULER_LOCK) -> LeaderElection:
+    if mode == "auto":
+        mode = "postgres" if database_url.startswith("postgresql") else "file"
+    if mode == "postgres":
+        lock = PostgresAdvisoryLock(database_url, "autogo-scheduler")
+    elif mode == "file":
+        lock = FileLock(SCHEDULER_LOCK_FILE)
+    elif mode == "none":
+        lock = NoLock()
+    else:
+        raise ValueError(f"Unbekannter SCHEDULER_LOCK: {mode}")
+    return LeaderElection(lock)
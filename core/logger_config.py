@@ -1,16 +1,152 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging läuft über eine Queue: Request-Threads legen nur den LogRecord ab, Formatierung und
+# Schreiben nach stderr übernimmt ein einzelner Listener-Thread.
+
+
+# JSON-Zeile pro Meldung; die Felder werden erst hier (im Listener-Thread) zusammengesetzt und kodiert
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# Behält von INFO- und DEBUG-Meldungen eines Loggers nur jede n-te; WARNING und höher immer
+class SamplingFilter(logging.Filter):
+    def __init__(self, default_rate: float = 1.0, rates: dict[str, float] | None = None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self._counters: dict[str, int] = {}
+
+    def rate_for(self, name: str) -> float:
+        # Spezifischster Eintrag gewinnt ("routers.app" gilt auch für "routers.app.auto")
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return self.default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        count = self._counters.get(record.name, 0)
+        self._counters[record.name] = count + 1  # ungenau bei Nebenläufigkeit, für Sampling unerheblich
+        return count % round(1 / rate) == 0
+
+
+# Tracebacks werden im aufrufenden Thread zu Text, solange die Frames noch existieren
+_exception_formatter = logging.Formatter()
+
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+# QueueHandler, der im aufrufenden Thread nur die Nachricht zusammensetzt; Zeitstempel, JSON-Felder und
+# Ausgabe übernimmt der Listener. Startet den Listener bei der ersten Meldung.
+class LazyQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue, target: logging.Handler):
+        super().__init__(log_queue)
+        self.listener = QueueListener(log_queue, target, respect_handler_level=True)
+        self._started = False
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    # Wie QueueHandler.prepare: args können veränderliche Objekte sein und exc_info hält Frames am Leben,
+    # beides darf nicht bis in den Listener-Thread reichen. Die Nachricht und ein Traceback werden daher
+    # jetzt zu Text, die Kopie lässt den Record für andere Handler unverändert.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # lieber Meldungen verlieren als Requests blockieren
+
+    def emit(self, record: logging.LogRecord):
+        if not self._started:
+            self.start()
+        super().emit(record)
+
+    def start(self):
+        with self._start_lock:
+            if not self._started:
+                self.listener.start()
+                self._started = True
+                atexit.register(self.stop)
+
+    # Wartet, bis alle Meldungen geschrieben sind, und beendet den Listener
+    def stop(self):
+        with self._start_lock:
+            if self._started:
+                self.listener.stop()
+                self._started = False
+
+
+_handler: LazyQueueHandler | None = None
+_handler_lock = threading.Lock()
+
+
+# Gemeinsamer Queue-Handler für alle Logger der Anwendung
+def get_queue_handler() -> LazyQueueHandler:
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                from core.config import LOG_FORMAT, LOG_INFO_SAMPLE_RATE, LOG_SAMPLE_RATES, LOG_QUEUE_SIZE
+
+                stream = logging.StreamHandler()  # Konsole als Ausgabekanal (nur im Listener-Thread)
+                if LOG_FORMAT == "json":
+                    stream.setFormatter(JsonFormatter())
+                else:
+                    stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+                handler = LazyQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE), stream)
+                handler.addFilter(SamplingFilter(LOG_INFO_SAMPLE_RATE, parse_sample_rates(LOG_SAMPLE_RATES)))
+                _handler = handler
+    return _handler
+
 
 def setup_logger(name=None):
+    from core.config import LOG_LEVEL
+
     logger = logging.getLogger(name)  # Logger mit einem Namen erstellen oder Standardlogger verwenden
-    logger.setLevel(logging.INFO)     # Log-Level auf INFO setzen
+    logger.setLevel(LOG_LEVEL)        # Log-Level (Standard INFO)
 
     if not logger.hasHandlers():      # Nur Handler hinzufügen, wenn noch keine vorhanden sind
-        ch = logging.StreamHandler()  # Konsole als Ausgabekanal erstellen
-        ch.setLevel(logging.INFO)      # Log-Level für den Handler auf INFO setzen
-
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')  # Format für Log-Nachrichten definieren
-        ch.setFormatter(formatter)    # Format auf den Handler anwenden
-
-        logger.addHandler(ch)          # Handler zum Logger hinzufügen
+        logger.addHandler(get_queue_handler())
 
     return logger                     # Konfigurierten Logger zurückgeben
@@ -0,0 +1,214 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from core.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Obergrenzen (Sekunden) der Latenz-Buckets, angelehnt an die Prometheus-Standardwerte
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Zähler einer laufenden Anfrage: Anzahl SQL-Statements und DB-Zeit
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Gilt für den aktuellen Request (auch in den Greenlets der Async-Engine)
+current_request_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+
+
+# Latenz-Histogramm und Zähler pro Route (Methode + Pfad-Template, nicht der konkrete Pfad)
+class RouteMetrics:
+    __slots__ = ("bucket_counts", "count", "latency_sum", "status_counts", "queries", "db_seconds", "budget_exceeded")
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # letzter Bucket = +Inf
+        self.count = 0
+        self.latency_sum = 0.0
+        self.status_counts: dict[int, int] = {}
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.budget_exceeded = 0  # Anfragen über dem Query-Budget (monoton)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.budget_violations: list[dict] = []  # Letzte Budget-Überschreitungen mit Details, nur zur Fehlersuche (begrenzt)
+
+    # Aufrufer hält self._lock
+    def _route(self, method: str, route: str) -> RouteMetrics:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        return metrics
+
+    def record_budget_violation(self, method: str, route: str, queries: int, budget: int):
+        with self._lock:
+            self._route(method, route).budget_exceeded += 1
+            self.budget_violations.append({"method": method, "route": route, "queries": queries, "budget": budget})
+            del self.budget_violations[:-100]
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            metrics = self._route(method, route)
+            metrics.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.count += 1
+            metrics.latency_sum += seconds
+            metrics.status_counts[status] = metrics.status_counts.get(status, 0) + 1
+            metrics.queries += stats.queries
+            metrics.db_seconds += stats.db_seconds
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+            self.budget_violations.clear()
+
+    # Prometheus-Textformat (Version 0.0.4)
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Latenz der Anfragen pro Route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            routes = sorted(self.routes.items())
+            for (method, route), metrics in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS + ("+Inf",), metrics.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {metrics.latency_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+
+            lines += ["# HELP http_requests_total Anfragen pro Route und Statuscode.", "# TYPE http_requests_total counter"]
+            for (method, route), metrics in routes:
+                for status, status_count in sorted(metrics.status_counts.items()):
+                    lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {status_count}')
+
+            lines += ["# HELP db_queries_total SQL-Statements pro Route.", "# TYPE db_queries_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f'db_queries_total{{method="{method}",route="{_escape(route)}"}} {metrics.queries}')
+
+            lines += ["# HELP db_query_duration_seconds_total DB-Zeit pro Route.", "# TYPE db_query_duration_seconds_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{_escape(route)}"}} {metrics.db_seconds:.6f}')
+
+            lines += ["# HELP db_query_budget_exceeded_total Anfragen über dem Query-Budget pro Route.", "# TYPE db_query_budget_exceeded_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f'db_query_budget_exceeded_total{{method="{method}",route="{_escape(route)}"}} {metrics.budget_exceeded}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics_registry = MetricsRegistry()
+
+
+# ---------- SQL-Zeitmessung ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is not None and starts:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - starts.pop()
+
+# Hängt die Cursor-Events an eine (synchrone) Engine; bei Async-Engines deren sync_engine übergeben
+def instrument_engine(engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# Zählt alle SQL-Statements einer Engine innerhalb des with-Blocks (z.B. in Tests und Benchmarks)
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+@contextmanager
+def count_queries(engine):
+    counter = QueryCounter()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+# ---------- Query-Budgets ----------
+
+# Dekorator für Endpunkte: maximale Anzahl SQL-Statements pro Anfrage (inkl. Login-Abfrage des Benutzers).
+# Unter @router.<methode>(...) setzen, damit FastAPI die markierte Funktion registriert.
+def query_budget(max_queries: int):
+    def decorator(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+# ---------- ASGI-Middleware ----------
+
+# Misst Latenz, Status und SQL-Statements pro Anfrage und setzt den Server-Timing-Header
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                app_ms = (time.perf_counter() - start) * 1000
+                server_timing = (
+                    f'app;dur={app_ms:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"  # unbekannte Pfade nicht einzeln zählen
+            self.registry.observe(scope["method"], route_path, status, time.perf_counter() - start, stats)
+
+            budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+            if budget is not None and stats.queries > budget:
+                logger.warning("Query-Budget überschritten: %s %s mit %s Statements (Budget %s)", scope["method"], route_path, stats.queries, budget)
+                self.registry.record_budget_violation(scope["method"], route_path, stats.queries, budget)
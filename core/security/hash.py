@@ -1,11 +1,26 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
 from core.logger_config import setup_logger
+from core.config import BCRYPT_ROUNDS, BCRYPT_TARGET_MS, HASH_WORKERS, HASH_MAX_QUEUE
 from passlib.context import CryptContext
 
 # Logger für dieses Modul einrichten
 logger = setup_logger(__name__)
 
-# Konfiguration des Passwort-Hashing-Kontexts
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Grenzen für den bcrypt-Kostenfaktor (passlib erlaubt 4 bis 31)
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 16
+
+# Konfiguration des Passwort-Hashing-Kontexts.
+# Nur min_rounds, keine Obergrenze: Hashes mit niedrigerem Kostenfaktor gelten als veraltet, höhere bleiben.
+# Kalibrieren Worker unterschiedlich, wird so nicht bei jedem Login zwischen ihren Werten hin und her gehasht.
+def _context_config(rounds: int) -> dict:
+    return {"schemes": ["bcrypt"], "deprecated": "auto", "bcrypt__default_rounds": rounds, "bcrypt__min_rounds": rounds}
+
+pwd_context = CryptContext(**_context_config(BCRYPT_ROUNDS))
 
 # Funktion zum Hashen eines Passworts
 def hash_password(password: str) -> str:
@@ -21,3 +36,98 @@ def verify(plain_password: str, hashed_password: str) -> bool:
     else:
         logger.warning("Passwortüberprüfung fehlgeschlagen.")
     return result
+
+# Überprüft das Passwort und liefert einen neuen Hash, falls der gespeicherte Kostenfaktor niedriger ist
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    result, new_hash = pwd_context.verify_and_update(plain_password, hashed_password)
+    if result:
+        logger.info("Passwortüberprüfung erfolgreich.")
+    else:
+        logger.warning("Passwortüberprüfung fehlgeschlagen.")
+    return result, new_hash
+
+# ---------- Kostenfaktor ----------
+
+# Setzt den bcrypt-Kostenfaktor für neue Hashes und die Rehash-Prüfung beim Login
+def configure_rounds(rounds: int):
+    rounds = max(MIN_BCRYPT_ROUNDS, min(MAX_BCRYPT_ROUNDS, rounds))
+    pwd_context.load(_context_config(rounds))
+    logger.info("bcrypt-Kostenfaktor auf %s gesetzt.", rounds)
+
+# Aktueller bcrypt-Kostenfaktor
+def current_rounds() -> int:
+    return pwd_context.to_dict()["bcrypt__default_rounds"]
+
+# Wählt den höchsten Kostenfaktor, dessen Hash-Dauer die Ziel-Latenz nicht überschreitet.
+# Gemessen wird einmal bei min_rounds, jede weitere Runde verdoppelt die Dauer.
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = MAX_BCRYPT_ROUNDS) -> int:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=min_rounds)
+    start = time.perf_counter()
+    context.hash("kalibrierung")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    logger.info("bcrypt kalibriert: %s Runden für Ziel %s ms.", rounds, target_ms)
+    return rounds
+
+# ---------- Dedizierter Hashing-Pool ----------
+
+# bcrypt läuft in einem eigenen, begrenzten Thread-Pool statt auf Request- oder Event-Loop-Threads
+class HashingPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._calibrated = BCRYPT_TARGET_MS <= 0
+        self.pending = 0      # eingereichte, noch nicht fertige Aufgaben (Warteschlange + in Arbeit)
+        self.rejected = 0     # abgelehnte Aufgaben wegen voller Warteschlange
+        self.completed = 0
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_queue + self.workers:
+                self.rejected += 1
+                logger.warning("Hashing-Warteschlange voll, Anfrage abgelehnt.")
+                raise HTTPException(status_code=503, detail="Server ausgelastet, bitte später erneut versuchen.")
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, func, args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def _call(self, func, args):
+        # Kalibrierung einmalig und verzögert im Hashing-Thread, nicht beim Import
+        if not self._calibrated:
+            with self._lock:
+                needs_calibration, self._calibrated = not self._calibrated, True
+            if needs_calibration:
+                configure_rounds(calibrate_rounds(BCRYPT_TARGET_MS))
+        return func(*args)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": max(0, self.pending - self.workers),
+                "in_flight": min(self.pending, self.workers),
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "bcrypt_rounds": current_rounds(),
+            }
+
+
+hashing_pool = HashingPool(workers=HASH_WORKERS, max_queue=HASH_MAX_QUEUE)
+
+# Async-Varianten für die Router und Services
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run(hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await hashing_pool.run(verify_and_update, plain_password, hashed_password)
@@ -15,7 +15,7 @@ def create_token(email: str, user_id: int, expires_delta: timedelta) -> str:
         "id": user_id,    # Benutzer-ID speichern
         "exp": datetime.utcnow() + expires_delta  # Ablaufdatum berechnen
     }
-    logger.info(f"Token für Benutzer-ID {user_id} erstellt")
+    logger.info("Token für Benutzer-ID %s erstellt", user_id)
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)  # Token erstellen und zurückgeben
 
 # Funktion zum Entschlüsseln eines JWT-Tokens
@@ -1,5 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy.orm.exc import StaleDataError
 
 # Router für die App
 from routers.app import auto as app_auto
@@ -13,20 +14,73 @@ from routers.dashboard import auto as dashboard_auto
 from routers.dashboard import kunden as dashboard_kunden
 from routers.dashboard import vertrag as dashboard_vertrag
 from routers.dashboard import zahlung as dashboard_zahlung
+from routers.dashboard import monitoring as dashboard_monitoring
+from routers.dashboard import export as dashboard_export
+from routers.dashboard import bulk_import as dashboard_import
+from routers.dashboard import analytics as dashboard_analytics
 
 # Services & Datenbank
 from services.vertrag_service import zwischenstatus_aktualisieren
-from data_base import engine, Base
+from services.auslastung_service import auslastung_fortschreiben
+from services.datenversion import stale_data_handler
+from data_base import Base, DATABASE_URL, get_engine, get_async_engine, dispose_engines
+from core.config import DB_CREATE_SCHEMA, SCHEDULER_ENABLED
+from core.logger_config import setup_logger
+from core.metrics import MetricsMiddleware
+
+logger = setup_logger(__name__)
+
+# Hintergrundscheduler einrichten; jeder Worker plant die Jobs, ausgeführt werden sie nur vom Leader
+def start_scheduler():
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from core.leader_election import build_leader_election
+
+    leader_election = build_leader_election(DATABASE_URL)
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(leader_election.leader_only(zwischenstatus_aktualisieren), "interval", hours=1)
+    scheduler.add_job(leader_election.leader_only(auslastung_fortschreiben), "interval", hours=1)
+    scheduler.start()
+    return scheduler, leader_election
+
+# Start und Shutdown der App: Engines erstellen, optional Tabellen anlegen und Scheduler starten.
+# Beim Import von main passiert nichts davon, Tests und Skripte bleiben schnell.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_engine()
+    async_engine = get_async_engine()
+
+    # Tabellen erstellen, falls nicht vorhanden
+    if DB_CREATE_SCHEMA:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Datenbankschema angelegt bzw. geprüft")
+
+    scheduler = leader_election = None
+    if SCHEDULER_ENABLED:
+        scheduler, leader_election = start_scheduler()
+        logger.info("Hintergrundscheduler gestartet")
+
+    try:
+        yield
+    finally:
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+            leader_election.release()
+        await dispose_engines()
 
 # Erstelle FastAPI-Instanz
 app = FastAPI(
     title="Auto Mieten API",
     version="1.0.0",
-    description="API für Auto-Vermietung mit Dashboard und App"
+    description="API für Auto-Vermietung mit Dashboard und App",
+    lifespan=lifespan,
 )
 
-# Tabellen erstellen, falls nicht vorhanden
-Base.metadata.create_all(bind=engine)
+# Latenz, Statuscodes und SQL-Statements pro Route messen (siehe /metrics und Server-Timing-Header)
+app.add_middleware(MetricsMiddleware)
+
+# Parallel geänderte Zeilen (Versionsspalte) ergeben auf allen Schreibwegen 409 statt 500
+app.add_exception_handler(StaleDataError, stale_data_handler)
 
 # App-Router einbinden
 app.include_router(app_auto.router, tags=["App Autos"])
@@ -39,11 +93,11 @@ app.include_router(dashboard_auto.router, tags=["Dashboard Autos"])
 app.include_router(dashboard_kunden.router, tags=["Dashboard Kunden"])
 app.include_router(dashboard_vertrag.router, tags=["Dashboard Vertraege"])
 app.include_router(dashboard_zahlung.router, tags=["Dashboard Zahlungen"])
+app.include_router(dashboard_monitoring.router, tags=["Dashboard Monitoring"])
+app.include_router(dashboard_export.router, tags=["Dashboard Export"])
+app.include_router(dashboard_import.router, tags=["Dashboard Import"])
+app.include_router(dashboard_analytics.router, tags=["Dashboard Analytics"])
+app.include_router(dashboard_monitoring.metrics_router, tags=["Monitoring"])
 
 # Authentifizierungs-Router einbinden
 app.include_router(auth.router, tags=["auth"])
-
-# Hintergrundscheduler einrichten
-scheduler = BackgroundScheduler()
-scheduler.add_job(zwischenstatus_aktualisieren, "interval", hours=1)
-scheduler.start()
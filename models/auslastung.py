@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
+from data_base import Base
+
+# Tägliches Rollup der Fahrzeugbelegung: eine Zeile pro Auto und belegtem Tag, egal wie viele Verträge ihn abdecken.
+# Wird zusammen mit Vertragsänderungen gepflegt (services.auslastung_service), die Analysen lesen nur diese Tabelle.
+class AutoAuslastung(Base):
+    __tablename__ = "auto_auslastung"
+
+    auto_id = Column(Integer, ForeignKey("auto.id", ondelete="CASCADE"), primary_key=True)  # Belegtes Fahrzeug
+    tag = Column(Date, primary_key=True)  # Belegter Tag
+
+    # Auswertungen filtern nach Zeitraum und gruppieren nach Auto
+    __table_args__ = (Index("ix_auto_auslastung_tag_auto_id", "tag", "auto_id"),)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Enum
+from datetime import date
+from sqlalchemy import Column, Integer, String, Float, Date, Enum, Index, DDL, event
 from data_base import Base  
 from sqlalchemy.orm import relationship
 from enum import Enum as pyEnum
@@ -21,7 +22,25 @@ class Auto(Base):
     jahr = Column(Integer, index=True, nullable=False)  # Herstellungsjahr
     preis_pro_stunde = Column(Float, index=True, nullable=False)  # Preis pro Stunde
     status = Column(Enum(AutoStatus), nullable=False)  # Fahrzeugstatus
+    version = Column(Integer, nullable=False, server_default="1")  # Zeilenversion für optimistische Sperre
+    angelegt_am = Column(Date, nullable=False, default=date.today)  # Ab diesem Tag zählt das Auto zum Fuhrpark (Auslastung)
     
     # Beziehung zum Vertrag-Modell
     vertraege = relationship("Vertrag", back_populates="auto")
 
+    # UPDATE/DELETE prüfen die geladene Version (WHERE version = ...), sonst StaleDataError
+    __mapper_args__ = {"version_id_col": version}
+
+    # Trigramm-GIN-Indizes (nur PostgreSQL) für Teilstring- und Ähnlichkeitssuche nach Marke/Modell
+    __table_args__ = (
+        Index("ix_auto_brand_trgm", "brand", postgresql_using="gin", postgresql_ops={"brand": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_auto_model_trgm", "model", postgresql_using="gin", postgresql_ops={"model": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+# pg_trgm muss vor den Trigramm-Indizes existieren
+event.listen(
+    Auto.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from data_base import Base
+
+# Änderungszähler pro Tabelle für ETag/Last-Modified der Listen (services.datenversion).
+# Der Zähler ist auf mehrere Slots verteilt, damit parallele Schreiber nicht auf dieselbe Zeile warten;
+# die Tabellenversion ist die Summe über alle Slots.
+class DatenVersion(Base):
+    __tablename__ = "datenversion"
+    tabelle = Column(String, primary_key=True)  # Tabellenname
+    slot = Column(Integer, primary_key=True)  # Zähler-Slot (0 .. ZAEHLER_SLOTS - 1)
+    version = Column(Integer, nullable=False, default=1)  # Wird bei jeder Änderung erhöht
+    geaendert_am = Column(DateTime, nullable=False)  # Letzte Änderung (UTC, sekundengenau)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Index, func
 from sqlalchemy.orm import relationship
 from data_base import Base  
 
@@ -11,6 +11,14 @@ class Kunden(Base):
     geb_datum = Column(Date)  # Geburtsdatum des Kunden
     handy_nummer = Column(String(20), nullable=True)  # Telefonnummer des Kunden
     email = Column(String, unique=True, index=True, nullable=False)  # E-Mail des Kunden (eindeutig)
+    version = Column(Integer, nullable=False, server_default="1")  # Zeilenversion für optimistische Sperre
 
     # Beziehung zum Vertrag-Modell, Cascade-Löschung der zugehörigen Einträge
     vertraege = relationship("Vertrag", back_populates="kunde", cascade="all, delete")
+
+    __mapper_args__ = {"version_id_col": version}  # Optimistische Sperre
+
+    __table_args__ = (
+        # Funktionsindex für den Dublettenabgleich beim Import (E-Mail ohne Groß-/Kleinschreibung)
+        Index("ix_kunden_email_lower", func.lower(email)),
+    )
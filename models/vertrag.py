@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date,Float, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Date,Float, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from data_base import Base
 from enum import Enum as pyEnum
@@ -18,8 +18,19 @@ class Vertrag(Base):
     beginnt_datum = Column(Date, nullable=False)  # Beginndatum
     beendet_datum = Column(Date)  # Enddatum
     total_preis = Column(Float)  # Gesamtpreis
+    version = Column(Integer, nullable=False, server_default="1")  # Zeilenversion für optimistische Sperre
 
     auto = relationship("Auto", back_populates="vertraege")  # Beziehung zum Fahrzeug
     kunde = relationship("Kunden", back_populates="vertraege")  # Beziehung zum Kunden
     zahlungen = relationship("Zahlung", back_populates="vertrag")  # Beziehung zu Zahlungen
 
+    __mapper_args__ = {"version_id_col": version}  # Optimistische Sperre
+
+    __table_args__ = (
+        # Index für Keyset-Paginierung nach Beginndatum
+        Index("ix_vertrag_beginnt_datum_id", "beginnt_datum", "id"),
+        # Indizes für den stündlichen Status-Job (abgelaufene Verträge, aktive Verträge pro Auto)
+        Index("ix_vertrag_status_beendet_datum", "status", "beendet_datum"),
+        Index("ix_vertrag_auto_id_status", "auto_id", "status"),
+    )
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Enum, Index
 from data_base import Base
 from sqlalchemy.orm import relationship
 from enum import Enum as pyEnum
@@ -7,9 +7,9 @@ from enum import Enum as pyEnum
 class ZahlungsmethodeEnum(pyEnum):
     karte = "karte"
     überweisung = "überweisung"
-    paypal = "PAYPAL"
+    paypal = "paypal"
     stripe = "stripe"
-    klarna = "Klarna"
+    klarna = "klarna"
 
 # Aufzählung des Zahlungsstatus, repräsentiert verschiedene Zahlungszustände wie bezahlt, offen, abgebrochen, teilweise und zurückerstattet
 class ZahlungsStatusEnum(pyEnum):
@@ -28,6 +28,16 @@ class Zahlung(Base):
     datum = Column(Date, index=True, nullable=False)  # Zahlungsdatum
     status = Column(Enum(ZahlungsStatusEnum), index=True, nullable=False)  # Zahlungsstatus (z.B. bezahlt, offen)
     betrag = Column(Float, index=True, nullable=False)  # Bezahlt Betrag
+    version = Column(Integer, nullable=False, server_default="1")  # Zeilenversion für optimistische Sperre
 
     vertrag = relationship("Vertrag", back_populates="zahlungen")  # Verbindung zum zugehörigen Vertrag
 
+    __mapper_args__ = {"version_id_col": version}  # Optimistische Sperre
+
+    __table_args__ = (
+        # Index für Keyset-Paginierung nach Zahlungsdatum
+        Index("ix_zahlung_datum_id", "datum", "id"),
+        # Abdeckender Index für Salden (Summe bezahlter Beträge pro Vertrag ohne Tabellenzugriff)
+        Index("ix_zahlung_vertrag_id_status_betrag", "vertrag_id", "status", "betrag"),
+    )
+
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from core.logger_config import setup_logger
+from core.metrics import query_budget
 from core.security.jwt import create_token, decode_token
-from data_base import get_database_session
-from models.user import User
+from data_base import get_async_database_session
+from services.user_cache import CachedUser
 from schemas.auth_schemas import CreateRequest
 from services import auth_service
+from services.dependencies import load_user
 from jose import JWTError
 
 logger = setup_logger(__name__)
@@ -17,14 +19,14 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
 # Aktuellen Benutzer anhand des Tokens bekommen
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_database_session)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_database_session)) -> CachedUser:
     try:
         token_data = decode_token(token)  # Token dekodieren
     except JWTError:
         logger.warning("Ungültiges Token")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Ungültiges Token")
 
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = await load_user(token_data, db)  # aus dem Benutzer-Cache, sonst aus der DB
     if not user:
         logger.warning("Benutzer nicht gefunden")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Benutzer nicht gefunden")
@@ -32,17 +34,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(request: CreateRequest, db_session: Session = Depends(get_database_session)):
-    logger.info(f"Registrierungsversuch für: {request.email}")
-    auth_service.create_user_service(request, db_session)  # Benutzer erstellen
+@query_budget(3)
+async def register(request: CreateRequest, db_session: AsyncSession = Depends(get_async_database_session)):
+    logger.info("Registrierungsversuch für: %s", request.email)
+    await auth_service.create_user_service(request, db_session)  # Benutzer erstellen
     logger.info("Benutzer erfolgreich erstellt")
     return {"message": "User Created"}
 
 
 @router.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db_session: Session = Depends(get_database_session)):
-    logger.info(f"Login Versuch für Benutzername: {form_data.username}")
-    user_obj = auth_service.login_user(form_data.username, form_data.password, db_session)
+@query_budget(2)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db_session: AsyncSession = Depends(get_async_database_session)):
+    logger.info("Login Versuch für Benutzername: %s", form_data.username)
+    user_obj = await auth_service.login_user(form_data.username, form_data.password, db_session)
     if not user_obj:
         logger.warning("Ungültige Anmeldedaten")
         raise HTTPException(status_code=401, detail="Ungültige Anmeldedaten")
@@ -52,8 +56,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db_session: Session
 
 
 @router.get("/profile")
-def get_profile(current_user: User = Depends(get_current_user)):
-    logger.info(f"Profilanforderung von Benutzer: {current_user.email}")
+@query_budget(1)
+async def get_profile(current_user: CachedUser = Depends(get_current_user)):
+    logger.info("Profilanforderung von Benutzer: %s", current_user.email)
     return {
         "id": current_user.id,
         "email": current_user.email,
@@ -1,87 +1,255 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, Path
-from sqlalchemy.orm import Session
+from sqlalchemy import select, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from models.auto import Auto as AutoModel, AutoStatus
-from schemas.auto import Auto
-from models.user import User
-from data_base import get_database_session
-from datetime import datetime
+from schemas.auto import Auto, PriceQuoteRequest, PriceQuoteResponse, PriceQuoteError
+from services.user_cache import CachedUser
+from data_base import get_async_database_session
+from datetime import datetime, date
 from core.logger_config import setup_logger
+from core.metrics import query_budget
+from services.datenversion import conditional_get
 from services.dependencies import customer_or_guest_required
+from services.fleet_snapshot import fleet_snapshot
+from services.availability_index import availability_index
+from services.vertrag_service import BUCHBARE_STATUS, zeitraum_belegt
+from core.config import FLEET_SNAPSHOT_ENABLED
 
 
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/v1")
 
 # Auto anhand der ID abrufen und sicherstellen, dass es verfügbar ist
-def get_available_auto(db:Session, auto_id: int) -> AutoModel:
-    auto = db.query(AutoModel).filter(AutoModel.id == auto_id).first()
+async def get_available_auto(db: AsyncSession, auto_id: int) -> AutoModel:
+    auto = await db.scalar(select(AutoModel).where(AutoModel.id == auto_id))
     if not auto:
-        logger.warning(f"Auto mit ID {auto_id} nicht gefunden")
+        logger.warning("Auto mit ID %s nicht gefunden", auto_id)
         raise HTTPException(status_code=404, detail=f"Auto mit ID {auto_id} nicht gefunden.")  
     if auto.status != AutoStatus.verfügbar:
         logger.warning("Auto derzeit nicht verfügbar")
         raise HTTPException(status_code=400, detail="Das Auto ist momentan nicht verfügbar.")  
     return auto
 
+# Preis und Status eines Autos für die Preisberechnung, bevorzugt aus dem Flotten-Snapshot
+async def get_available_auto_preis(db: AsyncSession, auto_id: int) -> float:
+    if not FLEET_SNAPSHOT_ENABLED:
+        return (await get_available_auto(db, auto_id)).preis_pro_stunde
+
+    await fleet_snapshot.ensure_loaded(db)
+    auto = fleet_snapshot.get(auto_id)
+    if not auto:
+        logger.warning("Auto mit ID %s nicht gefunden", auto_id)
+        raise HTTPException(status_code=404, detail=f"Auto mit ID {auto_id} nicht gefunden.")
+    if auto["status"] != AutoStatus.verfügbar.value:
+        logger.warning("Auto derzeit nicht verfügbar")
+        raise HTTPException(status_code=400, detail="Das Auto ist momentan nicht verfügbar.")
+    return auto["preis_pro_stunde"]
+
+# Preis und Status mehrerer Autos: aus dem Flotten-Snapshot oder mit einer einzigen IN-Abfrage
+async def get_preise_und_status(db: AsyncSession, auto_ids: set[int]) -> dict[int, tuple[float, str]]:
+    if FLEET_SNAPSHOT_ENABLED:
+        await fleet_snapshot.ensure_loaded(db)
+        autos = (fleet_snapshot.get(auto_id) for auto_id in auto_ids)
+        return {auto["id"]: (auto["preis_pro_stunde"], auto["status"]) for auto in autos if auto}
+
+    result = await db.execute(
+        select(AutoModel.id, AutoModel.preis_pro_stunde, AutoModel.status).where(AutoModel.id.in_(auto_ids))
+    )
+    return {auto_id: (preis, status.value) for auto_id, preis, status in result.all()}
+
 # Überprüfen, ob der Stundenpreis gültig ist (größer als 0)
 def validate_preis_pre_stunde(preis: float):
     if preis <= 0:
         logger.warning("Ungültiger Stundenpreis (<= 0)")
         raise HTTPException(status_code=400, detail="Der Stundenpreis muss größer als 0 sein.")
 
+# Fuzzy-Filter für Marke/Modell: in PostgreSQL per pg_trgm (GIN-Index, tippfehlertolerant), sonst einfaches ILIKE
+def fuzzy_match(column, term: str, use_trigram: bool):
+    if use_trigram:
+        return or_(column.ilike(f"%{term}%"), column.op("%")(term))
+    return column.ilike(f"%{term}%")
+
+# Suchen nach Marke/Modell laufen in PostgreSQL über pg_trgm und die GIN-Indizes (Ranking nach Ähnlichkeit);
+# Suchen ohne Suchbegriff und alle Suchen auf anderen Datenbanken beantwortet der Flotten-Snapshot
+def trigram_search(dialect_name: str, brand: Optional[str], model: Optional[str]) -> bool:
+    return dialect_name == "postgresql" and bool(brand or model)
+
+# Baut die Suchabfrage; mit pg_trgm nach Ähnlichkeit sortiert (beste Treffer zuerst)
+def build_search_query(brand: Optional[str], model: Optional[str], jahr: Optional[int], status: Optional[AutoStatus], use_trigram: bool):
+    query = select(AutoModel)
+
+    # Filter anwenden, falls angegeben
+    if brand:
+        query = query.where(fuzzy_match(AutoModel.brand, brand, use_trigram))
+    if model:
+        query = query.where(fuzzy_match(AutoModel.model, model, use_trigram))
+    if jahr:
+        query = query.where(AutoModel.jahr == jahr)
+    if status:
+        query = query.where(AutoModel.status == status)
+
+    if use_trigram and (brand or model):
+        scores = [func.similarity(column, term) for column, term in ((AutoModel.brand, brand), (AutoModel.model, model)) if term]
+        query = query.order_by(func.greatest(*scores).desc(), AutoModel.id)
+    return query
+
 # =================== Autos suchen ===================
 @router.get(
     "/autos/search",
     response_model=List[Auto],
     status_code=200,
     summary="Suche Autos nach Marke, Modell, Baujahr und Status")
-def search_auto(
+@query_budget(3)
+async def search_auto(
     brand: Optional[str] = Query(None, description="Marke des Autos"),
     model: Optional[str] = Query(None, description="Modell des Autos"),
     jahr: Optional[int] = Query(None, ge=2000, le=datetime.now().year, description="Baujahr"),
     status: Optional[AutoStatus] = Query(None, description="Status des Autos"),
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(customer_or_guest_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(customer_or_guest_required),
+    etag: dict = Depends(conditional_get("auto"))
 ):
-    logger.info(f"Autosuche: Marke={brand}, Modell={model}, Jahr={jahr}, Status={status}")
+    logger.info("Autosuche: Marke=%s, Modell=%s, Jahr=%s, Status=%s", brand, model, jahr, status)
 
-    query = db.query(AutoModel)
+    # Antwort aus dem In-Memory-Snapshot, ohne Datenbankabfrage solange er aktuell ist
+    use_trigram = trigram_search(db.bind.dialect.name, brand, model)
+    if FLEET_SNAPSHOT_ENABLED and not use_trigram:
+        await fleet_snapshot.ensure_loaded(db, etag.get("ETag"))
+        result = fleet_snapshot.search(brand, model, jahr, status)
+        logger.info("%s Autos gefunden.", len(result))
+        return result
 
-    # Filter anwenden, falls angegeben
-    if brand:
-        query = query.filter(AutoModel.brand.ilike(f"%{brand}%"))
-    if model:
-        query = query.filter(AutoModel.model.ilike(f"%{model}%"))
-    if jahr:
-        query = query.filter(AutoModel.jahr == jahr)
-    if status:
-        query = query.filter(AutoModel.status == status)
+    query = build_search_query(brand, model, jahr, status, use_trigram)
+
+    result = (await db.scalars(query)).all()
 
-    result = query.all()
+    logger.info("%s Autos gefunden.", len(result))
+    return result
+
+# Auto für eine Buchung holen: Status muss buchbar sein und kein aktiver Vertrag darf sich mit dem Zeitraum überschneiden
+async def get_buchbares_auto(db: AsyncSession, auto_id: int, beginnt: date, beendet: date) -> AutoModel:
+    auto = await db.scalar(select(AutoModel).where(AutoModel.id == auto_id))
+    if not auto:
+        logger.warning("Auto mit ID %s nicht gefunden", auto_id)
+        raise HTTPException(status_code=404, detail=f"Auto mit ID {auto_id} nicht gefunden.")
+    if auto.status.value not in BUCHBARE_STATUS:
+        logger.warning("Auto derzeit nicht verfügbar")
+        raise HTTPException(status_code=400, detail="Das Auto ist momentan nicht verfügbar.")
+    if await db.scalar(select(zeitraum_belegt(auto_id, beginnt, beendet))):
+        logger.warning("Auto %s im Zeitraum %s bis %s bereits belegt", auto_id, beginnt, beendet)
+        raise HTTPException(status_code=400, detail="Das Auto ist im gewünschten Zeitraum bereits vermietet.")
+    return auto
+
+# Kandidaten für die Verfügbarkeitssuche nach Marke, Modell, Baujahr und Preis
+async def find_buchbare_autos(
+    db: AsyncSession,
+    brand: Optional[str],
+    model: Optional[str],
+    jahr: Optional[int],
+    preis_min: Optional[float],
+    preis_max: Optional[float],
+) -> list:
+    use_trigram = trigram_search(db.bind.dialect.name, brand, model)
+    if FLEET_SNAPSHOT_ENABLED and not use_trigram:
+        await fleet_snapshot.ensure_loaded(db)
+        autos = [auto for auto in fleet_snapshot.search(brand, model, jahr, None) if auto["status"] in BUCHBARE_STATUS]
+    else:
+        query = build_search_query(brand, model, jahr, None, use_trigram)
+        query = query.where(AutoModel.status.in_([AutoStatus(value) for value in BUCHBARE_STATUS]))
+        autos = [Auto.model_validate(auto).model_dump(mode="json") for auto in (await db.scalars(query)).all()]
+
+    if preis_min is not None:
+        autos = [auto for auto in autos if auto["preis_pro_stunde"] >= preis_min]
+    if preis_max is not None:
+        autos = [auto for auto in autos if auto["preis_pro_stunde"] <= preis_max]
+    return autos
+
+# =================== Verfügbare Autos für einen Zeitraum ===================
+@router.get(
+    "/autos/verfuegbarkeit",
+    response_model=List[Auto],
+    status_code=200,
+    summary="Autos finden, die im Zeitraum von/bis frei sind")
+@query_budget(3)
+async def search_available_autos(
+    von: date = Query(..., description="Erster Miettag (Abholung)"),
+    bis: date = Query(..., description="Rückgabetag, wie beendet_datum eines Vertrags; an diesem Tag ist das Auto wieder frei"),
+    brand: Optional[str] = Query(None, description="Marke des Autos"),
+    model: Optional[str] = Query(None, description="Modell des Autos"),
+    jahr: Optional[int] = Query(None, ge=2000, le=datetime.now().year, description="Baujahr"),
+    preis_min: Optional[float] = Query(None, ge=0, description="Mindestpreis pro Stunde"),
+    preis_max: Optional[float] = Query(None, ge=0, description="Höchstpreis pro Stunde"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(customer_or_guest_required)
+):
+    logger.info("Verfügbarkeitssuche: %s bis %s, Marke=%s, Modell=%s, Jahr=%s", von, bis, brand, model, jahr)
+    if von >= bis:
+        logger.warning("Ungültiger Zeitraum für Verfügbarkeitssuche")
+        raise HTTPException(status_code=400, detail="Startdatum muss vor Enddatum liegen.")
+
+    autos = await find_buchbare_autos(db, brand, model, jahr, preis_min, preis_max)
+
+    # Belegungen aus dem Intervallindex statt über alle Verträge
+    await availability_index.ensure_loaded(db)
+    free_ids = set(availability_index.free_autos((auto["id"] for auto in autos), von, bis))
+    result = [auto for auto in autos if auto["id"] in free_ids]
 
-    logger.info(f"{len(result)} Autos gefunden.")
+    logger.info("%s Autos im Zeitraum frei.", len(result))
     return result
 
 # =================== Gesamten Mietpreis berechnen ===================
 @router.post("/autos/{auto_id}/calculate-price")
-def calculate_total_price(
+@query_budget(2)
+async def calculate_total_price(
     auto_id: int = Path(..., gt=0, description="Die ID des Autos (muss > 0 sein)"),
     mietdauer_stunden: int = Query(..., gt=0, description="Mietdauer in Stunden (muss > 0 sein)"),
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(customer_or_guest_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(customer_or_guest_required)
 ):
-    logger.info(f"Gesamtpreisberechnung für Auto ID {auto_id} mit Mietdauer {mietdauer_stunden} Stunden")
-    auto = get_available_auto(db, auto_id)
+    logger.info("Gesamtpreisberechnung für Auto ID %s mit Mietdauer %s Stunden", auto_id, mietdauer_stunden)
+    preis_pro_stunde = await get_available_auto_preis(db, auto_id)
 
     # Preis validieren vor der Berechnung
-    validate_preis_pre_stunde(auto.preis_pro_stunde)
+    validate_preis_pre_stunde(preis_pro_stunde)
 
-    total_price = auto.preis_pro_stunde * mietdauer_stunden
-    logger.info(f"Gesamtpreis berechnet: {total_price} EUR")
+    total_price = preis_pro_stunde * mietdauer_stunden
+    logger.info("Gesamtpreis berechnet: %s EUR", total_price)
     return {
         "auto_id": auto_id,
         "rental_duration_hours": mietdauer_stunden,
-        "price_per_hour": auto.preis_pro_stunde,
+        "price_per_hour": preis_pro_stunde,
         "total_price": total_price
     }
+
+# =================== Mietpreise für mehrere Autos berechnen ===================
+@router.post(
+    "/autos/calculate-prices",
+    response_model=PriceQuoteResponse,
+    status_code=200,
+    summary="Mietpreise für mehrere Autos auf einmal berechnen (Fehler pro Eintrag)")
+@query_budget(2)
+async def calculate_total_prices(
+    request: PriceQuoteRequest,
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(customer_or_guest_required)
+):
+    logger.info("Preisberechnung für %s Autos", len(request.items))
+    autos = await get_preise_und_status(db, {item.auto_id for item in request.items})
+
+    quotes = []
+    for item in request.items:
+        quote = {"auto_id": item.auto_id, "rental_duration_hours": item.mietdauer_stunden}
+        auto = autos.get(item.auto_id)
+        if auto is None:
+            quote.update(error=PriceQuoteError.nicht_gefunden, detail=f"Auto mit ID {item.auto_id} nicht gefunden.")
+        elif auto[1] != AutoStatus.verfügbar.value:
+            quote.update(error=PriceQuoteError.nicht_verfuegbar, detail="Das Auto ist momentan nicht verfügbar.")
+        elif auto[0] <= 0:
+            quote.update(error=PriceQuoteError.ungueltiger_preis, detail="Der Stundenpreis muss größer als 0 sein.")
+        else:
+            quote.update(price_per_hour=auto[0], total_price=auto[0] * item.mietdauer_stunden)
+        quotes.append(quote)
+
+    logger.info("%s von %s Preisen berechnet", sum(1 for quote in quotes if "error" not in quote), len(quotes))
+    return {"items": quotes}
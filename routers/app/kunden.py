@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from data_base import get_database_session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from data_base import get_async_database_session
 from models.kunden import Kunden as kundenmodel
 from schemas.kunden import KundenCreate, Kunden
 from core.logger_config import setup_logger
-from models.user import User
+from core.metrics import query_budget
+from services.user_cache import CachedUser
 from services.dependencies import customer_or_guest_required
 
 logger = setup_logger(__name__)
@@ -12,11 +14,11 @@ logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/v1")
 
 # =================== Kunde abrufen ===================
-def get_kunde(db: Session, kunden_id: int) -> kundenmodel:
+async def get_kunde(db: AsyncSession, kunden_id: int) -> kundenmodel:
     # Kunde anhand der ID abrufen, 404 auslösen wenn nicht gefunden
-    kunde = db.query(kundenmodel).filter(kundenmodel.id == kunden_id).first()
+    kunde = await db.scalar(select(kundenmodel).where(kundenmodel.id == kunden_id))
     if not kunde:
-        logger.warning(f"Kunde mit ID {kunden_id} nicht gefunden")
+        logger.warning("Kunde mit ID %s nicht gefunden", kunden_id)
         raise HTTPException(status_code=404, detail=f"Kunde mit ID {kunden_id} nicht gefunden.")
     return kunde
 
@@ -27,13 +29,14 @@ def get_kunde(db: Session, kunden_id: int) -> kundenmodel:
     status_code=201,
     summary="Einen neuen Kunden erstellen"
 )
-def create_kunden(
+@query_budget(3)
+async def create_kunden(
     kunden: KundenCreate,
-    db_session: Session = Depends(get_database_session),
-    current_user: User = Depends(customer_or_guest_required)  # Nur Kunden erlaubt
+    db_session: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(customer_or_guest_required)  # Nur Kunden erlaubt
 ):
     # Erstellung protokollieren und neuen Kunden in der Datenbank anlegen
-    logger.info(f"Erstelle Kunde: {kunden.vorname} {kunden.nachname}")
+    logger.info("Erstelle Kunde: %s %s", kunden.vorname, kunden.nachname)
     db_kunden = kundenmodel(
         vorname=kunden.vorname,
         nachname=kunden.nachname,
@@ -42,7 +45,7 @@ def create_kunden(
         email=kunden.email
     )
     db_session.add(db_kunden)
-    db_session.commit()
-    db_session.refresh(db_kunden)
-    logger.info(f"Kunde erfolgreich erstellt mit ID: {db_kunden.id}")
+    await db_session.commit()
+    await db_session.refresh(db_kunden)
+    logger.info("Kunde erfolgreich erstellt mit ID: %s", db_kunden.id)
     return db_kunden
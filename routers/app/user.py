@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.auth_schemas import CreateRequest  
 from services.auth_service import create_user_service, login_user  
-from data_base import get_database_session
+from data_base import get_async_database_session
 from core.logger_config import setup_logger
+from core.metrics import query_budget
 
 logger = setup_logger(__name__)
 router = APIRouter()
@@ -14,18 +15,18 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="Registriert einen neuen Benutzer"
 )
-
-def register(request: CreateRequest, db: Session = Depends(get_database_session)):
-    logger.info(f"Registrierungsversuch für E-Mail: {request.email}")
+@query_budget(3)
+async def register(request: CreateRequest, db: AsyncSession = Depends(get_async_database_session)):
+    logger.info("Registrierungsversuch für E-Mail: %s", request.email)
     try:
-        create_user_service(request, db)
-        logger.info(f"Benutzer erfolgreich erstellt: {request.email}")
+        await create_user_service(request, db)
+        logger.info("Benutzer erfolgreich erstellt: %s", request.email)
         return {"message": "Benutzer erfolgreich registriert"}
     except ValueError:
-        logger.warning(f"Registrierung fehlgeschlagen: E-Mail bereits registriert {request.email}")
+        logger.warning("Registrierung fehlgeschlagen: E-Mail bereits registriert %s", request.email)
         raise HTTPException(status_code=400, detail="E-Mail bereits registriert")
     except Exception:
-        logger.error(f"Interner Serverfehler während der Registrierung für {request.email}")
+        logger.error("Interner Serverfehler während der Registrierung für %s", request.email)
         raise HTTPException(status_code=500, detail="Interner Serverfehler während der Registrierung")
 
 # User login
@@ -34,17 +35,18 @@ def register(request: CreateRequest, db: Session = Depends(get_database_session)
     status_code=status.HTTP_200_OK,
     summary="Benutzer anmelden"
 )
-def login(request: CreateRequest, db: Session = Depends(get_database_session)):
-    logger.info(f"Login-Versuch für E-Mail: {request.email}")
+@query_budget(2)
+async def login(request: CreateRequest, db: AsyncSession = Depends(get_async_database_session)):
+    logger.info("Login-Versuch für E-Mail: %s", request.email)
     try:
-        user = login_user(request.email, request.password, db)
+        user = await login_user(request.email, request.password, db)
         if not user:
-            logger.warning(f"Login fehlgeschlagen: Ungültige Anmeldedaten für {request.email}")
+            logger.warning("Login fehlgeschlagen: Ungültige Anmeldedaten für %s", request.email)
             raise HTTPException(status_code=401, detail="Ungültige E-Mail oder Passwort")
-        logger.info(f"Login erfolgreich für {request.email}")
+        logger.info("Login erfolgreich für %s", request.email)
         return {"message": "Login erfolgreich"}
     except Exception:
-        logger.error(f"Fehler während des Logins für {request.email}")
+        logger.error("Fehler während des Logins für %s", request.email)
         raise HTTPException(status_code=500, detail="Fehler während des Logins")
 
 
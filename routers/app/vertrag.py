@@ -1,16 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
 from datetime import datetime
 from pydantic import BaseModel
 from models.vertrag import Vertrag as vertrag_model  
 from models.auto import Auto, AutoStatus  
-from models.user import User
+from services.user_cache import CachedUser
 from schemas.vertrag import VertragCreate, Vertrag  
-from data_base import get_database_session
+from data_base import get_async_database_session
 from core.logger_config import setup_logger
+from core.metrics import query_budget
 from services.dependencies import customer_or_guest_required
-from routers.app.auto import get_available_auto  
+from routers.app.auto import get_buchbares_auto
 from routers.app.kunden import get_kunde  
+from services.vertrag_service import weitere_belegung
 
 logger = setup_logger(__name__)
 
@@ -21,10 +25,10 @@ class MessageResponse(BaseModel):
     message: str
 
 # Vertrag holen
-def get_vertrag(db: Session, vertrag_id: int) -> vertrag_model:
-    vertrag = db.query(vertrag_model).filter(vertrag_model.id == vertrag_id).first()
+async def get_vertrag(db: AsyncSession, vertrag_id: int) -> vertrag_model:
+    vertrag = await db.scalar(select(vertrag_model).where(vertrag_model.id == vertrag_id))
     if not vertrag:
-        logger.warning(f"Contract mit ID {vertrag_id} nicht gefunden")
+        logger.warning("Contract mit ID %s nicht gefunden", vertrag_id)
         raise HTTPException(status_code=404, detail=f"Contract mit ID {vertrag_id} nicht gefunden.")
     return vertrag
 
@@ -35,12 +39,13 @@ def get_vertrag(db: Session, vertrag_id: int) -> vertrag_model:
     status_code=201,
     summary="Neuen Vertrag anlegen"
 )
-def create_vertrag(
+@query_budget(12)
+async def create_vertrag(
     vertrag: VertragCreate, 
-    db: Session = Depends(get_database_session), 
-    current_user: User = Depends(customer_or_guest_required)
+    db: AsyncSession = Depends(get_async_database_session), 
+    current_user: CachedUser = Depends(customer_or_guest_required)
 ):
-    logger.info(f"Erstelle Vertrag für Auto {vertrag.auto_id} und Kunde {vertrag.kunden_id}.")
+    logger.info("Erstelle Vertrag für Auto %s und Kunde %s.", vertrag.auto_id, vertrag.kunden_id)
 
     # Datum prüfen
     if vertrag.beginnt_datum >= vertrag.beendet_datum:
@@ -52,12 +57,17 @@ def create_vertrag(
         logger.warning("Vertragsdauer muss mindestens einen Tag betragen")
         raise HTTPException(status_code=400, detail="Vertragsdauer muss mindestens einen Tag betragen.")
 
-    # Auto und Kunde holen
-    auto = get_available_auto(db, vertrag.auto_id)
-    kunde = get_kunde(db, vertrag.kunden_id)
+    # Auto und Kunde holen; der Zeitraum wird wie in der Verfügbarkeitssuche gegen die aktiven Verträge geprüft
+    auto = await get_buchbares_auto(db, vertrag.auto_id, vertrag.beginnt_datum, vertrag.beendet_datum)
+    kunde = await get_kunde(db, vertrag.kunden_id)
 
-    # Auto reservieren
-    auto.status = AutoStatus.reserviert
+    # Auto reservieren, sofern es nicht schon reserviert oder vermietet ist. Die Autozeile wird in jedem Fall
+    # geschrieben (Versionsprüfung), damit gleichzeitige Buchungen desselben Autos mit 409 scheitern.
+    war_verfuegbar = auto.status == AutoStatus.verfügbar
+    if war_verfuegbar:
+        auto.status = AutoStatus.reserviert
+    else:
+        flag_modified(auto, "status")
 
     # Vertrag anlegen
     db_vertrag = vertrag_model(
@@ -71,18 +81,18 @@ def create_vertrag(
 
     # Speichern
     db.add(db_vertrag)
-    db.commit()
-    db.refresh(db_vertrag)
-    db.refresh(auto)
+    await db.commit()
+    await db.refresh(db_vertrag)
+    await db.refresh(auto)
 
     # Auto ggf. freigeben, falls Vertrag schon vorbei
-    if datetime.now().date() >= vertrag.beendet_datum:
+    if war_verfuegbar and datetime.now().date() >= vertrag.beendet_datum:
         auto.status = AutoStatus.verfügbar
-        db.commit()
-        db.refresh(auto)
-        logger.info(f"Auto {auto.id} nach Vertragsende sofort freigegeben.")
+        await db.commit()
+        await db.refresh(auto)
+        logger.info("Auto %s nach Vertragsende sofort freigegeben.", auto.id)
 
-    logger.info(f"Vertrag {db_vertrag.id} erfolgreich erstellt.")
+    logger.info("Vertrag %s erfolgreich erstellt.", db_vertrag.id)
     return db_vertrag
 
 # Vertrag kündigen
@@ -92,12 +102,13 @@ def create_vertrag(
     status_code=200,
     summary="Vertrag vor Vertragsbeginn kündigen"
 )
-def vertrag_kuendigen(
+@query_budget(7)
+async def vertrag_kuendigen(
     vertrag_id: int, 
-    db: Session = Depends(get_database_session), 
-    current_user: User = Depends(customer_or_guest_required)
+    db: AsyncSession = Depends(get_async_database_session), 
+    current_user: CachedUser = Depends(customer_or_guest_required)
 ):
-    vertrag = get_vertrag(db, vertrag_id)
+    vertrag = await get_vertrag(db, vertrag_id)
 
     # Kündigung prüfen
     if datetime.now().date() >= vertrag.beginnt_datum:
@@ -105,17 +116,18 @@ def vertrag_kuendigen(
         raise HTTPException(status_code=400, detail="Kündigung nach Vertragsbeginn ist nicht erlaubt.")
 
     # Auto holen
-    auto = db.query(Auto).filter(Auto.id == vertrag.auto_id).first()
+    auto = await db.scalar(select(Auto).where(Auto.id == vertrag.auto_id))
     if not auto:
-        logger.warning(f"Auto mit ID {vertrag.auto_id} nicht gefunden")
+        logger.warning("Auto mit ID %s nicht gefunden", vertrag.auto_id)
         raise HTTPException(status_code=404, detail=f"Auto mit ID {vertrag.auto_id} nicht gefunden.")
 
-    # Status ändern
+    # Status ändern; das Auto bleibt belegt, solange ein anderer aktiver Vertrag läuft oder noch beginnt
     vertrag.status = "beendet"
-    auto.status = AutoStatus.verfügbar
+    if not await db.scalar(select(weitere_belegung(auto.id, vertrag.id, datetime.now().date()))):
+        auto.status = AutoStatus.verfügbar
 
     # Speichern
-    db.commit()
+    await db.commit()
 
-    logger.info(f"Vertrag {vertrag_id} erfolgreich gekündigt.")
+    logger.info("Vertrag %s erfolgreich gekündigt.", vertrag_id)
     return MessageResponse(message="Vertrag wurde erfolgreich gekündigt.")
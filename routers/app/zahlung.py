@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.zahlung import Zahlung as ZahlungModel
 from models.vertrag import Vertrag as VertragModel  
-from models.user import User
+from services.user_cache import CachedUser
 from schemas.zahlung import ZahlungCreate, Zahlung
-from data_base import get_database_session
+from data_base import get_async_database_session
 from core.logger_config import setup_logger
+from core.metrics import query_budget
 from services.dependencies import customer_or_guest_required
 
 # Logger für dieses Modul initialisieren
@@ -21,14 +23,14 @@ router = APIRouter(prefix="/api/v1")
     status_code=201,
     summary="Erstelle eine neue Zahlung für einen Vertrag"
 )
-
-def create_zahlung(
+@query_budget(4)
+async def create_zahlung(
     zahlung: ZahlungCreate,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(customer_or_guest_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(customer_or_guest_required)
 ):
     # Versuch der Zahlungserstellung protokollieren
-    logger.info(f"Erstelle neue Zahlung für Vertrag ID: {zahlung.vertrag_id}")
+    logger.info("Erstelle neue Zahlung für Vertrag ID: %s", zahlung.vertrag_id)
 
     # Prüfen, ob der Betrag negativ ist
     if zahlung.betrag < 0:
@@ -36,9 +38,9 @@ def create_zahlung(
         raise HTTPException(status_code=400, detail="Betrag darf nicht negativ sein.")
 
     # Prüfen, ob der zugehörige Vertrag existiert
-    vertrag = db.query(VertragModel).filter(VertragModel.id == zahlung.vertrag_id).first()
+    vertrag = await db.scalar(select(VertragModel).where(VertragModel.id == zahlung.vertrag_id))
     if vertrag is None:
-        logger.warning(f"Vertrag mit ID {zahlung.vertrag_id} nicht gefunden.")
+        logger.warning("Vertrag mit ID %s nicht gefunden.", zahlung.vertrag_id)
         raise HTTPException(status_code=404, detail="Vertrag nicht gefunden.")
 
     # Prüfen, ob das Zahlungsdatum vor dem Vertragsbeginn liegt
@@ -55,10 +57,10 @@ def create_zahlung(
         betrag=zahlung.betrag
     )
     db.add(db_zahlung)
-    db.commit()
-    db.refresh(db_zahlung)
+    await db.commit()
+    await db.refresh(db_zahlung)
 
     # Erfolgreiche Zahlungserstellung protokollieren
-    logger.info(f"Zahlung erfolgreich erstellt mit ID: {db_zahlung.id}")
+    logger.info("Zahlung erfolgreich erstellt mit ID: %s", db_zahlung.id)
     
     return db_zahlung
@@ -0,0 +1,166 @@
+import bisect
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import select, func, cast, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import List
+from data_base import get_async_database_session
+from models.auslastung import AutoAuslastung
+from models.auto import Auto
+from services.user_cache import CachedUser
+from schemas.analytics import AuslastungEintrag, AuslastungGruppierung, AuslastungPeriode
+from core.logger_config import setup_logger
+from core.metrics import query_budget
+from services.dependencies import owner_or_viewer_required
+import services.auslastung_service  # noqa: F401  registriert die Rollup-Pflege an Vertrag
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/api/v1/dashboard")
+
+# Maximaler Zeitraum einer Abfrage (Tage)
+MAX_ZEITRAUM_TAGE = 10 * 366
+
+GRUPPEN_SPALTEN = {
+    AuslastungGruppierung.auto: Auto.id,
+    AuslastungGruppierung.brand: Auto.brand,
+    AuslastungGruppierung.model: Auto.model,
+    AuslastungGruppierung.jahr: Auto.jahr,
+}
+
+
+# SQL-Ausdruck für den Periodenbeginn eines Tages (PostgreSQL: date_trunc, SQLite: date-Modifier)
+def periode_start_sql(periode: AuslastungPeriode, dialect: str, tag):
+    if periode == AuslastungPeriode.tag:
+        return tag
+    if dialect == "postgresql":
+        return cast(func.date_trunc("week" if periode == AuslastungPeriode.woche else "month", tag), Date)
+    if periode == AuslastungPeriode.woche:
+        return func.date(tag, "-6 days", "weekday 1")
+    return func.date(tag, "start of month")
+
+
+def as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+# Periode (Beginn, Ende) eines Tages, auf den abgefragten Zeitraum begrenzt
+def periode_grenzen(periode: AuslastungPeriode, start: date, von: date, bis: date) -> tuple[date, date]:
+    if periode == AuslastungPeriode.gesamt:
+        return von, bis
+    if periode == AuslastungPeriode.tag:
+        ende = start
+    elif periode == AuslastungPeriode.woche:
+        ende = start + timedelta(days=6)
+    else:
+        naechster = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        ende = naechster - timedelta(days=1)
+    return max(start, von), min(ende, bis)
+
+
+# Fuhrpark einer Gruppe über die Zeit: Autos zählen ab ihrem Anlagetag (angelegt_am).
+# Sortierte Anlagetage mit Präfixsummen, damit Fahrzeuge und Fahrzeugtage je Periode per binärer Suche folgen.
+class Fuhrpark:
+    __slots__ = ("tage", "anzahl", "summe")
+
+    def __init__(self):
+        self.tage, self.anzahl, self.summe = [], [0], [0]
+
+    def add(self, angelegt: date, autos: int):
+        self.tage.append(angelegt.toordinal())
+        self.anzahl.append(self.anzahl[-1] + autos)
+        self.summe.append(self.summe[-1] + autos * angelegt.toordinal())
+
+    # Autos, die bis zum Tag "ende" angelegt wurden
+    def fahrzeuge(self, ende: date) -> int:
+        return self.anzahl[bisect.bisect_right(self.tage, ende.toordinal())]
+
+    # Fahrzeugtage in [anfang, ende]: vorher angelegte Autos zählen voll, später angelegte ab ihrem Anlagetag
+    def fahrzeugtage(self, anfang: date, ende: date) -> int:
+        a, e = anfang.toordinal(), ende.toordinal()
+        vorher = bisect.bisect_right(self.tage, a)
+        bis_ende = bisect.bisect_right(self.tage, e)
+        spaeter = self.anzahl[bis_ende] - self.anzahl[vorher]
+        spaeter_tage = spaeter * (e + 1) - (self.summe[bis_ende] - self.summe[vorher])
+        return self.anzahl[vorher] * (e - a + 1) + spaeter_tage
+
+
+# =================== Auslastung auswerten ===================
+@router.get(
+    "/analytics/auslastung",
+    response_model=List[AuslastungEintrag],
+    summary="Fahrzeugauslastung nach Auto, Marke, Modell oder Baujahr und Zeitraum"
+)
+@query_budget(3)
+async def show_auslastung(
+    von: date = Query(..., description="Erster Tag des Zeitraums"),
+    bis: date = Query(..., description="Letzter Tag des Zeitraums (inklusive)"),
+    gruppierung: AuslastungGruppierung = Query(AuslastungGruppierung.auto),
+    periode: AuslastungPeriode = Query(AuslastungPeriode.gesamt),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required)
+):
+    logger.info(
+        "Dashboard: Auslastung %s bis %s nach %s/%s wird abgerufen", von, bis, gruppierung.value, periode.value
+    )
+
+    if bis < von:
+        raise HTTPException(status_code=400, detail="'bis' darf nicht vor 'von' liegen.")
+    if (bis - von).days + 1 > MAX_ZEITRAUM_TAGE:
+        raise HTTPException(status_code=400, detail=f"Zeitraum darf höchstens {MAX_ZEITRAUM_TAGE} Tage umfassen.")
+
+    gruppe = GRUPPEN_SPALTEN[gruppierung]
+
+    # Fuhrpark pro Gruppe nach Anlagetag, damit vergangene Perioden nur die damals vorhandenen Autos zählen
+    fuhrparks = {}
+    fuhrpark_query = (
+        select(gruppe, Auto.angelegt_am, func.count(Auto.id))
+        .where(Auto.angelegt_am <= bis)
+        .group_by(gruppe, Auto.angelegt_am)
+        .order_by(gruppe, Auto.angelegt_am)
+    )
+    for key, angelegt, anzahl in (await db.execute(fuhrpark_query)).all():
+        fuhrparks.setdefault(key, Fuhrpark()).add(as_date(angelegt), anzahl)
+
+    # Belegte Tage pro Gruppe und Periode, ausschließlich aus dem Rollup. Es hat pro Auto und Tag höchstens
+    # eine Zeile, auch wenn sich Verträge überschneiden; Tage vor dem Anlagetag zählen wie im Nenner nicht mit.
+    start_sql = periode_start_sql(periode, db.bind.dialect.name, AutoAuslastung.tag)
+    spalten = [gruppe, func.count()]
+    if periode != AuslastungPeriode.gesamt:
+        spalten.insert(1, start_sql.label("periode_start"))
+    query = (
+        select(*spalten)
+        .select_from(AutoAuslastung)
+        .join(Auto, Auto.id == AutoAuslastung.auto_id)
+        .where(AutoAuslastung.tag.between(von, bis), AutoAuslastung.tag >= Auto.angelegt_am)
+        .group_by(*spalten[:-1])
+    )
+    belegt = {}
+    for row in (await db.execute(query)).all():
+        start = von if periode == AuslastungPeriode.gesamt else as_date(row[1])
+        belegt[(row[0], start)] = row[-1]
+
+    # Gesamtzeitraum: jede Gruppe, auch ohne Buchungen; Perioden: nur Perioden mit Buchungen
+    if periode == AuslastungPeriode.gesamt:
+        for key in fuhrparks:
+            belegt.setdefault((key, von), 0)
+
+    eintraege = []
+    for (key, start), belegte_tage in sorted(belegt.items(), key=lambda item: item[0]):
+        anfang, ende = periode_grenzen(periode, start, von, bis)
+        fuhrpark = fuhrparks.get(key)
+        anzahl = fuhrpark.fahrzeuge(ende) if fuhrpark else 0
+        verfuegbare_tage = fuhrpark.fahrzeugtage(anfang, ende) if fuhrpark else 0
+        eintraege.append(AuslastungEintrag(
+            gruppe=str(key),
+            periode_start=anfang,
+            periode_ende=ende,
+            fahrzeuge=anzahl,
+            belegte_tage=belegte_tage,
+            verfuegbare_tage=verfuegbare_tage,
+            auslastung=round(belegte_tage / verfuegbare_tage, 4) if verfuegbare_tage else 0.0,
+        ))
+    return eintraege
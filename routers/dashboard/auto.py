@@ -1,22 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends , Path
-from sqlalchemy.orm import Session
-from typing import List 
+from fastapi import APIRouter, HTTPException, Depends , Path, Query, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
 from models.auto import Auto as AutoModel, AutoStatus
-from schemas.auto import AutoCreate, Auto, AutoUpdate
-from data_base import get_database_session
+from schemas.auto import AutoCreate, Auto, AutoUpdate, AutoSortField, AutoStatus as AutoStatusSchema
+from schemas.pagination import Page, SortOrder
+from data_base import get_async_database_session
 from core.logger_config import setup_logger
+from core.metrics import query_budget
+from services.datenversion import conditional_get, if_match_pruefen, versioniert_speichern
 from services.dependencies import owner_required, owner_or_editor_required , owner_or_viewer_required
-from models.user import User
+from services.user_cache import CachedUser
+from services.pagination import fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.fleet_snapshot import fleet_snapshot
+from core.config import FLEET_SNAPSHOT_ENABLED
 
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/v1/dashboard")
 
 # Hilfsfunktion, um ein Auto anhand der ID zu holen oder 404 Fehler auszulösen
-def get_auto_by_id(db: Session, auto_id: int) -> AutoModel:
-    auto = db.query(AutoModel).filter(AutoModel.id == auto_id).first()
+async def get_auto_by_id(db: AsyncSession, auto_id: int) -> AutoModel:
+    auto = await db.scalar(select(AutoModel).where(AutoModel.id == auto_id))
     if not auto:
-        logger.warning(f"Auto mit ID {auto_id} nicht gefunden")  # Auto nicht gefunden
+        logger.warning("Auto mit ID %s nicht gefunden", auto_id)  # Auto nicht gefunden
         raise HTTPException(status_code=404, detail=f"Auto mit ID {auto_id} nicht gefunden.")
     return auto
 
@@ -33,13 +40,14 @@ def validate_preis_pre_stunde(preis: float):
     status_code=201,
     summary="Neues Auto im System anlegen"
 )
-def create_auto(
+@query_budget(3)
+async def create_auto(
     auto: AutoCreate,
     status_code=201,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
 ):
-    logger.info(f"Dashboard: Auto wird erstellt: {auto.brand} {auto.model}")
+    logger.info("Dashboard: Auto wird erstellt: %s %s", auto.brand, auto.model)
     validate_preis_pre_stunde(auto.preis_pro_stunde)
 
     db_auto = AutoModel(
@@ -50,9 +58,9 @@ def create_auto(
         status=auto.status,
     )
     db.add(db_auto)
-    db.commit()
-    db.refresh(db_auto)
-    logger.info(f"Dashboard: Auto erfolgreich erstellt mit ID: {db_auto.id}")
+    await db.commit()
+    await db.refresh(db_auto)
+    logger.info("Dashboard: Auto erfolgreich erstellt mit ID: %s", db_auto.id)
     return db_auto
 
 # =================== Auto aktualisieren ===================
@@ -62,14 +70,18 @@ def create_auto(
     status_code=200,
     summary="Auto-Daten aktualisieren"
 )
-def update_auto(
+@query_budget(4)
+async def update_auto(
     auto_id: int,
     auto_update: AutoUpdate,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_editor_required)
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag aus dem letzten GET; passt er nicht mehr, antwortet der Server mit 409"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_editor_required)
 ):
-    logger.info(f"Dashboard: Auto mit ID {auto_id} wird aktualisiert")
-    auto = get_auto_by_id(db, auto_id)
+    logger.info("Dashboard: Auto mit ID %s wird aktualisiert", auto_id)
+    auto = await get_auto_by_id(db, auto_id)
+    if_match_pruefen(if_match, AutoModel.__tablename__, auto)
 
     if auto_update.preis_pro_stunde is not None:
         validate_preis_pre_stunde(auto_update.preis_pro_stunde)
@@ -83,9 +95,9 @@ def update_auto(
     if auto_update.status is not None:
         auto.status = auto_update.status
 
-    db.commit()
-    db.refresh(auto)
-    logger.info(f"Dashboard: Auto mit ID {auto_id} wurde erfolgreich aktualisiert")
+    response.headers["ETag"] = await versioniert_speichern(db, AutoModel.__tablename__, auto)
+    await db.refresh(auto)
+    logger.info("Dashboard: Auto mit ID %s wurde erfolgreich aktualisiert", auto_id)
     return auto
 
 # =================== Auto löschen ===================
@@ -94,34 +106,61 @@ def update_auto(
     status_code=204,
     summary="Auto löschen"
 )
-def delete_auto(
+@query_budget(4)
+async def delete_auto(
     auto_id: int,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
 ):
-    logger.info(f"Dashboard: Löschvorgang für Auto mit ID {auto_id} wird gestartet")
-    auto = get_auto_by_id(db, auto_id)
+    logger.info("Dashboard: Löschvorgang für Auto mit ID %s wird gestartet", auto_id)
+    auto = await get_auto_by_id(db, auto_id)
 
-    db.delete(auto)
-    db.commit()
-    logger.info(f"Dashboard: Auto mit ID {auto_id} wurde erfolgreich gelöscht")
+    await db.delete(auto)
+    await db.commit()
+    logger.info("Dashboard: Auto mit ID %s wurde erfolgreich gelöscht", auto_id)
     return
 
 # =================== Alle verfügbaren Autos anzeigen ===================
 @router.get(
     "/autos",
-    response_model=List[Auto],
-    summary="Alle verfügbaren Autos anzeigen"
+    response_model=Page[Auto],
+    summary="Alle verfügbaren Autos anzeigen (seitenweise)"
 )
-def show_all_auto(
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_viewer_required)
+@query_budget(3)
+async def show_all_auto(
+    status: AutoStatusSchema = Query(AutoStatusSchema.verfügbar, description="Status der Autos"),
+    brand: Optional[str] = Query(None, description="Marke (exakt)"),
+    model: Optional[str] = Query(None, description="Modell (exakt)"),
+    jahr_von: Optional[int] = Query(None, description="Baujahr ab"),
+    jahr_bis: Optional[int] = Query(None, description="Baujahr bis"),
+    sort_by: AutoSortField = Query(AutoSortField.id, description="Sortierspalte"),
+    order: SortOrder = Query(SortOrder.asc, description="Sortierrichtung"),
+    cursor: Optional[str] = Query(None, description="Cursor aus next_cursor der vorherigen Seite"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Seitengröße"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required),
+    etag: dict = Depends(conditional_get("auto"))
 ):
-    logger.info("Alle verfügbaren Autos werden abgerufen")  # Alle verfügbaren Autos holen
-    autos = db.query(AutoModel).filter(AutoModel.status == AutoStatus.verfügbar).all()
-    if not autos:
+    logger.info("Alle verfügbaren Autos werden abgerufen")  # Autos seitenweise holen
+    if FLEET_SNAPSHOT_ENABLED:
+        # Gleiche Filter und Keyset-Semantik, aber aus dem In-Memory-Snapshot
+        await fleet_snapshot.ensure_loaded(db, etag.get("ETag"))
+        return fleet_snapshot.page(status, brand, model, jahr_von, jahr_bis, sort_by.value, order, cursor, limit)
+
+    query = select(AutoModel).where(AutoModel.status == AutoStatus(status.value))
+    if brand:
+        query = query.where(AutoModel.brand == brand)
+    if model:
+        query = query.where(AutoModel.model == model)
+    if jahr_von is not None:
+        query = query.where(AutoModel.jahr >= jahr_von)
+    if jahr_bis is not None:
+        query = query.where(AutoModel.jahr <= jahr_bis)
+
+    page = await fetch_page(db, query, AutoModel, sort_by.value, order, cursor, limit)
+    if not page["items"]:
         logger.info("Keine verfügbaren Autos gefunden")  # Keine Autos verfügbar
-    return autos
+    return page
 
 # =================== Auto anzeigen ===================
 @router.get(
@@ -129,11 +168,13 @@ def show_all_auto(
     response_model=Auto,
     summary="Details eines Autos anzeigen"
 )
-def show_auto(
+@query_budget(3)
+async def show_auto(
     auto_id: int = Path(..., gt=0, description="Die ID des autos (muss > 0 sein)"),
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required),
+    etag: dict = Depends(conditional_get("auto", "auto_id"))
 ):
-    logger.info(f"Auto mit ID {auto_id} wird angezeigt")  # Auto anzeigen
-    auto_details = get_auto_by_id(db, auto_id)
+    logger.info("Auto mit ID %s wird angezeigt", auto_id)  # Auto anzeigen
+    auto_details = await get_auto_by_id(db, auto_id)
     return auto_details
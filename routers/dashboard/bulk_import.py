@@ -0,0 +1,146 @@
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.auto import Auto as AutoModel
+from models.kunden import Kunden as KundenModel
+from models.vertrag import Vertrag as VertragModel
+from models.zahlung import Zahlung as ZahlungModel
+from services.user_cache import CachedUser
+from schemas.auto import AutoCreate
+from schemas.kunden import KundenCreate
+from schemas.zahlung import ZahlungCreate
+from schemas.bulk_import import ImportReport
+from data_base import get_async_database_session
+from core.logger_config import setup_logger
+from core.metrics import query_budget
+from services.dependencies import owner_required
+from services.fleet_snapshot import fleet_snapshot
+from services.import_service import ImportBatch, validate_rows, lookup_in, insert_rows
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/api/v1/dashboard")
+
+# Beschreibung des Request-Bodys für die OpenAPI-Doku (der Body wird als Stream gelesen)
+IMPORT_BODY_DOC = {
+    "requestBody": {
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "text/csv": {"schema": {"type": "string"}},
+        },
+        "required": True,
+    }
+}
+
+# Speichert die gültigen Zeilen in einer Transaktion; mit atomar=true wird bei Fehlern nichts gespeichert
+async def finish_import(db: AsyncSession, model, batch: ImportBatch, atomar: bool, name: str) -> dict:
+    if atomar and batch.errors:
+        await db.rollback()
+        logger.warning("Import %s verworfen: %s fehlerhafte Zeilen", name, len(batch.errors))
+        raise HTTPException(status_code=422, detail=batch.report(eingefuegt=0))
+
+    try:
+        eingefuegt = await insert_rows(db, model, batch)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error("Fehler beim Import %s: %s", name, e)
+        raise HTTPException(status_code=500, detail="Fehler beim Speichern des Imports.")
+
+    logger.info("Import %s: %s eingefügt, %s fehlerhaft", name, eingefuegt, len(batch.errors))
+    return batch.report(eingefuegt)
+
+# =================== Autos importieren ===================
+@router.post(
+    "/import/autos",
+    response_model=ImportReport,
+    summary="Autos als JSON-Array oder CSV importieren",
+    openapi_extra=IMPORT_BODY_DOC
+)
+@query_budget(3)
+async def import_autos(
+    request: Request,
+    atomar: bool = Query(False, description="Bei fehlerhaften Zeilen nichts speichern"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
+):
+    logger.info("Dashboard: Autoimport gestartet")
+    batch = await validate_rows(request, AutoCreate)
+
+    for zeile, auto in list(batch.rows.items()):
+        if auto.preis_pro_stunde <= 0:
+            batch.reject(zeile, "Der Stundenpreis muss größer als 0 sein.")
+
+    report = await finish_import(db, AutoModel, batch, atomar, "autos")
+    fleet_snapshot.invalidate()  # Massen-INSERT umgeht die ORM-Events des Snapshots
+    return report
+
+# =================== Kunden importieren ===================
+@router.post(
+    "/import/kunden",
+    response_model=ImportReport,
+    summary="Kunden als JSON-Array oder CSV importieren",
+    openapi_extra=IMPORT_BODY_DOC
+)
+@query_budget(13)
+async def import_kunden(
+    request: Request,
+    atomar: bool = Query(False, description="Bei fehlerhaften Zeilen nichts speichern"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
+):
+    logger.info("Dashboard: Kundenimport gestartet")
+    batch = await validate_rows(request, KundenCreate)
+
+    # E-Mail muss eindeutig sein: innerhalb der Datei und gegenüber bestehenden Kunden
+    gesehen = {}
+    for zeile, kunde in list(batch.rows.items()):
+        email = kunde.email.lower()
+        if email in gesehen:
+            batch.reject(zeile, f"E-Mail doppelt in dieser Datei (Zeile {gesehen[email]}).")
+        else:
+            gesehen[email] = zeile
+
+    # Abgleich mit der Datenbank ebenfalls ohne Groß-/Kleinschreibung (Funktionsindex ix_kunden_email_lower)
+    emails = set(gesehen)
+    email_lower = func.lower(KundenModel.email)
+    vorhanden = {row.email for row in await lookup_in(
+        db, lambda chunk: select(email_lower.label("email")).where(email_lower.in_(chunk)), emails
+    )}
+    for zeile, kunde in list(batch.rows.items()):
+        if kunde.email.lower() in vorhanden:
+            batch.reject(zeile, "Ein Kunde mit dieser E-Mail existiert bereits.")
+
+    return await finish_import(db, KundenModel, batch, atomar, "kunden")
+
+# =================== Zahlungen importieren ===================
+@router.post(
+    "/import/zahlungen",
+    response_model=ImportReport,
+    summary="Zahlungen als JSON-Array oder CSV importieren",
+    openapi_extra=IMPORT_BODY_DOC
+)
+@query_budget(13)
+async def import_zahlungen(
+    request: Request,
+    atomar: bool = Query(False, description="Bei fehlerhaften Zeilen nichts speichern"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
+):
+    logger.info("Dashboard: Zahlungsimport gestartet")
+    batch = await validate_rows(request, ZahlungCreate)
+
+    # Gleiche Regeln wie validate_zahlung, Verträge mit IN-Abfragen statt einzeln
+    vertrag_ids = {zahlung.vertrag_id for zahlung in batch.rows.values()}
+    vertraege = dict(await lookup_in(
+        db, lambda chunk: select(VertragModel.id, VertragModel.beginnt_datum).where(VertragModel.id.in_(chunk)), vertrag_ids
+    ))
+    for zeile, zahlung in list(batch.rows.items()):
+        if zahlung.betrag < 0:
+            batch.reject(zeile, "Betrag darf nicht negativ sein.")
+        beginnt_datum = vertraege.get(zahlung.vertrag_id)
+        if beginnt_datum is None:
+            batch.reject(zeile, f"Vertrag mit ID {zahlung.vertrag_id} nicht gefunden.")
+        elif zahlung.datum < beginnt_datum:
+            batch.reject(zeile, "Zahlungsdatum darf nicht vor Vertragsbeginn liegen.")
+
+    return await finish_import(db, ZahlungModel, batch, atomar, "zahlungen")
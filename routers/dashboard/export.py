@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from typing import Optional
+from datetime import date
+from enum import Enum
+from models.vertrag import Vertrag as VertragModel
+from models.zahlung import Zahlung as ZahlungModel
+from services.user_cache import CachedUser
+from core.logger_config import setup_logger
+from core.metrics import query_budget
+from services.dependencies import owner_or_viewer_required
+from services.export_service import stream_csv, stream_ndjson
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/api/v1/dashboard")
+
+# Unterstützte Exportformate
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+# Spalten der Exporte (in Ausgabereihenfolge)
+VERTRAG_COLUMNS = ["id", "auto_id", "kunden_id", "status", "beginnt_datum", "beendet_datum", "total_preis"]
+ZAHLUNG_COLUMNS = ["id", "vertrag_id", "zahlungsmethode", "datum", "status", "betrag"]
+
+# Prüft den Datumsbereich
+def validate_date_range(von: Optional[date], bis: Optional[date]):
+    if von and bis and von > bis:
+        logger.warning("Ungültiger Datumsbereich für Export")
+        raise HTTPException(status_code=400, detail="'von' darf nicht nach 'bis' liegen.")
+
+# Baut die Streaming-Antwort im gewünschten Format
+def export_response(query, columns: list[str], export_format: ExportFormat, name: str) -> StreamingResponse:
+    if export_format == ExportFormat.csv:
+        body, media_type = stream_csv(query, columns), "text/csv; charset=utf-8"
+    else:
+        body, media_type = stream_ndjson(query, columns), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'},
+    )
+
+# =================== Verträge exportieren ===================
+@router.get(
+    "/export/vertraege",
+    summary="Verträge als CSV oder NDJSON streamen"
+)
+@query_budget(2)
+async def export_vertraege(
+    format: ExportFormat = Query(ExportFormat.csv, description="Exportformat"),
+    von: Optional[date] = Query(None, description="Vertragsbeginn ab"),
+    bis: Optional[date] = Query(None, description="Vertragsbeginn bis"),
+    current_user: CachedUser = Depends(owner_or_viewer_required)
+):
+    logger.info("Export der Verträge (%s) von %s bis %s", format.value, von, bis)
+    validate_date_range(von, bis)
+
+    query = select(*(getattr(VertragModel, column) for column in VERTRAG_COLUMNS))
+    if von:
+        query = query.where(VertragModel.beginnt_datum >= von)
+    if bis:
+        query = query.where(VertragModel.beginnt_datum <= bis)
+
+    return export_response(query.order_by(VertragModel.id), VERTRAG_COLUMNS, format, "vertraege")
+
+# =================== Zahlungen exportieren ===================
+@router.get(
+    "/export/zahlungen",
+    summary="Zahlungen als CSV oder NDJSON streamen"
+)
+@query_budget(2)
+async def export_zahlungen(
+    format: ExportFormat = Query(ExportFormat.csv, description="Exportformat"),
+    von: Optional[date] = Query(None, description="Zahlungsdatum ab"),
+    bis: Optional[date] = Query(None, description="Zahlungsdatum bis"),
+    current_user: CachedUser = Depends(owner_or_viewer_required)
+):
+    logger.info("Export der Zahlungen (%s) von %s bis %s", format.value, von, bis)
+    validate_date_range(von, bis)
+
+    query = select(*(getattr(ZahlungModel, column) for column in ZAHLUNG_COLUMNS))
+    if von:
+        query = query.where(ZahlungModel.datum >= von)
+    if bis:
+        query = query.where(ZahlungModel.datum <= bis)
+
+    return export_response(query.order_by(ZahlungModel.id), ZAHLUNG_COLUMNS, format, "zahlungen")
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, Path
-from sqlalchemy.orm import Session
-from typing import List
-from data_base import get_database_session
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+from data_base import get_async_database_session
 from models.kunden import Kunden as KundenModel
-from schemas.kunden import KundenCreate, Kunden, KundenUpdate
+from schemas.kunden import KundenCreate, Kunden, KundenUpdate, KundenSortField
+from schemas.pagination import Page, SortOrder
+from pydantic import TypeAdapter
+from services.pagination import fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from core.logger_config import setup_logger
-from models.user import User
+from core.metrics import query_budget
+from core.fast_json import adapter_response
+from services.datenversion import conditional_get, if_match_pruefen, versioniert_speichern
+from services.user_cache import CachedUser
 from services.dependencies import (
     owner_required,
     owner_or_editor_required,
@@ -15,11 +23,14 @@ from services.dependencies import (
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/v1/dashboard")
 
+# Einmal kompilierter Serializer für die Kundenliste
+KUNDEN_PAGE = TypeAdapter(Page[Kunden])
+
 # Hilfsfunktion, um einen Kunden anhand der ID zu holen oder 404 Fehler auszulösen
-def get_kunde_by_id(db: Session, kunden_id: int) -> KundenModel:
-    kunde = db.query(KundenModel).filter(KundenModel.id == kunden_id).first()
+async def get_kunde_by_id(db: AsyncSession, kunden_id: int) -> KundenModel:
+    kunde = await db.scalar(select(KundenModel).where(KundenModel.id == kunden_id))
     if not kunde:
-        logger.warning(f"Kunde mit ID {kunden_id} nicht gefunden")  # Kunde nicht gefunden
+        logger.warning("Kunde mit ID %s nicht gefunden", kunden_id)  # Kunde nicht gefunden
         raise HTTPException(status_code=404, detail=f"Kunde mit ID {kunden_id} nicht gefunden.")
     return kunde
 
@@ -30,12 +41,13 @@ def get_kunde_by_id(db: Session, kunden_id: int) -> KundenModel:
     status_code=201,
     summary="Neuen Kunden anlegen"
 )
-def create_kunde(
+@query_budget(3)
+async def create_kunde(
     kunde: KundenCreate,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)  # Nur Besitzer dürfen erstellen
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)  # Nur Besitzer dürfen erstellen
 ):
-    logger.info(f"Dashboard: Neuer Kunde wird erstellt: {kunde.vorname} {kunde.nachname}")
+    logger.info("Dashboard: Neuer Kunde wird erstellt: %s %s", kunde.vorname, kunde.nachname)
     db_kunde = KundenModel(
         vorname=kunde.vorname,
         nachname=kunde.nachname,
@@ -44,26 +56,47 @@ def create_kunde(
         email=kunde.email
     )
     db.add(db_kunde)
-    db.commit()
-    db.refresh(db_kunde)
-    logger.info(f"Dashboard: Kunde erfolgreich erstellt mit ID: {db_kunde.id}")
+    await db.commit()
+    await db.refresh(db_kunde)
+    logger.info("Dashboard: Kunde erfolgreich erstellt mit ID: %s", db_kunde.id)
     return db_kunde
 
 # =================== Alle Kunden abrufen ===================
 @router.get(
     "/kunden",
-    response_model=List[Kunden],
-    summary="Alle Kunden abrufen"
+    response_model=Page[Kunden],
+    summary="Alle Kunden abrufen (seitenweise)"
 )
-def get_all_kunden(
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_viewer_required)  # Besitzer und Viewer zugelassen
+@query_budget(3)
+async def get_all_kunden(
+    nachname: Optional[str] = Query(None, description="Nachname (exakt)"),
+    email: Optional[str] = Query(None, description="E-Mail (exakt)"),
+    geb_datum_von: Optional[date] = Query(None, description="Geburtsdatum ab"),
+    geb_datum_bis: Optional[date] = Query(None, description="Geburtsdatum bis"),
+    sort_by: KundenSortField = Query(KundenSortField.id, description="Sortierspalte"),
+    order: SortOrder = Query(SortOrder.asc, description="Sortierrichtung"),
+    cursor: Optional[str] = Query(None, description="Cursor aus next_cursor der vorherigen Seite"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Seitengröße"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required),  # Besitzer und Viewer zugelassen
+    etag: dict = Depends(conditional_get("kunden"))
 ):
     logger.info("Dashboard: Alle Kunden werden abgerufen")
-    kunden = db.query(KundenModel).all()
-    if not kunden:
+    query = select(KundenModel)
+    if nachname:
+        query = query.where(KundenModel.nachname == nachname)
+    if email:
+        query = query.where(KundenModel.email == email)
+    if geb_datum_von:
+        query = query.where(KundenModel.geb_datum >= geb_datum_von)
+    if geb_datum_bis:
+        query = query.where(KundenModel.geb_datum <= geb_datum_bis)
+
+    page = await fetch_page(db, query, KundenModel, sort_by.value, order, cursor, limit)
+    if not page["items"]:
         logger.info("Dashboard: Keine Kunden gefunden")
-    return kunden
+    # Schneller Pfad: vorkompilierter TypeAdapter statt response_model-Validierung und json.dumps
+    return adapter_response(KUNDEN_PAGE, page, headers=etag)
 
 # =================== Kunden Details abrufen ===================
 @router.get(
@@ -71,13 +104,15 @@ def get_all_kunden(
     response_model=Kunden,
     summary="Details eines Kunden abrufen"
 )
-def get_kunde_details(
+@query_budget(3)
+async def get_kunde_details(
     kunden_id: int = Path(..., gt=0, description="Die ID des Kunden (muss > 0 sein)"),
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)  # Nur Besitzer dürfen Details sehen
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required),  # Nur Besitzer dürfen Details sehen
+    etag: dict = Depends(conditional_get("kunden", "kunden_id"))
 ):
-    logger.info(f"Dashboard: Abruf von Kunde mit ID {kunden_id}")
-    kunde = get_kunde_by_id(db, kunden_id)
+    logger.info("Dashboard: Abruf von Kunde mit ID %s", kunden_id)
+    kunde = await get_kunde_by_id(db, kunden_id)
     return kunde
 
 # =================== Kunden aktualisieren ===================
@@ -86,14 +121,18 @@ def get_kunde_details(
     response_model=Kunden,
     summary="Kundendaten aktualisieren"
 )
-def update_kunde(
+@query_budget(4)
+async def update_kunde(
     kunden_id: int,
     kunde_update: KundenUpdate,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_editor_required)  # Besitzer oder Editor zugelassen
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag aus dem letzten GET; passt er nicht mehr, antwortet der Server mit 409"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_editor_required)  # Besitzer oder Editor zugelassen
 ):
-    logger.info(f"Dashboard: Aktualisierung von Kunde mit ID {kunden_id}")
-    kunde = get_kunde_by_id(db, kunden_id)
+    logger.info("Dashboard: Aktualisierung von Kunde mit ID %s", kunden_id)
+    kunde = await get_kunde_by_id(db, kunden_id)
+    if_match_pruefen(if_match, KundenModel.__tablename__, kunde)
 
     # Nur vorhandene Felder aktualisieren
     if kunde_update.vorname is not None:
@@ -107,9 +146,9 @@ def update_kunde(
     if kunde_update.email is not None:
         kunde.email = kunde_update.email
 
-    db.commit()
-    db.refresh(kunde)
-    logger.info(f"Dashboard: Kunde mit ID {kunden_id} erfolgreich aktualisiert")
+    response.headers["ETag"] = await versioniert_speichern(db, KundenModel.__tablename__, kunde)
+    await db.refresh(kunde)
+    logger.info("Dashboard: Kunde mit ID %s erfolgreich aktualisiert", kunden_id)
     return kunde
 
 # =================== Kunden löschen ===================
@@ -118,14 +157,15 @@ def update_kunde(
     status_code=204,
     summary="Kunden löschen"
 )
-def delete_kunde(
+@query_budget(4)
+async def delete_kunde(
     kunden_id: int,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)  # Nur Besitzer dürfen löschen
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)  # Nur Besitzer dürfen löschen
 ):
-    logger.info(f"Dashboard: Löschvorgang für Kunde mit ID {kunden_id} wird gestartet")
-    kunde = get_kunde_by_id(db, kunden_id)
-    db.delete(kunde)
-    db.commit()
-    logger.info(f"Dashboard: Kunde mit ID {kunden_id} wurde erfolgreich gelöscht")
+    logger.info("Dashboard: Löschvorgang für Kunde mit ID %s wird gestartet", kunden_id)
+    kunde = await get_kunde_by_id(db, kunden_id)
+    await db.delete(kunde)
+    await db.commit()
+    logger.info("Dashboard: Kunde mit ID %s wurde erfolgreich gelöscht", kunden_id)
     return
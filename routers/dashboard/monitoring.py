@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from data_base import get_engine, get_async_engine
+from core.db_pool import pool_snapshot
+from core.security.hash import hashing_pool
+from core.logger_config import setup_logger
+from core.metrics import metrics_registry, query_budget
+from services.dependencies import owner_required
+from services.user_cache import CachedUser
+
+logger = setup_logger(__name__)
+router = APIRouter(prefix="/api/v1/dashboard")
+
+# Scrape-Endpunkt für Prometheus (ohne Präfix und ohne Login, wie üblich für /metrics)
+metrics_router = APIRouter()
+
+# =================== Connection-Pool-Statistiken ===================
+@router.get(
+    "/monitoring/pool",
+    summary="Live-Statistiken der Datenbank-Connection-Pools anzeigen"
+)
+@query_budget(1)
+async def show_pool_stats(
+    current_user: CachedUser = Depends(owner_required)
+):
+    logger.info("Dashboard: Pool-Statistiken werden abgerufen")
+    return {
+        "sync": pool_snapshot(get_engine()),
+        "async": pool_snapshot(get_async_engine().sync_engine),
+    }
+
+# =================== Hashing-Pool-Statistiken ===================
+@router.get(
+    "/monitoring/hashing",
+    summary="Auslastung des bcrypt-Hashing-Pools anzeigen"
+)
+@query_budget(1)
+async def show_hashing_stats(
+    current_user: CachedUser = Depends(owner_required)
+):
+    logger.info("Dashboard: Hashing-Statistiken werden abgerufen")
+    return hashing_pool.stats()
+
+# =================== Prometheus-Metriken ===================
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Latenz, Statuscodes und SQL-Statistiken pro Route im Prometheus-Format"
+)
+@query_budget(0)
+async def show_metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
-from data_base import get_database_session
-from models.vertrag import Vertrag as vertrag_model  
-from models.auto import Auto  
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
+from typing import Optional
+from datetime import datetime, date
+from data_base import get_async_database_session
+from models.vertrag import Vertrag as vertrag_model, VertragStatus as VertragStatusModel
+from models.auto import Auto, AutoStatus
 from models.kunden import Kunden  
-from models.user import User
-from schemas.vertrag import VertragCreate, Vertrag, VertragUpdate  
+from services.user_cache import CachedUser
+from schemas.vertrag import VertragCreate, Vertrag, VertragUpdate, VertragSortField, VertragStatus
+from schemas.pagination import Page, SortOrder
+from services.pagination import fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from core.logger_config import setup_logger
+from core.metrics import query_budget
+from core.fast_json import rows_response, schema_columns
+from services.datenversion import conditional_get, if_match_pruefen, versioniert_speichern
+from services.vertrag_service import BUCHBARE_STATUS, weitere_belegung, zeitraum_belegt
 from services.dependencies import owner_required, owner_or_viewer_required, owner_or_editor_required
 from pydantic import BaseModel
 
@@ -19,6 +27,9 @@ class MessageResponse(BaseModel):
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/v1/dashboard")
 
+# Spalten der Vertragsliste in der Feldreihenfolge des Schemas
+VERTRAG_COLUMNS = schema_columns(vertrag_model, Vertrag)
+
 # =================== Vertrag erstellen ===================
 @router.post(
     "/vertraege",
@@ -26,12 +37,13 @@ router = APIRouter(prefix="/api/v1/dashboard")
     status_code=201,
     summary="Neuen Vertrag anlegen"
 )
-def create_vertrag(
+@query_budget(12)
+async def create_vertrag(
     vertrag: VertragCreate, 
-    db: Session = Depends(get_database_session), 
-    current_user: User = Depends(owner_required)  # Nur Besitzer dürfen Vertrag erstellen
+    db: AsyncSession = Depends(get_async_database_session), 
+    current_user: CachedUser = Depends(owner_required)  # Nur Besitzer dürfen Vertrag erstellen
 ):
-    logger.info(f"User {current_user.id} erstellt Vertrag für Auto {vertrag.auto_id} und Kunde {vertrag.kunden_id}")
+    logger.info("User %s erstellt Vertrag für Auto %s und Kunde %s", current_user.id, vertrag.auto_id, vertrag.kunden_id)
 
     # Validierung der Datumsangaben
     if vertrag.beginnt_datum >= vertrag.beendet_datum:
@@ -42,23 +54,31 @@ def create_vertrag(
         logger.warning("Vertragsdauer muss mindestens einen Tag sein")
         raise HTTPException(status_code=400, detail="Vertragsdauer muss mindestens einen Tag sein.")
 
-    # Auto prüfen und Verfügbarkeit sicherstellen
-    auto = db.query(Auto).filter(Auto.id == vertrag.auto_id).first()
+    # Auto prüfen und Verfügbarkeit im Zeitraum sicherstellen, wie bei der Buchung in der App
+    auto = await db.scalar(select(Auto).where(Auto.id == vertrag.auto_id))
     if not auto:
         logger.warning("Auto nicht gefunden")
         raise HTTPException(status_code=404, detail="Auto nicht gefunden.")
-    if auto.status in ["beschädigt", "reserviert", "vermietet", "in_wartung", "außer_betrieb"]:
-        logger.warning(f"Auto derzeit nicht verfügbar (Status: {auto.status})")
+    if auto.status.value not in BUCHBARE_STATUS:
+        logger.warning("Auto derzeit nicht verfügbar (Status: %s)", auto.status)
         raise HTTPException(status_code=400, detail="Auto derzeit nicht verfügbar.")
+    if await db.scalar(select(zeitraum_belegt(auto.id, vertrag.beginnt_datum, vertrag.beendet_datum))):
+        logger.warning("Auto %s im Zeitraum %s bis %s bereits belegt", auto.id, vertrag.beginnt_datum, vertrag.beendet_datum)
+        raise HTTPException(status_code=400, detail="Auto im gewünschten Zeitraum bereits vermietet.")
 
     # Kunde prüfen
-    kunde = db.query(Kunden).filter(Kunden.id == vertrag.kunden_id).first()
+    kunde = await db.scalar(select(Kunden).where(Kunden.id == vertrag.kunden_id))
     if not kunde:
         logger.warning("Kunde nicht gefunden")
         raise HTTPException(status_code=404, detail="Kunde nicht gefunden.")
 
-    # Auto Status auf reserviert setzen
-    auto.status = "reserviert"
+    # Freies Auto reservieren; ein reserviertes oder vermietetes behält seinen Status, wird aber
+    # mitversioniert, damit eine gleichzeitige Buchung desselben Autos mit 409 scheitert
+    war_verfuegbar = auto.status == AutoStatus.verfügbar
+    if war_verfuegbar:
+        auto.status = AutoStatus.reserviert
+    else:
+        flag_modified(auto, "status")
 
     # Vertrag erstellen
     db_vertrag = vertrag_model(
@@ -71,32 +91,76 @@ def create_vertrag(
     )
 
     db.add(db_vertrag)
-    db.commit()
-    db.refresh(db_vertrag)
-    db.refresh(auto)
+    await db.commit()
+    await db.refresh(db_vertrag)
+    await db.refresh(auto)
 
-    # Auto sofort freigeben, falls Vertrag schon abgelaufen ist
-    if datetime.now().date() >= vertrag.beendet_datum:
+    # Auto sofort freigeben, falls Vertrag schon abgelaufen ist und das Auto vorher frei war
+    if war_verfuegbar and datetime.now().date() >= vertrag.beendet_datum:
         auto.status = "verfügbar"
-        db.commit()
-        db.refresh(auto)
-        logger.info(f"Auto {auto.id} sofort nach Vertragsende freigegeben")
+        await db.commit()
+        await db.refresh(auto)
+        logger.info("Auto %s sofort nach Vertragsende freigegeben", auto.id)
 
     return db_vertrag
 
 # =================== Alle Verträge abrufen ===================
 @router.get(
     "/vertraege",
-    response_model=List[Vertrag],
-    summary="Alle Verträge abrufen"
+    response_model=Page[Vertrag],
+    summary="Alle Verträge abrufen (seitenweise)"
 )
-def get_all_vertraege(
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_viewer_required)  # Besitzer und Viewer dürfen alle Verträge sehen
+@query_budget(3)
+async def get_all_vertraege(
+    status: Optional[VertragStatus] = Query(None, description="Vertragsstatus"),
+    kunden_id: Optional[int] = Query(None, gt=0, description="Kunden-ID"),
+    auto_id: Optional[int] = Query(None, gt=0, description="Auto-ID"),
+    beginnt_von: Optional[date] = Query(None, description="Vertragsbeginn ab"),
+    beginnt_bis: Optional[date] = Query(None, description="Vertragsbeginn bis"),
+    sort_by: VertragSortField = Query(VertragSortField.id, description="Sortierspalte"),
+    order: SortOrder = Query(SortOrder.asc, description="Sortierrichtung"),
+    cursor: Optional[str] = Query(None, description="Cursor aus next_cursor der vorherigen Seite"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Seitengröße"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required),  # Besitzer und Viewer dürfen alle Verträge sehen
+    etag: dict = Depends(conditional_get("vertrag"))
 ):
     logger.info("Alle Verträge werden abgerufen")
-    vertraege = db.query(vertrag_model).all()
-    return vertraege
+    query = select(*VERTRAG_COLUMNS)
+    if status:
+        query = query.where(vertrag_model.status == VertragStatusModel(status.value))
+    if kunden_id:
+        query = query.where(vertrag_model.kunden_id == kunden_id)
+    if auto_id:
+        query = query.where(vertrag_model.auto_id == auto_id)
+    if beginnt_von:
+        query = query.where(vertrag_model.beginnt_datum >= beginnt_von)
+    if beginnt_bis:
+        query = query.where(vertrag_model.beginnt_datum <= beginnt_bis)
+
+    # Schneller Pfad: Spalten statt ORM-Objekte, direkt zu JSON kodiert
+    page = await fetch_page(db, query, vertrag_model, sort_by.value, order, cursor, limit, rows=True)
+    return rows_response(page, Vertrag, headers=etag)
+
+# =================== Vertrag anzeigen ===================
+@router.get(
+    "/vertraege/{vertrag_id}",
+    response_model=Vertrag,
+    summary="Details eines Vertrags anzeigen"
+)
+@query_budget(3)
+async def get_vertrag(
+    vertrag_id: int = Path(..., gt=0, description="Die ID des Vertrags (muss > 0 sein)"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required),
+    etag: dict = Depends(conditional_get("vertrag", "vertrag_id"))
+):
+    logger.info("Vertrag %s wird angezeigt", vertrag_id)
+    vertrag = await db.scalar(select(vertrag_model).where(vertrag_model.id == vertrag_id))
+    if not vertrag:
+        logger.warning("Vertrag mit ID %s nicht gefunden", vertrag_id)
+        raise HTTPException(status_code=404, detail=f"Vertrag mit ID {vertrag_id} nicht gefunden.")
+    return vertrag
 
 # =================== Vertrag aktualisieren ===================
 @router.put(
@@ -104,22 +168,26 @@ def get_all_vertraege(
     response_model=Vertrag,
     summary="Vertrag aktualisieren"
 )
-def update_vertrag(
+@query_budget(6)
+async def update_vertrag(
     vertrag_id: int, 
     vertrag_update: VertragUpdate, 
-    db: Session = Depends(get_database_session), 
-    current_user: User = Depends(owner_or_editor_required)  # Besitzer und Editor dürfen Vertrag ändern
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag aus dem letzten GET; passt er nicht mehr, antwortet der Server mit 409"),
+    db: AsyncSession = Depends(get_async_database_session), 
+    current_user: CachedUser = Depends(owner_or_editor_required)  # Besitzer und Editor dürfen Vertrag ändern
 ):
-    logger.info(f"Vertrag {vertrag_id} wird aktualisiert")
+    logger.info("Vertrag %s wird aktualisiert", vertrag_id)
 
-    vertrag = db.query(vertrag_model).filter(vertrag_model.id == vertrag_id).first()
+    vertrag = await db.scalar(select(vertrag_model).where(vertrag_model.id == vertrag_id))
     if not vertrag:
-        logger.warning(f"Vertrag mit ID {vertrag_id} nicht gefunden")
+        logger.warning("Vertrag mit ID %s nicht gefunden", vertrag_id)
         raise HTTPException(status_code=404, detail=f"Vertrag mit ID {vertrag_id} nicht gefunden.")
+    if_match_pruefen(if_match, vertrag_model.__tablename__, vertrag)
 
     # Falls Auto geändert wird, prüfen ob es existiert
     if vertrag_update.auto_id is not None:
-        auto = db.query(Auto).filter(Auto.id == vertrag_update.auto_id).first()
+        auto = await db.scalar(select(Auto).where(Auto.id == vertrag_update.auto_id))
         if not auto:
             logger.warning("Neues Auto nicht gefunden")
             raise HTTPException(status_code=404, detail="Neues Auto nicht gefunden.")
@@ -127,7 +195,7 @@ def update_vertrag(
 
     # Falls Kunde geändert wird, prüfen ob er existiert
     if vertrag_update.kunden_id is not None:
-        kunde = db.query(Kunden).filter(Kunden.id == vertrag_update.kunden_id).first()
+        kunde = await db.scalar(select(Kunden).where(Kunden.id == vertrag_update.kunden_id))
         if not kunde:
             logger.warning("Neuer Kunde nicht gefunden")
             raise HTTPException(status_code=404, detail="Neuer Kunde nicht gefunden.")
@@ -143,9 +211,9 @@ def update_vertrag(
     if vertrag_update.status is not None:
         vertrag.status = vertrag_update.status
 
-    db.commit()
-    db.refresh(vertrag)
-    logger.info(f"Vertrag {vertrag_id} erfolgreich aktualisiert")
+    response.headers["ETag"] = await versioniert_speichern(db, vertrag_model.__tablename__, vertrag)
+    await db.refresh(vertrag)
+    logger.info("Vertrag %s erfolgreich aktualisiert", vertrag_id)
     return vertrag
 
 # =================== Vertrag vor Vertragsbeginn kündigen ===================
@@ -155,16 +223,17 @@ def update_vertrag(
     response_model=MessageResponse,
     status_code=200
 )
-def vertrag_kuendigen(
+@query_budget(8)
+async def vertrag_kuendigen(
     vertrag_id: int, 
-    db: Session = Depends(get_database_session), 
-    current_user: User = Depends(owner_required)  # Nur Besitzer dürfen Vertrag kündigen
+    db: AsyncSession = Depends(get_async_database_session), 
+    current_user: CachedUser = Depends(owner_required)  # Nur Besitzer dürfen Vertrag kündigen
 ):
-    logger.info(f"Versuche Vertrag {vertrag_id} zu kündigen")
+    logger.info("Versuche Vertrag %s zu kündigen", vertrag_id)
 
-    vertrag = db.query(vertrag_model).filter(vertrag_model.id == vertrag_id).first()
+    vertrag = await db.scalar(select(vertrag_model).where(vertrag_model.id == vertrag_id))
     if not vertrag:
-        logger.warning(f"Vertrag mit ID {vertrag_id} nicht gefunden")
+        logger.warning("Vertrag mit ID %s nicht gefunden", vertrag_id)
         raise HTTPException(status_code=404, detail=f"Vertrag mit ID {vertrag_id} nicht gefunden.")
 
     # Kündigung nur vor Vertragsbeginn möglich
@@ -172,15 +241,15 @@ def vertrag_kuendigen(
         logger.warning("Kündigung nach Vertragsbeginn nicht erlaubt")
         raise HTTPException(status_code=400, detail="Kündigung nach Vertragsbeginn ist nicht möglich.")
 
-    # Vertrag beenden und Auto freigeben
+    # Vertrag beenden und Auto freigeben, sofern kein anderer aktiver Vertrag läuft oder noch beginnt
     vertrag.status = "beendet"
-    auto = db.query(Auto).filter(Auto.id == vertrag.auto_id).first()
-    if auto:
+    auto = await db.scalar(select(Auto).where(Auto.id == vertrag.auto_id))
+    if auto and not await db.scalar(select(weitere_belegung(auto.id, vertrag.id, datetime.now().date()))):
         auto.status = "verfügbar"
 
-    db.commit()
+    await db.commit()
     if auto:
-        db.refresh(auto)
+        await db.refresh(auto)
 
-    logger.info(f"Vertrag {vertrag_id} erfolgreich gekündigt")
+    logger.info("Vertrag %s erfolgreich gekündigt", vertrag_id)
     return {"message": "Vertrag wurde erfolgreich gekündigt."}
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from models.zahlung import Zahlung as ZahlungModel
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+from models.zahlung import Zahlung as ZahlungModel, ZahlungsStatusEnum as ZahlungsStatusModel
 from models.vertrag import Vertrag as VertragModel  
-from models.user import User
-from schemas.zahlung import ZahlungCreate, Zahlung, ZahlungUpdate
-from data_base import get_database_session
+from models.kunden import Kunden as KundenModel
+from services.user_cache import CachedUser
+from schemas.zahlung import ZahlungCreate, Zahlung, ZahlungUpdate, ZahlungSortField, ZahlungsStatusEnum, VertragSaldo, KundenSaldo
+from schemas.pagination import Page, SortOrder
+from services.pagination import fetch_page, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.saldo_service import saldo_query, offene_salden_query
+from data_base import get_async_database_session
 from core.logger_config import setup_logger
+from core.metrics import query_budget
+from core.fast_json import rows_response, schema_columns
+from services.datenversion import conditional_get, if_match_pruefen, versioniert_speichern
 from services.dependencies import owner_required, owner_or_viewer_required, owner_or_editor_required
 from pydantic import BaseModel
 
@@ -18,25 +27,28 @@ class MessageResponse(BaseModel):
 logger = setup_logger(__name__)
 router = APIRouter(prefix="/api/v1/dashboard")
 
+# Spalten der Zahlungsliste in der Feldreihenfolge des Schemas
+ZAHLUNG_COLUMNS = schema_columns(ZahlungModel, Zahlung)
+
 # =================== Hilfsfunktionen ===================
 
 # Holt eine Zahlung anhand der ID oder wirft einen 404-Fehler
-def get_zahlung(db: Session, zahlung_id: int) -> ZahlungModel:
-    zahlung = db.query(ZahlungModel).filter(ZahlungModel.id == zahlung_id).first()
+async def get_zahlung(db: AsyncSession, zahlung_id: int) -> ZahlungModel:
+    zahlung = await db.scalar(select(ZahlungModel).where(ZahlungModel.id == zahlung_id))
     if zahlung is None:
-        logger.warning(f"Zahlung mit ID {zahlung_id} nicht gefunden.")
+        logger.warning("Zahlung mit ID %s nicht gefunden.", zahlung_id)
         raise HTTPException(status_code=404, detail=f"Zahlung mit ID {zahlung_id} nicht gefunden.")
     return zahlung
 
 # Validiert eine neue Zahlung vor dem Anlegen
-def validate_zahlung(db: Session, zahlung: ZahlungCreate):
+async def validate_zahlung(db: AsyncSession, zahlung: ZahlungCreate):
     if zahlung.betrag < 0:
         logger.warning("Ungültiger Betrag: Betrag darf nicht negativ sein.")
         raise HTTPException(status_code=400, detail="Betrag darf nicht negativ sein.")
     
-    vertrag = db.query(VertragModel).filter(VertragModel.id == zahlung.vertrag_id).first()
+    vertrag = await db.scalar(select(VertragModel).where(VertragModel.id == zahlung.vertrag_id))
     if vertrag is None:
-        logger.warning(f"Vertrag mit ID {zahlung.vertrag_id} nicht gefunden.")
+        logger.warning("Vertrag mit ID %s nicht gefunden.", zahlung.vertrag_id)
         raise HTTPException(status_code=404, detail="Vertrag nicht gefunden.")
     
     if zahlung.datum < vertrag.beginnt_datum:
@@ -44,15 +56,15 @@ def validate_zahlung(db: Session, zahlung: ZahlungCreate):
         raise HTTPException(status_code=400, detail="Zahlungsdatum darf nicht vor Vertragsbeginn liegen.")
 
 # Validiert eine Aktualisierung einer Zahlung
-def validate_zahlung_update(db: Session, zahlung_update: ZahlungUpdate):
+async def validate_zahlung_update(db: AsyncSession, zahlung_update: ZahlungUpdate):
     if zahlung_update.betrag is not None and zahlung_update.betrag < 0:
         logger.warning("Ungültiger Betrag bei Update: Betrag darf nicht negativ sein.")
         raise HTTPException(status_code=400, detail="Betrag darf nicht negativ sein.")
 
     if zahlung_update.vertrag_id is not None:
-        vertrag = db.query(VertragModel).filter(VertragModel.id == zahlung_update.vertrag_id).first()
+        vertrag = await db.scalar(select(VertragModel).where(VertragModel.id == zahlung_update.vertrag_id))
         if vertrag is None:
-            logger.warning(f"Vertrag mit ID {zahlung_update.vertrag_id} nicht gefunden.")
+            logger.warning("Vertrag mit ID %s nicht gefunden.", zahlung_update.vertrag_id)
             raise HTTPException(status_code=404, detail="Vertrag nicht gefunden.")
 
         if zahlung_update.datum is not None and zahlung_update.datum < vertrag.beginnt_datum:
@@ -79,13 +91,14 @@ def apply_zahlung_update(zahlung: ZahlungModel, zahlung_update: ZahlungUpdate):
     status_code=201,
     summary="Neue Zahlung für Vertrag erstellen"
 )
-def create_zahlung(
+@query_budget(4)
+async def create_zahlung(
     zahlung: ZahlungCreate,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
 ):
-    logger.info(f"Erstelle neue Zahlung für Vertrag ID: {zahlung.vertrag_id}")
-    validate_zahlung(db, zahlung)
+    logger.info("Erstelle neue Zahlung für Vertrag ID: %s", zahlung.vertrag_id)
+    await validate_zahlung(db, zahlung)
 
     db_zahlung = ZahlungModel(
         vertrag_id=zahlung.vertrag_id,
@@ -96,29 +109,66 @@ def create_zahlung(
     )
     try:
         db.add(db_zahlung)
-        db.commit()
-        db.refresh(db_zahlung)
+        await db.commit()
+        await db.refresh(db_zahlung)
     except Exception as e:
-        db.rollback()
-        logger.error(f"Fehler beim Erstellen der Zahlung: {e}")
+        await db.rollback()
+        logger.error("Fehler beim Erstellen der Zahlung: %s", e)
         raise HTTPException(status_code=500, detail="Fehler beim Speichern der Zahlung.")
 
-    logger.info(f"Zahlung erfolgreich erstellt mit ID: {db_zahlung.id}")
+    logger.info("Zahlung erfolgreich erstellt mit ID: %s", db_zahlung.id)
     return db_zahlung
 
 # =================== Alle Zahlungen abrufen ===================
 @router.get(
     "/zahlungen", 
-    response_model=List[Zahlung],
-    summary="Alle Zahlungen abrufen"
+    response_model=Page[Zahlung],
+    summary="Alle Zahlungen abrufen (seitenweise)"
 )
-def list_zahlungen(
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_viewer_required)
+@query_budget(3)
+async def list_zahlungen(
+    status: Optional[ZahlungsStatusEnum] = Query(None, description="Zahlungsstatus"),
+    vertrag_id: Optional[int] = Query(None, gt=0, description="Vertrags-ID"),
+    datum_von: Optional[date] = Query(None, description="Zahlungsdatum ab"),
+    datum_bis: Optional[date] = Query(None, description="Zahlungsdatum bis"),
+    sort_by: ZahlungSortField = Query(ZahlungSortField.id, description="Sortierspalte"),
+    order: SortOrder = Query(SortOrder.asc, description="Sortierrichtung"),
+    cursor: Optional[str] = Query(None, description="Cursor aus next_cursor der vorherigen Seite"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Seitengröße"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required),
+    etag: dict = Depends(conditional_get("zahlung"))
 ):
     logger.info("Alle Zahlungen werden abgerufen.")
-    zahlungen = db.query(ZahlungModel).all()
-    return zahlungen
+    query = select(*ZAHLUNG_COLUMNS)
+    if status:
+        query = query.where(ZahlungModel.status == ZahlungsStatusModel(status.value))
+    if vertrag_id:
+        query = query.where(ZahlungModel.vertrag_id == vertrag_id)
+    if datum_von:
+        query = query.where(ZahlungModel.datum >= datum_von)
+    if datum_bis:
+        query = query.where(ZahlungModel.datum <= datum_bis)
+
+    # Schneller Pfad: Spalten statt ORM-Objekte, direkt zu JSON kodiert
+    page = await fetch_page(db, query, ZahlungModel, sort_by.value, order, cursor, limit, rows=True)
+    return rows_response(page, Zahlung, headers=etag)
+
+# =================== Zahlung anzeigen ===================
+@router.get(
+    "/zahlungen/{zahlung_id}",
+    response_model=Zahlung,
+    summary="Details einer Zahlung anzeigen"
+)
+@query_budget(3)
+async def get_zahlung_details(
+    zahlung_id: int = Path(..., gt=0, description="Die ID der Zahlung (muss > 0 sein)"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required),
+    etag: dict = Depends(conditional_get("zahlung", "zahlung_id"))
+):
+    logger.info("Zahlung mit ID %s wird angezeigt.", zahlung_id)
+    return await get_zahlung(db, zahlung_id)
 
 # =================== Zahlung aktualisieren ===================
 @router.put(
@@ -126,21 +176,25 @@ def list_zahlungen(
     response_model=Zahlung,
     summary="Zahlung aktualisieren"
 )
-def update_zahlung(
+@query_budget(5)
+async def update_zahlung(
     zahlung_id: int,
     zahlung_update: ZahlungUpdate,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_or_editor_required)
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag aus dem letzten GET; passt er nicht mehr, antwortet der Server mit 409"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_editor_required)
 ):
-    logger.info(f"Zahlung mit ID {zahlung_id} wird aktualisiert.")
-    zahlung = get_zahlung(db, zahlung_id)
+    logger.info("Zahlung mit ID %s wird aktualisiert.", zahlung_id)
+    zahlung = await get_zahlung(db, zahlung_id)
+    if_match_pruefen(if_match, ZahlungModel.__tablename__, zahlung)
 
-    validate_zahlung_update(db, zahlung_update)
+    await validate_zahlung_update(db, zahlung_update)
     apply_zahlung_update(zahlung, zahlung_update)
 
-    db.commit()
-    db.refresh(zahlung)
-    logger.info(f"Zahlung mit ID {zahlung_id} erfolgreich aktualisiert.")
+    response.headers["ETag"] = await versioniert_speichern(db, ZahlungModel.__tablename__, zahlung)
+    await db.refresh(zahlung)
+    logger.info("Zahlung mit ID %s erfolgreich aktualisiert.", zahlung_id)
     return zahlung
 
 # =================== Zahlung löschen ===================
@@ -150,17 +204,105 @@ def update_zahlung(
     status_code=200,
     summary="Zahlung löschen"
 )
-def delete_zahlung(
+@query_budget(3)
+async def delete_zahlung(
     zahlung_id: int,
-    db: Session = Depends(get_database_session),
-    current_user: User = Depends(owner_required)
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_required)
 ):
-    logger.info(f"Versuche Zahlung mit ID {zahlung_id} zu löschen.")
-    zahlung = get_zahlung(db, zahlung_id)
+    logger.info("Versuche Zahlung mit ID %s zu löschen.", zahlung_id)
+    zahlung = await get_zahlung(db, zahlung_id)
 
-    db.delete(zahlung)
-    db.commit()
-    logger.info(f"Zahlung mit ID {zahlung_id} erfolgreich gelöscht.")
+    await db.delete(zahlung)
+    await db.commit()
+    logger.info("Zahlung mit ID %s erfolgreich gelöscht.", zahlung_id)
 
     # Rückgabe einer Bestätigungsmeldung
     return {"message": f"Zahlung mit ID {zahlung_id} wurde erfolgreich gelöscht."}
+
+# =================== Salden ===================
+
+# Rundet die Beträge einer Saldo-Zeile auf Cent
+def to_saldo(row) -> VertragSaldo:
+    return VertragSaldo(
+        vertrag_id=row.vertrag_id,
+        kunden_id=row.kunden_id,
+        total_preis=round(row.total_preis, 2),
+        bezahlt=round(row.bezahlt, 2),
+        offen=round(row.offen, 2),
+    )
+
+@router.get(
+    "/vertraege/{vertrag_id}/saldo",
+    response_model=VertragSaldo,
+    summary="Offenen Betrag eines Vertrags abrufen"
+)
+@query_budget(2)
+async def show_vertrag_saldo(
+    vertrag_id: int,
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required)
+):
+    logger.info("Saldo für Vertrag %s wird abgerufen.", vertrag_id)
+    row = (await db.execute(saldo_query().where(VertragModel.id == vertrag_id))).first()
+    if row is None:
+        logger.warning("Vertrag mit ID %s nicht gefunden.", vertrag_id)
+        raise HTTPException(status_code=404, detail="Vertrag nicht gefunden.")
+    return to_saldo(row)
+
+@router.get(
+    "/kunden/{kunden_id}/saldo",
+    response_model=KundenSaldo,
+    summary="Offene Beträge aller Verträge eines Kunden abrufen"
+)
+@query_budget(3)
+async def show_kunden_saldo(
+    kunden_id: int,
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required)
+):
+    logger.info("Saldo für Kunde %s wird abgerufen.", kunden_id)
+    rows = (await db.execute(
+        saldo_query().where(VertragModel.kunden_id == kunden_id).order_by(VertragModel.id)
+    )).all()
+
+    # Nur ohne Verträge prüfen, ob der Kunde überhaupt existiert
+    if not rows and await db.scalar(select(KundenModel.id).where(KundenModel.id == kunden_id)) is None:
+        logger.warning("Kunde mit ID %s nicht gefunden.", kunden_id)
+        raise HTTPException(status_code=404, detail="Kunde nicht gefunden.")
+
+    vertraege = [to_saldo(row) for row in rows]
+    return KundenSaldo(
+        kunden_id=kunden_id,
+        total_preis=round(sum(v.total_preis for v in vertraege), 2),
+        bezahlt=round(sum(v.bezahlt for v in vertraege), 2),
+        offen=round(sum(v.offen for v in vertraege), 2),
+        vertraege=vertraege,
+    )
+
+@router.get(
+    "/salden/offen",
+    response_model=Page[VertragSaldo],
+    summary="Alle Verträge mit offenem Betrag abrufen (seitenweise nach Vertrags-ID)"
+)
+@query_budget(2)
+async def list_offene_salden(
+    cursor: Optional[str] = Query(None, description="Cursor aus next_cursor der vorherigen Seite"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Seitengröße"),
+    db: AsyncSession = Depends(get_async_database_session),
+    current_user: CachedUser = Depends(owner_or_viewer_required)
+):
+    logger.info("Offene Salden werden abgerufen.")
+    query = offene_salden_query()
+    if cursor:
+        _, last_id = decode_cursor(cursor, VertragModel.id)
+        query = query.where(VertragModel.id > last_id)
+
+    # Eine Zeile mehr lesen, um zu erkennen, ob es eine weitere Seite gibt
+    rows = (await db.execute(query.order_by(VertragModel.id).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].vertrag_id, rows[-1].vertrag_id)
+
+    return {"items": [to_saldo(row) for row in rows], "next_cursor": next_cursor, "limit": limit}
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from datetime import date
+from enum import Enum
+
+# Grouping key for utilization analytics
+class AuslastungGruppierung(str, Enum):
+    auto = "auto"
+    brand = "brand"
+    model = "model"
+    jahr = "jahr"
+
+# Time bucket for utilization analytics
+class AuslastungPeriode(str, Enum):
+    tag = "tag"
+    woche = "woche"      # ISO week, starting Monday
+    monat = "monat"
+    gesamt = "gesamt"    # Whole requested range
+
+# Utilization of one group in one period
+class AuslastungEintrag(BaseModel):
+    gruppe: str
+    periode_start: date
+    periode_ende: date
+    fahrzeuge: int            # Cars in the group at the end of the period
+    belegte_tage: int         # Booked car days
+    verfuegbare_tage: int     # Car days of the period within the range, counted from each car's creation date
+    auslastung: float         # belegte_tage / verfuegbare_tage
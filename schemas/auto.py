@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 from enum import Enum
 
 # Enum for car status
@@ -38,3 +38,39 @@ class AutoUpdate(BaseModel):
 # Schema including the ID (for read operations)
 class Auto(AutoBase):
     id: int
+
+# Allowed sort columns for the Auto list (non-nullable, indexed)
+class AutoSortField(str, Enum):
+    id = "id"
+    brand = "brand"
+    model = "model"
+    jahr = "jahr"
+    preis_pro_stunde = "preis_pro_stunde"
+
+# One entry of a batch price quote request
+class PriceQuoteItem(BaseModel):
+    auto_id: int = Field(..., gt=0)
+    mietdauer_stunden: int = Field(..., gt=0)
+
+# Batch price quote request (comparison screen, up to 100 cars per call)
+class PriceQuoteRequest(BaseModel):
+    items: List[PriceQuoteItem] = Field(..., min_length=1, max_length=100)
+
+# Per-item error reasons of a batch price quote
+class PriceQuoteError(str, Enum):
+    nicht_gefunden = "nicht_gefunden"        # car does not exist
+    nicht_verfuegbar = "nicht_verfuegbar"    # car is not available
+    ungueltiger_preis = "ungueltiger_preis"  # hourly price <= 0
+
+# Result for one item: either prices or an error with a message
+class PriceQuote(BaseModel):
+    auto_id: int
+    rental_duration_hours: int
+    price_per_hour: Optional[float] = None
+    total_price: Optional[float] = None
+    error: Optional[PriceQuoteError] = None
+    detail: Optional[str] = None
+
+# Batch response in the order of the request items
+class PriceQuoteResponse(BaseModel):
+    items: List[PriceQuote]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+# Validation errors of one input row (1-based, CSV header not counted)
+class ImportRowError(BaseModel):
+    zeile: int
+    fehler: List[str]
+
+# Result of a bulk import
+class ImportReport(BaseModel):
+    eingefuegt: int                 # Inserted rows
+    fehlerhaft: int                 # Rejected rows
+    fehler: List[ImportRowError]    # Errors per rejected row
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, ConfigDict  
 from datetime import date
 from typing import Optional
+from enum import Enum
 
 # Base class for Kunden schema with required fields
 class KundenBase(BaseModel):
@@ -20,6 +21,13 @@ class KundenCreate(KundenBase):
 class Kunden(KundenBase):
     id: int  # Unique identifier for the customer
 
+# Allowed sort columns for the Kunden list (non-nullable, indexed)
+class KundenSortField(str, Enum):
+    id = "id"
+    vorname = "vorname"
+    nachname = "nachname"
+    email = "email"
+
 
 # Model for updating an existing Kunden, all fields are optional
 class KundenUpdate(BaseModel):
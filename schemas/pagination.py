@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+from enum import Enum
+
+T = TypeVar("T")
+
+# Sort direction for list endpoints
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+# One page of a keyset-paginated list
+class Page(BaseModel, Generic[T]):
+    items: List[T]                    # Rows of this page
+    next_cursor: Optional[str] = None # Cursor for the next page (None = last page)
+    limit: int                        # Requested page size
@@ -37,3 +37,8 @@ class VertragUpdate(BaseModel):
 # Model representing a contract including its ID
 class Vertrag(VertragBase):
     id: int  # Contract ID (Primary Key)
+
+# Allowed sort columns for the contract list (non-nullable)
+class VertragSortField(str, Enum):
+    id = "id"
+    beginnt_datum = "beginnt_datum"
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 
@@ -47,3 +47,30 @@ class ZahlungUpdate(BaseModel):
 class Zahlung(ZahlungBase):
     id: int  # Payment ID
 
+
+# Allowed sort columns for the payment list (non-nullable, indexed)
+class ZahlungSortField(str, Enum):
+    id = "id"
+    datum = "datum"
+    betrag = "betrag"
+
+
+
+# Outstanding balance of one contract (paid = sum of payments with status "bezahlt")
+class VertragSaldo(BaseModel):
+    vertrag_id: int
+    kunden_id: int
+    total_preis: float   # Contract price (0 if not set)
+    bezahlt: float       # Paid so far
+    offen: float         # total_preis - bezahlt
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Balances of all contracts of one customer
+class KundenSaldo(BaseModel):
+    kunden_id: int
+    total_preis: float
+    bezahlt: float
+    offen: float
+    vertraege: List[VertragSaldo]
@@ -0,0 +1,184 @@
+import time
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import select, delete, exists, func, event, inspect, and_, or_
+from sqlalchemy.orm import Session
+from core.logger_config import setup_logger
+from data_base import get_database_session
+from models.auslastung import AutoAuslastung
+from models.vertrag import Vertrag, VertragStatus
+
+logger = setup_logger(__name__)
+
+# Obergrenze pro Vertrag (ca. 5 Jahre), schützt vor Tippfehlern im Enddatum
+MAX_TAGE_PRO_VERTRAG = 5 * 366
+
+# Änderungen an diesen Spalten wirken sich auf die belegten Tage aus
+RELEVANTE_SPALTEN = ("status", "beginnt_datum", "beendet_datum", "auto_id")
+
+
+def _status(status) -> VertragStatus:
+    return status if isinstance(status, VertragStatus) else VertragStatus(status)
+
+
+def belegte_tage(beginnt: date, ende: date) -> list[date]:
+    """Alle Tage von beginnt bis ende (ende exklusiv wie beendet_datum), höchstens MAX_TAGE_PRO_VERTRAG."""
+    anzahl = min((ende - beginnt).days, MAX_TAGE_PRO_VERTRAG)
+    return [beginnt + timedelta(days=offset) for offset in range(max(anzahl, 0))]
+
+
+def belegungs_ende(beendet: Optional[date], heute: date) -> date:
+    """Exklusives Ende der Belegung: beendet_datum, bei offenen Verträgen einschließlich heute."""
+    return beendet or heute + timedelta(days=1)
+
+
+def zaehlt_als_belegung(status, beginnt: date, heute: date) -> bool:
+    """
+    Aktive und beendete Verträge belegen das Auto. Ein Vertrag, der vor seinem Beginn
+    beendet wird, ist eine Kündigung und belegt nichts.
+    """
+    status = _status(status)
+    if status == VertragStatus.aktiv:
+        return True
+    return status == VertragStatus.beendet and beginnt <= heute
+
+
+def belegungs_zeitraum(status, beginnt: date, beendet: Optional[date], heute: date) -> Optional[tuple[date, date]]:
+    """Belegter Zeitraum [beginnt, ende) eines Vertrags oder None, wenn er keinen Tag belegt."""
+    if beginnt is None or not zaehlt_als_belegung(status, beginnt, heute):
+        return None
+    ende = min(belegungs_ende(beendet, heute), beginnt + timedelta(days=MAX_TAGE_PRO_VERTRAG))
+    return (beginnt, ende) if beginnt < ende else None
+
+
+def _dialect_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def tage_belegen(connection, auto_id: int, zeitraum: tuple[date, date]):
+    """Trägt die Tage [beginnt, ende) eines Autos als belegt ein; bereits belegte Tage bleiben unverändert."""
+    tage = belegte_tage(*zeitraum)
+    if tage:
+        stmt = _dialect_insert(connection.dialect.name)(AutoAuslastung).on_conflict_do_nothing(
+            index_elements=[AutoAuslastung.auto_id, AutoAuslastung.tag]
+        )
+        connection.execute(stmt, [{"auto_id": auto_id, "tag": tag} for tag in tage])
+
+
+def tage_freigeben(connection, auto_id: int, zeitraum: tuple[date, date], heute: date):
+    """Löscht die Tage [von, bis) eines Autos, die kein belegender Vertrag mehr abdeckt (eine Anweisung)."""
+    von, bis = zeitraum
+    noch_belegt = exists().where(
+        Vertrag.auto_id == AutoAuslastung.auto_id,
+        Vertrag.beginnt_datum <= AutoAuslastung.tag,
+        or_(
+            Vertrag.beendet_datum > AutoAuslastung.tag,
+            and_(Vertrag.beendet_datum.is_(None), AutoAuslastung.tag <= heute),
+        ),
+        or_(
+            Vertrag.status == VertragStatus.aktiv,
+            and_(Vertrag.status == VertragStatus.beendet, Vertrag.beginnt_datum <= heute),
+        ),
+    )
+    connection.execute(
+        delete(AutoAuslastung).where(
+            AutoAuslastung.auto_id == auto_id, AutoAuslastung.tag >= von, AutoAuslastung.tag < bis, ~noch_belegt
+        )
+    )
+
+
+# ---------- Inkrementelle Pflege in derselben Transaktion wie die Vertragsänderung ----------
+
+def _aktive_historie(target, value, oldvalue, initiator):
+    """Nur registriert, damit SQLAlchemy beim Setzen den alten Wert lädt (active_history) und after_update ihn kennt."""
+
+for _name in RELEVANTE_SPALTEN:
+    event.listen(getattr(Vertrag, _name), "set", _aktive_historie, active_history=True)
+
+def _zeitraum(target: Vertrag, heute: date):
+    return belegungs_zeitraum(target.status, target.beginnt_datum, target.beendet_datum, heute)
+
+@event.listens_for(Vertrag, "after_insert")
+def _vertrag_angelegt(mapper, connection, target: Vertrag):
+    zeitraum = _zeitraum(target, date.today())
+    if zeitraum:
+        tage_belegen(connection, target.auto_id, zeitraum)
+
+@event.listens_for(Vertrag, "after_update")
+def _vertrag_geaendert(mapper, connection, target: Vertrag):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in RELEVANTE_SPALTEN):
+        return
+
+    # Alter Zeitraum aus der Attribut-Historie: dort werden Tage frei, im neuen kommen welche hinzu
+    def vorher(name):
+        history = state.attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(target, name)
+
+    heute = date.today()
+    alt = (vorher("auto_id"), belegungs_zeitraum(vorher("status"), vorher("beginnt_datum"), vorher("beendet_datum"), heute))
+    neu = (target.auto_id, _zeitraum(target, heute))
+    if alt == neu:
+        return
+    if alt[1]:
+        tage_freigeben(connection, alt[0], alt[1], heute)
+    if neu[1]:
+        tage_belegen(connection, *neu)
+
+@event.listens_for(Vertrag, "after_delete")
+def _vertrag_geloescht(mapper, connection, target: Vertrag):
+    heute = date.today()
+    zeitraum = _zeitraum(target, heute)
+    if zeitraum:
+        tage_freigeben(connection, target.auto_id, zeitraum, heute)
+
+
+def auslastung_fortschreiben(db: Optional[Session] = None, heute: Optional[date] = None) -> dict:
+    """
+    Job: schreibt offene aktive Verträge (ohne Enddatum) bis heute fort und baut fehlende
+    Rollup-Tage aktiver Verträge nach (z.B. nach Schreibzugriffen ohne ORM).
+    Nachgetragen wird nur für Verträge, deren Zeitraum im Rollup weniger Tage hat als er lang ist.
+    Gibt die Anzahl eingefügter Tage und die Laufzeit zurück.
+    """
+    own_session = db is None
+    if own_session:
+        db = next(get_database_session())
+    heute = heute or date.today()
+    start = time.perf_counter()
+
+    # Pro aktivem Vertrag die Rollup-Tage seines Autos im Vertragszeitraum (offene Verträge bis heute)
+    query = (
+        select(Vertrag.auto_id, Vertrag.beginnt_datum, Vertrag.beendet_datum, func.count(AutoAuslastung.tag))
+        .outerjoin(AutoAuslastung, and_(
+            AutoAuslastung.auto_id == Vertrag.auto_id,
+            AutoAuslastung.tag >= Vertrag.beginnt_datum,
+            AutoAuslastung.tag < func.coalesce(Vertrag.beendet_datum, belegungs_ende(None, heute)),
+        ))
+        .where(Vertrag.status == VertragStatus.aktiv)
+        .group_by(Vertrag.id, Vertrag.auto_id, Vertrag.beginnt_datum, Vertrag.beendet_datum)
+    )
+
+    try:
+        eingefuegt = 0
+        for auto_id, beginnt, beendet, anzahl in db.execute(query).all():
+            zeitraum = belegungs_zeitraum(VertragStatus.aktiv, beginnt, beendet, heute)
+            fehlend = (zeitraum[1] - zeitraum[0]).days - anzahl if zeitraum else 0
+            if fehlend > 0:
+                tage_belegen(db.connection(), auto_id, zeitraum)
+                eingefuegt += fehlend
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Fortschreiben der Auslastung fehlgeschlagen")
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+    result = {"tage_eingefuegt": eingefuegt, "dauer_ms": round((time.perf_counter() - start) * 1000, 2)}
+    logger.info("Auslastung fortgeschrieben: %s", result)
+    return result
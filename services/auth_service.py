@@ -1,5 +1,6 @@
-from sqlalchemy.orm import Session
-from core.security.hash import hash_password, verify
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.security.hash import hash_password_async, verify_and_update_async
 from schemas.auth_schemas import CreateRequest
 from models.user import User
 from fastapi import HTTPException
@@ -9,42 +10,49 @@ from core.logger_config import setup_logger
 logger = setup_logger(__name__)
 
 
-def create_user_service(request: CreateRequest, db: Session):
+async def create_user_service(request: CreateRequest, db: AsyncSession):
     # Check if user with this email already exists
-    existing_user = db.query(User).filter(User.email == request.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == request.email))
     if existing_user:
         logger.warning("Ein Benutzer mit dieser E-Mail existiert bereits.")
         raise HTTPException(status_code=409, detail="Ein Benutzer mit dieser E-Mail existiert bereits.")
     
-    # Create new user with hashed password
+    # Create new user with hashed password (bcrypt runs in the dedicated hashing pool)
     new_user = User(
         email=request.email,
-        hashed_password=hash_password(request.password),
+        hashed_password=await hash_password_async(request.password),
         role="customer"
     )
-    logger.info(f"Benutzer mit E-Mail {request.email} erfolgreich erstellt.")
+    logger.info("Benutzer mit E-Mail %s erfolgreich erstellt.", request.email)
     
     # Save to database
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
 
-def login_user(email: str, password: str, db: Session):
+async def login_user(email: str, password: str, db: AsyncSession):
     # Get user by email
-    user_data = db.query(User).filter(User.email == email).first()
+    user_data = await db.scalar(select(User).where(User.email == email))
     if not user_data:
-        logger.warning(f"Anmeldeversuch mit nicht existierender E-Mail: {email}")
+        logger.warning("Anmeldeversuch mit nicht existierender E-Mail: %s", email)
         raise HTTPException(status_code=401, detail="Benutzer existiert nicht.")
     
-    # Verify password
-    if not verify(password, user_data.hashed_password):
-        logger.warning(f"Falsches Passwort für Benutzer: {email}")
+    # Verify password (bcrypt runs in the dedicated hashing pool)
+    is_valid, new_hash = await verify_and_update_async(password, user_data.hashed_password)
+    if not is_valid:
+        logger.warning("Falsches Passwort für Benutzer: %s", email)
         raise HTTPException(status_code=401, detail="Falsches Passwort.")
+
+    # Rehash transparently when the stored bcrypt cost differs from the configured one
+    if new_hash:
+        user_data.hashed_password = new_hash
+        await db.commit()
+        logger.info("Passwort-Hash für Benutzer %s auf aktuellen Kostenfaktor aktualisiert.", email)
     
-    logger.info(f"Benutzer {email} erfolgreich angemeldet.")
+    logger.info("Benutzer %s erfolgreich angemeldet.", email)
     return user_data
 
 
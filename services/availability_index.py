@@ -0,0 +1,156 @@
+import bisect
+import threading
+import time
+from array import array
+from datetime import date
+from typing import Optional
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import FLEET_SNAPSHOT_TTL_SECONDS
+from core.logger_config import setup_logger
+from models.vertrag import Vertrag as VertragModel, VertragStatus
+from services.fleet_snapshot import is_app_session
+
+logger = setup_logger(__name__)
+
+# Offene Verträge ohne Enddatum blockieren das Auto unbegrenzt
+OPEN_END = date.max.toordinal()
+
+
+# Belegungen eines Autos als sortierte Arrays: Startdaten und laufendes Maximum der Enddaten.
+# Damit genügt pro Auto eine binäre Suche, auch wenn sich Verträge überlappen.
+class CarIntervals:
+    __slots__ = ("starts", "max_ends")
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self.starts = array("i", (start for start, _ in intervals))
+        self.max_ends = array("i")
+        running = 0
+        for _, end in intervals:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    # Überschneidet sich eine Belegung mit [von, bis)? Das Enddatum ist wie beendet_datum der Rückgabetag
+    # und gehört nicht mehr zur Belegung.
+    def overlaps(self, von: int, bis: int) -> bool:
+        count = bisect.bisect_left(self.starts, bis)  # Verträge, die vor dem Tag "bis" beginnen
+        return count > 0 and self.max_ends[count - 1] > von
+
+
+# Intervallindex über aktive Verträge, gruppiert nach Auto
+class AvailabilityIndex:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self._intervals: dict[int, dict[int, tuple[int, int]]] = {}  # auto_id -> {vertrag_id: (start, ende)}
+        self._auto_by_vertrag: dict[int, int] = {}
+        self._cars: dict[int, CarIntervals] = {}
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl_seconds
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if self.is_fresh():
+            return
+        result = await db.execute(
+            select(VertragModel.id, VertragModel.auto_id, VertragModel.beginnt_datum, VertragModel.beendet_datum)
+            .where(VertragModel.status == VertragStatus.aktiv)
+        )
+        rows = result.all()
+        with self._lock:
+            self._intervals, self._auto_by_vertrag, self._cars = {}, {}, {}
+            for vertrag_id, auto_id, beginnt, beendet in rows:
+                self._add(vertrag_id, auto_id, beginnt, beendet)
+            for auto_id in self._intervals:
+                self._rebuild(auto_id)
+            self.loaded_at = time.monotonic()
+        logger.info("Verfügbarkeitsindex geladen: %s aktive Verträge", len(rows))
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def _add(self, vertrag_id: int, auto_id: int, beginnt: date, beendet: Optional[date]):
+        end = beendet.toordinal() if beendet else OPEN_END
+        self._intervals.setdefault(auto_id, {})[vertrag_id] = (beginnt.toordinal(), end)
+        self._auto_by_vertrag[vertrag_id] = auto_id
+
+    def _discard(self, vertrag_id: int) -> Optional[int]:
+        auto_id = self._auto_by_vertrag.pop(vertrag_id, None)
+        if auto_id is not None:
+            self._intervals[auto_id].pop(vertrag_id, None)
+        return auto_id
+
+    def _rebuild(self, auto_id: int):
+        intervals = self._intervals.get(auto_id)
+        if intervals:
+            self._cars[auto_id] = CarIntervals(intervals.values())
+        else:
+            self._intervals.pop(auto_id, None)
+            self._cars.pop(auto_id, None)
+
+    # Vertrag übernehmen (aktiv) oder entfernen (beendet, gekündigt, gelöscht)
+    def apply(self, vertrag_id: int, auto_id: Optional[int] = None, beginnt: Optional[date] = None,
+              beendet: Optional[date] = None, aktiv: bool = False):
+        if self.loaded_at is None:
+            return  # Wird beim nächsten Laden ohnehin vollständig gelesen
+        with self._lock:
+            previous_auto = self._discard(vertrag_id)
+            if aktiv:
+                self._add(vertrag_id, auto_id, beginnt, beendet)
+            for changed in {previous_auto, auto_id if aktiv else None} - {None}:
+                self._rebuild(changed)
+
+    def is_free(self, auto_id: int, von: date, bis: date) -> bool:
+        car = self._cars.get(auto_id)
+        return car is None or not car.overlaps(von.toordinal(), bis.toordinal())
+
+    # Filtert die übergebenen Autos auf die im Zeitraum freien; O(log k) pro Auto statt Scan über alle Verträge
+    def free_autos(self, auto_ids, von: date, bis: date) -> list[int]:
+        von_ord, bis_ord = von.toordinal(), bis.toordinal()
+        with self._lock:
+            cars = self._cars
+            return [
+                auto_id for auto_id in auto_ids
+                if auto_id not in cars or not cars[auto_id].overlaps(von_ord, bis_ord)
+            ]
+
+
+availability_index = AvailabilityIndex(ttl_seconds=FLEET_SNAPSHOT_TTL_SECONDS)
+
+
+# ---------- Inkrementelle Aktualisierung aus ORM-Schreibvorgängen ----------
+
+def _status_value(status) -> Optional[str]:
+    return status.value if isinstance(status, VertragStatus) else status
+
+@event.listens_for(VertragModel, "after_insert")
+@event.listens_for(VertragModel, "after_update")
+def _track_vertrag_change(mapper, connection, target: VertragModel):
+    session = Session.object_session(target)
+    if session is not None and is_app_session(session):
+        session.info.setdefault("availability_changes", {})[target.id] = (
+            target.auto_id, target.beginnt_datum, target.beendet_datum,
+            _status_value(target.status) == VertragStatus.aktiv.value,
+        )
+
+@event.listens_for(VertragModel, "after_delete")
+def _track_vertrag_delete(mapper, connection, target: VertragModel):
+    session = Session.object_session(target)
+    if session is not None and is_app_session(session):
+        session.info.setdefault("availability_changes", {})[target.id] = None
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session):
+    changes = session.info.pop("availability_changes", None)
+    for vertrag_id, values in (changes or {}).items():
+        if values is None:
+            availability_index.apply(vertrag_id)
+        else:
+            availability_index.apply(vertrag_id, *values)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("availability_changes", None)
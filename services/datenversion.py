@@ -0,0 +1,205 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from itertools import chain, count
+from typing import Iterable, Optional
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from core.logger_config import setup_logger
+from data_base import get_async_database_session
+from models.auto import Auto
+from models.datenversion import DatenVersion
+from models.kunden import Kunden
+from models.vertrag import Vertrag
+from models.zahlung import Zahlung
+from services.fleet_snapshot import is_app_session
+
+logger = setup_logger(__name__)
+
+# Tabellen, deren Lesezugriffe per ETag/If-None-Match bedingt beantwortet werden;
+# Zeilen-ETags kommen aus der Versionsspalte des Modells (version_id_col)
+MODELLE = {"auto": Auto, "kunden": Kunden, "vertrag": Vertrag, "zahlung": Zahlung}
+VERSIONIERTE_TABELLEN = set(MODELLE)
+
+# Der Tabellenzähler ist transaktional (ETag und Daten werden gemeinsam sichtbar), liegt aber auf
+# mehreren Zeilen: jede Verbindung schreibt in ihren eigenen Slot, parallele Schreiber sperren sich nicht.
+# Eine Sequenz wäre sperrfrei, aber schon vor dem Commit sichtbar (neuer ETag zu alten Daten).
+ZAEHLER_SLOTS = 16
+_naechster_slot = count()
+
+
+def _dialect_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _slot(connection) -> int:
+    """Fester Slot pro (gepoolter) Verbindung; eine Verbindung führt nie zwei Transaktionen gleichzeitig."""
+    return connection.info.setdefault("datenversion_slot", next(_naechster_slot) % ZAEHLER_SLOTS)
+
+
+def versionen_erhoehen(connection, tabellen: Iterable[str]):
+    """Erhöht die Zähler der Tabellen im Slot der Verbindung in einem einzigen Upsert (executemany)."""
+    jetzt = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    slot = _slot(connection)
+    # Sortiert, damit parallele Transaktionen im selben Slot die Zeilen in derselben Reihenfolge sperren
+    rows = [{"tabelle": t, "slot": slot, "version": 1, "geaendert_am": jetzt} for t in sorted(set(tabellen))]
+    if not rows:
+        return
+    stmt = _dialect_insert(connection.dialect.name)(DatenVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DatenVersion.tabelle, DatenVersion.slot],
+        set_={"version": DatenVersion.version + 1, "geaendert_am": stmt.excluded.geaendert_am},
+    )
+    connection.execute(stmt, rows)
+
+
+def massen_aenderung(connection, *tabellen: str):
+    """Für Schreibzugriffe ohne ORM (Massen-UPDATE/-INSERT); die Zeilenversionen erhöht der Aufrufer selbst."""
+    versionen_erhoehen(connection, tabellen)
+
+
+# Alle ORM-Änderungen eines Flushes in derselben Transaktion versionieren
+@event.listens_for(Session, "after_flush")
+def _versionen_nach_flush(session: Session, flush_context):
+    if not is_app_session(session):
+        return
+    tabellen = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        tabelle = getattr(obj, "__tablename__", None)
+        if tabelle not in VERSIONIERTE_TABELLEN:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        tabellen.add(tabelle)
+    if tabellen:
+        versionen_erhoehen(session.connection(), tabellen)
+
+
+def zeilen_etag(tabelle: str, zeile_id: int, version: int) -> str:
+    """Starker ETag einer Zeile; derselbe Wert wird bei PUT als If-Match erwartet."""
+    return '"%s-%s-%s"' % (tabelle, zeile_id, version)
+
+
+async def aktuelle_version(db: AsyncSession, tabelle: str, zeile_id: Optional[int] = None) -> tuple[Optional[str], Optional[datetime]]:
+    """
+    ETag und letzte Änderung einer Tabelle (zeile_id=None) bzw. einer Zeile; eine Core-Abfrage, kein ORM-Objekt.
+    Zeilen nutzen die letzte Änderung der Tabelle als Last-Modified (nie zu früh). Für eine
+    nicht vorhandene Zeile ist der ETag None.
+    """
+    geaendert_am = select(func.max(DatenVersion.geaendert_am)).where(DatenVersion.tabelle == tabelle)
+    if zeile_id is not None:
+        model = MODELLE[tabelle]
+        row = (await db.execute(
+            select(model.version, geaendert_am.scalar_subquery()).where(model.id == zeile_id)
+        )).first()
+        if row is None:
+            return None, None
+        return zeilen_etag(tabelle, zeile_id, row[0]), row[1]
+
+    zuletzt, version = (await db.execute(
+        geaendert_am.add_columns(func.coalesce(func.sum(DatenVersion.version), 0))
+    )).one()
+    return 'W/"%s-%s"' % (tabelle, version), zuletzt
+
+
+def _ohne_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_passt(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Schwacher Vergleich: W/"x" und "x" gelten als gleich
+    kandidaten = {_ohne_weak(tag.strip()) for tag in if_none_match.split(",")}
+    return "*" in kandidaten or _ohne_weak(etag) in kandidaten
+
+
+def nicht_geaendert_seit(if_modified_since: Optional[str], geaendert_am: Optional[datetime]) -> bool:
+    if not if_modified_since or geaendert_am is None:
+        return False
+    try:
+        seit = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return seit.tzinfo is not None and geaendert_am.replace(tzinfo=timezone.utc) <= seit
+
+
+def conditional_get(tabelle: str, path_param: Optional[str] = None):
+    """
+    Dependency für bedingte GETs: setzt ETag/Last-Modified und antwortet mit 304,
+    wenn If-None-Match (bzw. If-Modified-Since) zur aktuellen Version passt.
+    Nach den Rollen-Dependencies einbinden, damit 304 keine Berechtigung umgeht.
+    Liefert die Header zurück, damit Routen mit eigener Response sie übernehmen können.
+    """
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_async_database_session)):
+        zeile_id = None
+        if path_param is not None:
+            try:
+                zeile_id = int(request.path_params[path_param])
+            except (KeyError, ValueError):
+                return {}  # Ungültige ID meldet die Validierung des Endpunkts
+
+        etag, geaendert_am = await aktuelle_version(db, tabelle, zeile_id)
+        if etag is None:
+            return {}  # Zeile existiert nicht, der Endpunkt antwortet mit 404
+        headers = {"ETag": etag}
+        if geaendert_am is not None:
+            headers["Last-Modified"] = format_datetime(geaendert_am.replace(tzinfo=timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if etag_passt(if_none_match, etag) or (
+            if_none_match is None and nicht_geaendert_seit(request.headers.get("if-modified-since"), geaendert_am)
+        ):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers  # für Routen, die selbst eine Response zurückgeben
+    return dependency
+
+
+# =================== Optimistische Sperre ===================
+
+GLEICHZEITIG_GEAENDERT = "Der Datensatz wurde gleichzeitig geändert. Bitte neu laden und erneut speichern."
+
+def if_match_pruefen(if_match: Optional[str], tabelle: str, obj) -> None:
+    """409, wenn If-Match gesetzt ist und nicht zur geladenen Version passt (ohne If-Match keine Prüfung)."""
+    if if_match is None:
+        return
+    kandidaten = {tag.strip() for tag in if_match.split(",")}
+    if "*" in kandidaten or zeilen_etag(tabelle, obj.id, obj.version) in kandidaten:
+        return
+    raise HTTPException(
+        status_code=409,
+        detail="Der Datensatz wurde inzwischen geändert. Bitte neu laden und erneut speichern.",
+        headers={"ETag": zeilen_etag(tabelle, obj.id, obj.version)},
+    )
+
+
+async def versioniert_speichern(db: AsyncSession, tabelle: str, obj) -> str:
+    """
+    Commit mit Versionsprüfung: Hat eine parallele Transaktion die Zeile seit dem Laden geändert,
+    schlägt das UPDATE ... WHERE version = ... fehl (StaleDataError) und der Client erhält 409.
+    Liefert den ETag der neuen Version.
+    """
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=GLEICHZEITIG_GEAENDERT)
+    return zeilen_etag(tabelle, obj.id, obj.version)
+
+
+async def stale_data_handler(request: Request, exc: StaleDataError) -> JSONResponse:
+    """
+    App-weiter Exception-Handler: Auch Schreibzugriffe ohne versioniert_speichern (Löschen, Buchen,
+    Kündigen) prüfen die Versionsspalte; eine parallele Änderung ergibt 409 statt 500.
+    Die Session wird beim Verlassen der Dependency zurückgerollt.
+    """
+    logger.warning("Parallele Änderung bei %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(status_code=409, content={"detail": GLEICHZEITIG_GEAENDERT})
@@ -1,15 +1,30 @@
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from data_base import get_database_session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from data_base import get_async_database_session
 from core.security import jwt
 from models.user import User
+from schemas.auth_schemas import TokenData
+from services.user_cache import user_cache, CachedUser
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Load the user for a decoded token, served from the TTL cache when possible
+async def load_user(token_data: TokenData, db: AsyncSession) -> CachedUser | None:
+    cached = user_cache.get(token_data.id, token_data.email)
+    if cached:
+        return cached
+
+    # Look up the user in the database by email
+    user = await db.scalar(select(User).where(User.email == token_data.email))
+    if not user or user.id != token_data.id:
+        return None
+    return user_cache.put(user)
+
 # Get the current user from the token
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_database_session)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_database_session)) -> CachedUser:
     try:
         # Decode the token to extract user info
         token_data = jwt.decode_token(token)
@@ -17,10 +32,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         # Raise error if token is invalid
         raise HTTPException(status_code=401, detail="Ungültiges Token")  
 
-    email = token_data.email
-
-    # Look up the user in the database by email
-    user = db.query(User).filter(User.email == email).first()
+    user = await load_user(token_data, db)
     if not user:
         # Raise error if user not found
         raise HTTPException(status_code=401, detail="Benutzer wurde nicht gefunden") 
@@ -29,7 +41,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
 
 def role_required(allowed_roles: list[str]):
-    def dependency(current_user: User = Depends(get_current_user)):
+    async def dependency(current_user: CachedUser = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
             raise HTTPException(status_code=403, detail="Zugriff verweigert: unzureichende Rolle")
         return current_user
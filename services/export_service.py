@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+from datetime import date
+from enum import Enum
+from sqlalchemy import Select
+from data_base import new_async_session
+from core.logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Anzahl Zeilen pro Server-Cursor-Fetch und pro geschriebenem Chunk
+EXPORT_BATCH_SIZE = 1000
+
+# Wandelt DB-Werte in JSON/CSV-taugliche Werte um
+def to_plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+# Liest Zeilen über einen Server-Cursor in Batches; eigene Session, da der Stream
+# erst nach dem Ende des Endpunkts (und seiner Dependencies) gelesen wird
+async def stream_rows(query: Select):
+    async with new_async_session() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+
+# CSV-Export: Kopfzeile und danach ein Chunk pro Batch
+async def stream_csv(query: Select, columns: list[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    count = 0
+    async for partition in stream_rows(query):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([to_plain(value) for value in row] for row in partition)
+        count += len(partition)
+        yield buffer.getvalue()
+    logger.info("CSV-Export abgeschlossen: %s Zeilen", count)
+
+# NDJSON-Export: ein JSON-Objekt pro Zeile
+async def stream_ndjson(query: Select, columns: list[str]):
+    count = 0
+    async for partition in stream_rows(query):
+        lines = [
+            json.dumps({column: to_plain(value) for column, value in zip(columns, row)}, ensure_ascii=False)
+            for row in partition
+        ]
+        count += len(partition)
+        yield "\n".join(lines) + "\n"
+    logger.info("NDJSON-Export abgeschlossen: %s Zeilen", count)
@@ -0,0 +1,280 @@
+import threading
+import time
+from array import array
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import FLEET_SNAPSHOT_TTL_SECONDS
+from core.logger_config import setup_logger
+from models.auto import Auto as AutoModel, AutoStatus
+from schemas.pagination import SortOrder
+from services.pagination import encode_cursor, decode_cursor
+
+logger = setup_logger(__name__)
+
+# Statuswerte werden als kleine Zahlen im Array gespeichert
+STATUS_LIST = list(AutoStatus)
+STATUS_CODE = {status: code for code, status in enumerate(STATUS_LIST)}
+
+# Mindestähnlichkeit für tippfehlertolerante Treffer (entspricht pg_trgm.similarity_threshold)
+SIMILARITY_THRESHOLD = 0.3
+
+
+# Trigramme wie pg_trgm: pro Wort kleingeschrieben, vorne zwei und hinten ein Leerzeichen
+def trigrams(text: str) -> set[str]:
+    result = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+# Spaltenorientierter Snapshot der Tabelle "auto" mit Indizes nach Marke, Modell, Status und Baujahr
+class FleetSnapshot:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self.version: Optional[str] = None  # Tabellenversion (Listen-ETag), mit der zuletzt geladen wurde
+        self._reset()
+
+    def _reset(self):
+        self.ids = array("i")
+        self.jahr = array("i")
+        self.preis_pro_stunde = array("d")
+        self.status = array("b")
+        self.alive = array("b")       # 0 = gelöscht (wird beim nächsten Neuladen kompaktiert)
+        self.brand: list[str] = []
+        self.model: list[str] = []
+        self.position_by_id: dict[int, int] = {}
+        self.by_brand: dict[str, set[int]] = {}   # Schlüssel kleingeschrieben
+        self.by_model: dict[str, set[int]] = {}
+        self.by_status: dict[int, set[int]] = {}
+        self.by_jahr: dict[int, set[int]] = {}
+
+    # ---------- Laden und inkrementelle Aktualisierung ----------
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl_seconds
+
+    # Mit version (Listen-ETag aus services.datenversion) wird zusätzlich neu geladen, sobald die Tabelle
+    # eine andere Version hat als beim Laden; so passt der ausgelieferte Inhalt immer zum ETag, auch wenn
+    # ein anderer Worker geschrieben hat.
+    async def ensure_loaded(self, db: AsyncSession, version: Optional[str] = None):
+        if self.is_fresh() and (version is None or version == self.version):
+            return
+        result = await db.execute(select(
+            AutoModel.id, AutoModel.brand, AutoModel.model, AutoModel.jahr, AutoModel.preis_pro_stunde, AutoModel.status
+        ))
+        rows = result.all()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._insert(*row)
+            self.loaded_at = time.monotonic()
+            self.version = version
+        logger.info("Flotten-Snapshot geladen: %s Autos", len(rows))
+
+    def invalidate(self):
+        self.loaded_at = None
+        self.version = None
+
+    def upsert(self, auto_id: int, brand: str, model: str, jahr: int, preis_pro_stunde: float, status):
+        if self.loaded_at is None:
+            return  # Wird beim nächsten Laden ohnehin vollständig gelesen
+        with self._lock:
+            self._remove(auto_id)
+            self._insert(auto_id, brand, model, jahr, preis_pro_stunde, status)
+
+    def delete(self, auto_id: int):
+        if self.loaded_at is None:
+            return
+        with self._lock:
+            self._remove(auto_id)
+
+    def _insert(self, auto_id, brand, model, jahr, preis_pro_stunde, status):
+        status_code = STATUS_CODE[AutoStatus(status.value if isinstance(status, AutoStatus) else status)]
+        position = len(self.ids)
+        self.ids.append(auto_id)
+        self.brand.append(brand)
+        self.model.append(model)
+        self.jahr.append(jahr)
+        self.preis_pro_stunde.append(preis_pro_stunde)
+        self.status.append(status_code)
+        self.alive.append(1)
+        self.position_by_id[auto_id] = position
+        self.by_brand.setdefault(brand.lower(), set()).add(position)
+        self.by_model.setdefault(model.lower(), set()).add(position)
+        self.by_status.setdefault(status_code, set()).add(position)
+        self.by_jahr.setdefault(jahr, set()).add(position)
+
+    def _remove(self, auto_id: int):
+        position = self.position_by_id.pop(auto_id, None)
+        if position is None:
+            return
+        self.alive[position] = 0
+        for index, key in (
+            (self.by_brand, self.brand[position].lower()),
+            (self.by_model, self.model[position].lower()),
+            (self.by_status, self.status[position]),
+            (self.by_jahr, self.jahr[position]),
+        ):
+            positions = index.get(key)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del index[key]
+
+    # ---------- Abfragen ----------
+
+    def _row(self, position: int) -> dict:
+        return {
+            "id": self.ids[position],
+            "brand": self.brand[position],
+            "model": self.model[position],
+            "jahr": self.jahr[position],
+            "preis_pro_stunde": self.preis_pro_stunde[position],
+            "status": STATUS_LIST[self.status[position]].value,
+        }
+
+    # Positionen, deren Schlüssel den Suchbegriff enthält oder ihm ähnlich ist (wie ILIKE bzw. pg_trgm)
+    @staticmethod
+    def _fuzzy_positions(index: dict[str, set[int]], term: str) -> set[int]:
+        term = term.lower()
+        positions = set()
+        for key, key_positions in index.items():
+            if term in key or similarity(key, term) >= SIMILARITY_THRESHOLD:
+                positions |= key_positions
+        return positions
+
+    def _filter(self, candidates: list[set[int]]) -> set[int]:
+        if not candidates:
+            return set(self.position_by_id.values())
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for positions in candidates[1:]:
+            result &= positions
+        return result
+
+    def get(self, auto_id: int) -> Optional[dict]:
+        with self._lock:
+            position = self.position_by_id.get(auto_id)
+            return self._row(position) if position is not None else None
+
+    def search(self, brand: Optional[str], model: Optional[str], jahr: Optional[int], status: Optional[AutoStatus]) -> list[dict]:
+        with self._lock:
+            candidates = []
+            if brand:
+                candidates.append(self._fuzzy_positions(self.by_brand, brand))
+            if model:
+                candidates.append(self._fuzzy_positions(self.by_model, model))
+            if jahr:
+                candidates.append(self.by_jahr.get(jahr, set()))
+            if status:
+                candidates.append(self.by_status.get(STATUS_CODE[AutoStatus(status.value)], set()))
+            rows = [self._row(position) for position in self._filter(candidates)]
+
+        # Beste Ähnlichkeit zuerst, sonst nach ID
+        if brand or model:
+            def score(row):
+                scores = [similarity(row[field], term) for field, term in (("brand", brand), ("model", model)) if term]
+                return (-max(scores), row["id"])
+            rows.sort(key=score)
+        else:
+            rows.sort(key=lambda row: row["id"])
+        return rows
+
+    def page(
+        self,
+        status: AutoStatus,
+        brand: Optional[str],
+        model: Optional[str],
+        jahr_von: Optional[int],
+        jahr_bis: Optional[int],
+        sort_by: str,
+        order: SortOrder,
+        cursor: Optional[str],
+        limit: int,
+    ) -> dict:
+        with self._lock:
+            candidates = [self.by_status.get(STATUS_CODE[AutoStatus(status.value)], set())]
+            if brand:
+                candidates.append({p for p in self.by_brand.get(brand.lower(), set()) if self.brand[p] == brand})
+            if model:
+                candidates.append({p for p in self.by_model.get(model.lower(), set()) if self.model[p] == model})
+            rows = [self._row(position) for position in self._filter(candidates)]
+
+        if jahr_von is not None:
+            rows = [row for row in rows if row["jahr"] >= jahr_von]
+        if jahr_bis is not None:
+            rows = [row for row in rows if row["jahr"] <= jahr_bis]
+
+        # Gleiche Semantik wie die Keyset-Paginierung in services.pagination: Ordnung nach (Sortierspalte, id)
+        descending = order == SortOrder.desc
+        rows.sort(key=lambda row: (row[sort_by], row["id"]), reverse=descending)
+        if cursor:
+            last = decode_cursor(cursor, getattr(AutoModel, sort_by))
+            try:
+                if descending:
+                    rows = [row for row in rows if (row[sort_by], row["id"]) < last]
+                else:
+                    rows = [row for row in rows if (row[sort_by], row["id"]) > last]
+            except TypeError:
+                logger.warning("Ungültiger Cursor übergeben")
+                raise HTTPException(status_code=400, detail="Ungültiger Cursor.")
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][sort_by], rows[-1]["id"])
+        return {"items": rows, "next_cursor": next_cursor, "limit": limit}
+
+
+fleet_snapshot = FleetSnapshot(ttl_seconds=FLEET_SNAPSHOT_TTL_SECONDS)
+
+
+# ---------- Inkrementelle Aktualisierung aus ORM-Schreibvorgängen ----------
+# Änderungen an Autos werden pro Session gesammelt und erst nach dem Commit übernommen.
+
+def is_app_session(session: Session) -> bool:
+    from data_base import created_engines  # spät importiert, um Zyklen zu vermeiden
+    return session.bind is not None and session.bind in created_engines()
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault("fleet_snapshot_changes", {})
+
+@event.listens_for(AutoModel, "after_insert")
+@event.listens_for(AutoModel, "after_update")
+def _track_auto_change(mapper, connection, target: AutoModel):
+    session = Session.object_session(target)
+    if session is not None and is_app_session(session):
+        _pending(session)[target.id] = (
+            target.brand, target.model, target.jahr, target.preis_pro_stunde, target.status
+        )
+
+@event.listens_for(AutoModel, "after_delete")
+def _track_auto_delete(mapper, connection, target: AutoModel):
+    session = Session.object_session(target)
+    if session is not None and is_app_session(session):
+        _pending(session)[target.id] = None
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session):
+    changes = session.info.pop("fleet_snapshot_changes", None)
+    for auto_id, values in (changes or {}).items():
+        if values is None:
+            fleet_snapshot.delete(auto_id)
+        else:
+            fleet_snapshot.upsert(auto_id, *values)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("fleet_snapshot_changes", None)
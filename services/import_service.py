@@ -0,0 +1,202 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Type
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import IMPORT_MAX_ROWS
+from core.logger_config import setup_logger
+from services.datenversion import versionen_erhoehen
+
+logger = setup_logger(__name__)
+
+# Anzahl Werte pro IN-Abfrage bei Referenz- und Eindeutigkeitsprüfungen
+LOOKUP_CHUNK_SIZE = 1000
+
+# Größtes einzelnes Element eines JSON-Imports; begrenzt den Lesepuffer unabhängig von der Body-Größe
+MAX_JSON_ELEMENT_CHARS = 64 * 1024
+
+
+# Liefert vollständige CSV-Datensätze aus einem Zeilenpuffer; ein Datensatz gilt als vollständig,
+# sobald die Anzahl der Anführungszeichen gerade ist (Zeilenumbrüche in Feldern bleiben erhalten)
+class _RecordFeed:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration  # csv.reader fragt beim nächsten Aufruf erneut nach
+        return self.lines.pop(0)
+
+
+# Liest eine CSV-Datei als Stream: Datensätze werden geparst, während der Upload noch läuft
+async def iter_csv(request: Request) -> AsyncIterator[dict]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    feed = _RecordFeed()
+    reader = csv.reader(feed)
+    header = None
+    pending, quotes, rest = [], 0, ""
+
+    def flush_records():
+        nonlocal header
+        for record in reader:
+            if not any(record):
+                continue  # leere Zeilen überspringen
+            if header is None:
+                header = [name.strip() for name in record]
+                continue
+            yield dict(zip(header, record))
+
+    async for chunk in request.stream():
+        text = rest + decoder.decode(chunk)
+        lines = text.splitlines(keepends=True)
+        rest = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            pending.append(line)
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                feed.lines.append("".join(pending))
+                pending, quotes = [], 0
+        for row in flush_records():
+            yield row
+
+    rest += decoder.decode(b"", final=True)
+    if rest or pending:
+        feed.lines.append("".join(pending) + rest)
+    for row in flush_records():
+        yield row
+
+
+# Liest ein JSON-Array als Stream: jedes Element wird geparst, sobald es vollständig empfangen ist.
+# Gepuffert wird höchstens ein unvollständiges Element (MAX_JSON_ELEMENT_CHARS), nie der ganze Body.
+async def iter_json_array(request: Request) -> AsyncIterator:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parser = json.JSONDecoder()
+    buffer, zustand = "", "anfang"  # anfang -> wert_oder_ende -> trenner <-> wert -> ende
+
+    def ungueltig():
+        return HTTPException(status_code=400, detail="Ungültiges JSON.")
+
+    def zu_gross():
+        logger.warning("Import abgelehnt: JSON-Element größer als %s Zeichen", MAX_JSON_ELEMENT_CHARS)
+        return HTTPException(status_code=413, detail=f"Eine Zeile darf höchstens {MAX_JSON_ELEMENT_CHARS} Zeichen umfassen.")
+
+    def parse(final: bool):
+        nonlocal buffer, zustand
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                break
+            zeichen = buffer[pos]
+            if zustand == "anfang":
+                if zeichen != "[":
+                    raise HTTPException(status_code=400, detail="Erwartet wird ein JSON-Array von Objekten.")
+                zustand, pos = "wert_oder_ende", pos + 1
+            elif zustand == "trenner" or (zustand == "wert_oder_ende" and zeichen == "]"):
+                if zeichen not in ",]":
+                    raise ungueltig()
+                zustand, pos = ("wert" if zeichen == "," else "ende"), pos + 1
+            elif zustand == "ende":
+                raise ungueltig()
+            else:
+                try:
+                    element, ende = parser.raw_decode(buffer, pos)
+                except ValueError:
+                    if final:
+                        raise ungueltig()
+                    break  # Element noch unvollständig
+                if ende == len(buffer) and not final:
+                    break  # Zahlen und Literale könnten im nächsten Stück weitergehen
+                if ende - pos > MAX_JSON_ELEMENT_CHARS:
+                    raise zu_gross()
+                zustand, pos = "trenner", ende
+                yield element
+        buffer = buffer[pos:]
+        if len(buffer) > MAX_JSON_ELEMENT_CHARS:
+            raise zu_gross()
+
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        for element in parse(final=False):
+            yield element
+
+    buffer += decoder.decode(b"", final=True)
+    for element in parse(final=True):
+        yield element
+    if zustand != "ende":
+        raise ungueltig()
+
+
+# Liest die Zeilen eines Imports: JSON-Array oder CSV (Content-Type text/csv)
+async def read_rows(request: Request) -> AsyncIterator[dict]:
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(("text/csv", "application/csv")):
+        async for row in iter_csv(request):
+            # In CSV bedeutet ein leeres Feld "kein Wert"
+            yield {key: (value if value != "" else None) for key, value in row.items()}
+        return
+
+    async for row in iter_json_array(request):
+        yield row if isinstance(row, dict) else {"__ungueltig__": row}
+
+
+# Sammelt gültige Zeilen und Fehler pro Zeile
+class ImportBatch:
+    def __init__(self):
+        self.rows: dict[int, BaseModel] = {}       # Zeilennummer -> validierte Daten
+        self.errors: dict[int, list[str]] = {}
+
+    def reject(self, zeile: int, message: str):
+        self.rows.pop(zeile, None)
+        self.errors.setdefault(zeile, []).append(message)
+
+    def report(self, eingefuegt: int) -> dict:
+        return {
+            "eingefuegt": eingefuegt,
+            "fehlerhaft": len(self.errors),
+            "fehler": [{"zeile": zeile, "fehler": fehler} for zeile, fehler in sorted(self.errors.items())],
+        }
+
+
+# Validiert jede Zeile mit dem Pydantic-Schema des Einzel-Endpunkts
+async def validate_rows(request: Request, schema: Type[BaseModel]) -> ImportBatch:
+    batch = ImportBatch()
+    zeile = 0
+    async for row in read_rows(request):
+        zeile += 1
+        if zeile > IMPORT_MAX_ROWS:
+            logger.warning("Import abgelehnt: mehr als %s Zeilen", IMPORT_MAX_ROWS)
+            raise HTTPException(status_code=413, detail=f"Maximal {IMPORT_MAX_ROWS} Zeilen pro Import.")
+        try:
+            batch.rows[zeile] = schema.model_validate(row)
+        except ValidationError as error:
+            batch.errors[zeile] = [
+                f"{'.'.join(str(part) for part in detail['loc']) or 'zeile'}: {detail['msg']}" for detail in error.errors()
+            ]
+    return batch
+
+
+# Führt eine IN-Abfrage in Blöcken aus und liefert alle Ergebniszeilen
+async def lookup_in(db: AsyncSession, query_for_chunk, values) -> list:
+    values = list(values)
+    found = []
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        found.extend((await db.execute(query_for_chunk(values[start:start + LOOKUP_CHUNK_SIZE]))).all())
+    return found
+
+
+# Fügt alle gültigen Zeilen mit einem mehrzeiligen INSERT (executemany) in der laufenden Transaktion ein
+async def insert_rows(db: AsyncSession, model, batch: ImportBatch) -> int:
+    rows = [row.model_dump() for _, row in sorted(batch.rows.items())]
+    if rows:
+        await db.execute(insert(model), rows)
+        # Der Massen-INSERT umgeht die ORM-Events, daher die Tabellenversion (Listen-ETags) selbst erhöhen
+        await db.run_sync(lambda session: versionen_erhoehen(session.connection(), [model.__tablename__]))
+    return len(rows)
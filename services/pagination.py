@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.logger_config import setup_logger
+from schemas.pagination import SortOrder
+
+logger = setup_logger(__name__)
+
+# Standard- und Maximalgröße einer Seite
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 10000
+
+# Kodiert Sortierwert und ID der letzten Zeile als undurchsichtigen Cursor
+def encode_cursor(value, row_id: int) -> str:
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# Dekodiert einen Cursor passend zum Typ der Sortierspalte
+def decode_cursor(cursor: str, column) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if column.type.python_type is date:
+            value = date.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        logger.warning("Ungültiger Cursor übergeben")
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor.")
+
+# Liest eine Seite per Keyset-Paginierung auf (Sortierspalte, id); stabil auch bei gleichen Sortierwerten.
+# Mit rows=True liefert die Seite Row-Objekte statt ORM-Objekten (für select(*spalten), siehe core.fast_json)
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    model,
+    sort_by: str,
+    order: SortOrder,
+    cursor: str | None,
+    limit: int,
+    rows: bool = False,
+) -> dict:
+    sort_column = getattr(model, sort_by)
+    id_column = model.id
+    descending = order == SortOrder.desc
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_column)
+        if sort_by == "id":
+            query = query.where(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            query = query.where(or_(sort_column < last_value, and_(sort_column == last_value, id_column < last_id)))
+        else:
+            query = query.where(or_(sort_column > last_value, and_(sort_column == last_value, id_column > last_id)))
+
+    if sort_by == "id":
+        ordering = [id_column.desc() if descending else id_column.asc()]
+    else:
+        ordering = [sort_column.desc(), id_column.desc()] if descending else [sort_column.asc(), id_column.asc()]
+
+    # Eine Zeile mehr lesen, um zu erkennen, ob es eine weitere Seite gibt
+    query = query.order_by(*ordering).limit(limit + 1)
+    items = (await db.execute(query)).all() if rows else (await db.scalars(query)).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_by), last.id)
+
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
@@ -0,0 +1,28 @@
+from sqlalchemy import Select, select, func
+from models.vertrag import Vertrag, VertragStatus
+from models.zahlung import Zahlung, ZahlungsStatusEnum
+
+# Bezahlte Summe per SUM ... FILTER, gelesen aus dem Index zahlung(vertrag_id, status, betrag)
+BEZAHLT = func.coalesce(func.sum(Zahlung.betrag).filter(Zahlung.status == ZahlungsStatusEnum.bezahlt), 0.0)
+TOTAL_PREIS = func.coalesce(Vertrag.total_preis, 0.0)
+OFFEN = TOTAL_PREIS - BEZAHLT
+
+
+def saldo_query() -> Select:
+    """Eine Zeile pro Vertrag mit Preis, bezahltem und offenem Betrag, ohne Zahlungen zu laden."""
+    return (
+        select(
+            Vertrag.id.label("vertrag_id"),
+            Vertrag.kunden_id,
+            TOTAL_PREIS.label("total_preis"),
+            BEZAHLT.label("bezahlt"),
+            OFFEN.label("offen"),
+        )
+        .outerjoin(Zahlung, Zahlung.vertrag_id == Vertrag.id)
+        .group_by(Vertrag.id, Vertrag.kunden_id, Vertrag.total_preis)
+    )
+
+
+def offene_salden_query() -> Select:
+    """Verträge mit offenem Betrag; gekündigte Verträge werden nicht mehr geschuldet."""
+    return saldo_query().where(Vertrag.status != VertragStatus.gekündigt).having(OFFEN > 0.005)
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from core.config import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE
+from models.user import User
+
+
+# Schlanke, sessionunabhängige Kopie eines Benutzers für die Autorisierung
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    email: str
+    role: str
+
+
+# Begrenzter LRU-Cache mit TTL, Schlüssel sind Benutzer-ID und E-Mail
+class UserCache:
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._by_id: OrderedDict[int, tuple[float, CachedUser]] = OrderedDict()
+        self._id_by_email: dict[str, int] = {}
+
+    def get(self, user_id: int, email: str) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._by_id.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            # Abgelaufen oder E-Mail passt nicht mehr zum Token
+            if expires_at < time.monotonic() or user.email != email:
+                self._remove(user_id)
+                return None
+            self._by_id.move_to_end(user_id)
+            return user
+
+    def put(self, user: User) -> CachedUser:
+        cached = CachedUser(id=user.id, email=user.email, role=user.role)
+        with self._lock:
+            self._remove(cached.id)
+            self._by_id[cached.id] = (time.monotonic() + self.ttl_seconds, cached)
+            self._id_by_email[cached.email] = cached.id
+            while len(self._by_id) > self.max_size:
+                oldest_id = next(iter(self._by_id))
+                self._remove(oldest_id)
+        return cached
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        with self._lock:
+            if user_id is None and email is not None:
+                user_id = self._id_by_email.get(email)
+            if user_id is not None:
+                self._remove(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._id_by_email.clear()
+
+    def _remove(self, user_id: int):
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None:
+            self._id_by_email.pop(entry[1].email, None)
+
+
+user_cache = UserCache(ttl_seconds=USER_CACHE_TTL_SECONDS, max_size=USER_CACHE_MAX_SIZE)
+
+
+# Eintrag verwerfen, sobald ein Benutzer über das ORM geändert (z.B. Rolle, Passwort) oder gelöscht wird.
+# Andere Worker/Prozesse sehen die Änderung spätestens nach Ablauf der TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User):
+    user_cache.invalidate(user_id=target.id)
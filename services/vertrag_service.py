@@ -1,7 +1,15 @@
+import time
 from datetime import date
+from typing import Optional
+from sqlalchemy import update, exists, and_, or_
 from sqlalchemy.orm import Session
 from core.logger_config import setup_logger
 from data_base import get_database_session  
+from models.auto import Auto, AutoStatus
+from models.vertrag import Vertrag, VertragStatus
+from services.fleet_snapshot import fleet_snapshot
+from services.availability_index import availability_index
+from services.datenversion import massen_aenderung
 
 
 logger = setup_logger(__name__)
@@ -16,12 +24,107 @@ def berechne_mitdauer(beginnt_datum: date, beendet_datum: date) -> int:
     return (beendet_datum - beginnt_datum).days
 
 
-def zwischenstatus_aktualisieren():
-    db: Session = next(get_database_session())
+def _aktiver_vertrag(heute: date, laufend: bool):
+    """
+    EXISTS-Bedingung für einen aktiven Vertrag des Autos, der heute läuft (laufend=True)
+    bzw. heute läuft oder noch beginnt (laufend=False).
+    """
+    bedingungen = [
+        Vertrag.auto_id == Auto.id,
+        Vertrag.status == VertragStatus.aktiv,
+        or_(Vertrag.beendet_datum.is_(None), Vertrag.beendet_datum > heute),
+    ]
+    if laufend:
+        bedingungen.append(Vertrag.beginnt_datum <= heute)
+    return exists().where(and_(*bedingungen))
+
+
+# Autos mit diesem Status können für einen Zeitraum gebucht werden; ob der Zeitraum frei ist, prüfen
+# die Verfügbarkeitssuche über den Intervallindex und beide Buchungswege (App und Dashboard) mit zeitraum_belegt
+BUCHBARE_STATUS = {AutoStatus.verfügbar.value, AutoStatus.reserviert.value, AutoStatus.vermietet.value}
+
+
+def zeitraum_belegt(auto_id: int, von: date, bis: date):
+    """
+    EXISTS-Bedingung: ein aktiver Vertrag des Autos überschneidet sich mit [von, bis).
+    Das Enddatum ist überall der Rückgabetag und gehört nicht mehr zur Belegung: so beendet der
+    Statusjob Verträge (beendet_datum <= heute), so zählt die Auslastung und so prüft der
+    Intervallindex der Verfügbarkeitssuche (services.availability_index). Ein Vertrag darf daher
+    an dem Tag beginnen, an dem der vorherige endet.
+    """
+    return exists().where(
+        Vertrag.auto_id == auto_id,
+        Vertrag.status == VertragStatus.aktiv,
+        Vertrag.beginnt_datum < bis,
+        or_(Vertrag.beendet_datum.is_(None), Vertrag.beendet_datum > von),
+    )
+
+
+def weitere_belegung(auto_id: int, vertrag_id: int, heute: date):
+    """EXISTS-Bedingung: ein anderer aktiver Vertrag des Autos läuft heute oder beginnt noch."""
+    return exists().where(
+        Vertrag.auto_id == auto_id,
+        Vertrag.id != vertrag_id,
+        Vertrag.status == VertragStatus.aktiv,
+        or_(Vertrag.beendet_datum.is_(None), Vertrag.beendet_datum > heute),
+    )
+
+
+def zwischenstatus_aktualisieren(db: Optional[Session] = None, heute: Optional[date] = None) -> dict:
+    """
+    Stündlicher Job: setzt Vertrags- und Fahrzeugstatus anhand der Vertragsdaten.
+    Alle Übergänge sind mengenbasierte UPDATE-Anweisungen in einer Transaktion:
+      - Verträge: aktiv -> beendet, sobald das Enddatum erreicht ist
+      - Autos: reserviert -> vermietet, wenn ein aktiver Vertrag heute läuft
+      - Autos: vermietet -> reserviert, wenn kein Vertrag läuft, aber einer bevorsteht
+      - Autos: reserviert/vermietet -> verfügbar, wenn kein laufender oder künftiger Vertrag existiert
+    Jede geänderte Zeile erhöht ihre Version, damit offene Bearbeitungen im Dashboard mit 409 scheitern.
+    Gibt die Anzahl geänderter Zeilen pro Übergang und die Laufzeit zurück.
+    """
+    own_session = db is None
+    if own_session:
+        db = next(get_database_session())
+    heute = heute or date.today()
+    start = time.perf_counter()
+    laufend = _aktiver_vertrag(heute, laufend=True)
+    offen = _aktiver_vertrag(heute, laufend=False)
+
+    statements = {
+        "vertraege_beendet": update(Vertrag)
+            .where(Vertrag.status == VertragStatus.aktiv, Vertrag.beendet_datum <= heute)
+            .values(status=VertragStatus.beendet, version=Vertrag.version + 1),
+        "autos_vermietet": update(Auto)
+            .where(Auto.status == AutoStatus.reserviert, laufend)
+            .values(status=AutoStatus.vermietet, version=Auto.version + 1),
+        "autos_reserviert": update(Auto)
+            .where(Auto.status == AutoStatus.vermietet, ~laufend, offen)
+            .values(status=AutoStatus.reserviert, version=Auto.version + 1),
+        "autos_verfuegbar": update(Auto)
+            .where(Auto.status.in_([AutoStatus.reserviert, AutoStatus.vermietet]), ~offen)
+            .values(status=AutoStatus.verfügbar, version=Auto.version + 1),
+    }
+
     try:
-   
-        print("Status aktualisieren läuft...")
-   
+        counts = {
+            name: db.execute(statement.execution_options(synchronize_session=False)).rowcount
+            for name, statement in statements.items()
+        }
+        if any(counts.values()):
+            massen_aenderung(db.connection(), Vertrag.__tablename__, Auto.__tablename__)  # ETags ungültig machen
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Statusaktualisierung fehlgeschlagen")
+        raise
     finally:
-        db.close()
+        if own_session:
+            db.close()
+
+    # Massen-UPDATEs umgehen die ORM-Events, daher die In-Memory-Indizes neu laden lassen
+    if any(counts.values()):
+        fleet_snapshot.invalidate()
+        availability_index.invalidate()
 
+    result = {**counts, "dauer_ms": round((time.perf_counter() - start) * 1000, 2)}
+    logger.info("Statusaktualisierung abgeschlossen: %s", result)
+    return result
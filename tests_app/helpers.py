@@ -1,9 +1,8 @@
 from services.dependencies import get_current_user
+from services.user_cache import CachedUser
 from main import app
 
 def set_user_role(role: str):
-    class User:
-        def __init__(self, role):
-            self.role = role
-            self.id = 1  
-    app.dependency_overrides[get_current_user] = lambda: User(role) 
\ No newline at end of file
+    # Gleicher Typ wie get_current_user im Betrieb liefert
+    user = CachedUser(id=1, email=f"{role}@test.de", role=role)
+    app.dependency_overrides[get_current_user] = lambda: user
@@ -116,3 +116,104 @@ def test_calculate_price_with_invalid_rental_duration(invalid_duration):
     # Preisberechnung mit ungültiger Mietdauer, Validierungsfehler (422) erwartet
     response = client.post(f"/api/v1/autos/{auto_id}/calculate-price?mietdauer_stunden={invalid_duration}")
     assert response.status_code == 422
+
+# ======= Test: Teilstring-Suche (SQLite-Fallback per ILIKE) =======
+def test_search_auto_partial_match():
+    set_user_role("owner")
+    client.post("/api/v1/dashboard/autos", json=auto_template)
+
+    set_user_role("customer")
+    response = client.get("/api/v1/autos/search?brand=mw&model=eda")
+    assert response.status_code == 200
+    assert len(response.json()) > 0
+    assert all("mw" in auto["brand"].lower() for auto in response.json())
+
+# ======= Test: PostgreSQL-Suche nutzt pg_trgm mit Ähnlichkeits-Ranking =======
+def test_search_query_uses_trigram_on_postgres():
+    from sqlalchemy.dialects import postgresql
+    from routers.app.auto import build_search_query
+
+    sql = str(build_search_query("BWM", None, None, None, use_trigram=True).compile(dialect=postgresql.dialect()))
+    assert "auto.brand %% " in sql  # Trigramm-Ähnlichkeitsoperator (tippfehlertolerant)
+    assert "ORDER BY greatest(similarity(auto.brand" in sql
+
+# ======= Test: Suchbegriffe gehen in PostgreSQL an pg_trgm, alles andere an den Snapshot =======
+def test_trigram_search_routing():
+    from routers.app.auto import trigram_search
+
+    assert trigram_search("postgresql", "BWM", None)
+    assert trigram_search("postgresql", None, "X5")
+    assert not trigram_search("postgresql", None, None)
+    assert not trigram_search("sqlite", "BWM", None)
+
+def test_search_uses_trigram_query_instead_of_snapshot(monkeypatch):
+    import routers.app.auto as app_auto
+    calls = []
+    build_search_query = app_auto.build_search_query
+
+    def spy(brand, model, jahr, status, use_trigram):
+        calls.append((brand, use_trigram))
+        return build_search_query(brand, model, jahr, status, use_trigram=False)  # SQLite kennt pg_trgm nicht
+
+    monkeypatch.setattr(app_auto, "build_search_query", spy)
+    monkeypatch.setattr(app_auto, "trigram_search", lambda dialect, brand, model: bool(brand or model))
+    set_user_role("customer")
+
+    assert client.get("/api/v1/autos/search?brand=mw").status_code == 200
+    assert calls == [("mw", True)]
+    assert client.get("/api/v1/autos/search?jahr=2020").status_code == 200
+    assert calls == [("mw", True)]  # ohne Suchbegriff aus dem Snapshot
+
+# ======= Test: Snapshot wird nach Änderungen im Dashboard sofort aktualisiert =======
+def test_search_reflects_dashboard_writes():
+    set_user_role("owner")
+    auto_id = client.post("/api/v1/dashboard/autos", json={**auto_template, "brand": "Snapshotmarke"}).json()["id"]
+
+    set_user_role("customer")
+    assert [a["id"] for a in client.get("/api/v1/autos/search?brand=Snapshotmarke").json()] == [auto_id]
+
+    set_user_role("owner")
+    client.put(f"/api/v1/dashboard/autos/{auto_id}", json={"preis_pro_stunde": 45})
+    set_user_role("customer")
+    response = client.post(f"/api/v1/autos/{auto_id}/calculate-price?mietdauer_stunden=2")
+    assert response.json()["total_price"] == 90
+
+    set_user_role("owner")
+    client.delete(f"/api/v1/dashboard/autos/{auto_id}")
+    set_user_role("customer")
+    assert client.get("/api/v1/autos/search?brand=Snapshotmarke").json() == []
+
+# ======= Test: Batch-Preisberechnung mit Fehlern pro Eintrag =======
+@pytest.mark.parametrize("snapshot_enabled", [True, False])
+def test_calculate_prices_batch(snapshot_enabled, monkeypatch, count_app_queries):
+    import routers.app.auto as app_auto
+    monkeypatch.setattr(app_auto, "FLEET_SNAPSHOT_ENABLED", snapshot_enabled)
+
+    set_user_role("owner")
+    verfuegbar = client.post("/api/v1/dashboard/autos", json={**auto_template, "preis_pro_stunde": 20}).json()["id"]
+    vermietet = client.post("/api/v1/dashboard/autos", json={**auto_template, "status": "vermietet"}).json()["id"]
+
+    set_user_role("guest")
+    payload = {"items": [
+        {"auto_id": verfuegbar, "mietdauer_stunden": 3},
+        {"auto_id": vermietet, "mietdauer_stunden": 3},
+        {"auto_id": 999999, "mietdauer_stunden": 1},
+        {"auto_id": verfuegbar, "mietdauer_stunden": 1},
+    ]}
+    with count_app_queries() as queries:
+        response = client.post("/api/v1/autos/calculate-prices", json=payload)
+    assert response.status_code == 200
+    if not snapshot_enabled:
+        assert queries.count == 1  # alle Autos mit einer IN-Abfrage
+
+    items = response.json()["items"]
+    assert items[0]["total_price"] == 60 and items[0]["error"] is None
+    assert items[1]["error"] == "nicht_verfuegbar"
+    assert items[2]["error"] == "nicht_gefunden"
+    assert items[3]["total_price"] == 20
+
+# ======= Test: Batch-Preisberechnung validiert die Anfrage =======
+def test_calculate_prices_batch_validation():
+    set_user_role("customer")
+    assert client.post("/api/v1/autos/calculate-prices", json={"items": []}).status_code == 422
+    assert client.post("/api/v1/autos/calculate-prices", json={"items": [{"auto_id": 1, "mietdauer_stunden": 0}]}).status_code == 422
@@ -185,3 +185,40 @@ def test_create_vertrag_invalid_kunden_id(created_auto):
     response = client.post("/api/v1/vertraege", json=vertrag)
     assert response.status_code == 404
     assert "Kunde mit ID" in response.json()["detail"] and "nicht gefunden" in response.json()["detail"]
+
+# ======= Test: Verfügbarkeitssuche berücksichtigt aktive Verträge im Zeitraum =======
+def test_verfuegbarkeit_for_date_range(created_auto, created_kunde):
+    auto_id = created_auto["id"]
+    set_user_role("customer")
+    vertrag = get_vertrag_template(auto_id, created_kunde["id"], date(2099, 3, 1), date(2099, 3, 10))
+    assert client.post("/api/v1/vertraege", json=vertrag).status_code == 201
+
+    def free_ids(von, bis):
+        response = client.get(f"/api/v1/autos/verfuegbarkeit?von={von}&bis={bis}&brand=TOYOTA")
+        assert response.status_code == 200
+        return {auto["id"] for auto in response.json()}
+
+    assert auto_id not in free_ids("2099-03-05", "2099-03-20")  # überschneidet sich
+    assert auto_id not in free_ids("2099-02-20", "2099-03-02")  # umfasst den ersten Miettag
+    assert auto_id in free_ids("2099-02-20", "2099-03-01")      # Rückgabe am Tag des Vertragsbeginns
+    assert auto_id in free_ids("2099-03-10", "2099-03-20")      # ab dem Rückgabetag frei (trotz Status reserviert)
+
+    # Buchung prüft denselben Zeitraum: freie Zeiträume sind buchbar, überschneidende nicht
+    spaeter = get_vertrag_template(auto_id, created_kunde["id"], date(2099, 3, 10), date(2099, 3, 20))
+    response = client.post("/api/v1/vertraege", json=spaeter)
+    assert response.status_code == 201
+    ueberschneidend = get_vertrag_template(auto_id, created_kunde["id"], date(2099, 3, 15), date(2099, 3, 25))
+    assert client.post("/api/v1/vertraege", json=ueberschneidend).status_code == 400
+
+    # Kündigen gibt das Auto nicht frei, solange ein anderer Vertrag bevorsteht
+    assert client.post(f"/api/v1/vertraege/{response.json()['id']}/kuendigen").status_code == 200
+    set_user_role("owner")
+    assert client.get(f"/api/v1/dashboard/autos/{auto_id}").json()["status"] == "reserviert"
+
+# ======= Test: Verfügbarkeitssuche mit ungültigem Zeitraum =======
+def test_verfuegbarkeit_invalid_range():
+    set_user_role("guest")
+    response = client.get("/api/v1/autos/verfuegbarkeit?von=2099-03-10&bis=2099-03-01")
+    assert response.status_code == 400
+    response = client.get("/api/v1/autos/verfuegbarkeit?von=2099-03-10&bis=2099-03-10")
+    assert response.status_code == 400
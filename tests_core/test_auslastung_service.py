@@ -0,0 +1,126 @@
+import secrets
+from datetime import date
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+import pytest
+from data_base import Base
+from models.auslastung import AutoAuslastung
+from models.auto import Auto, AutoStatus
+from models.kunden import Kunden
+from models.vertrag import Vertrag, VertragStatus
+from services.auslastung_service import belegte_tage, auslastung_fortschreiben
+
+DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Weit in der Zukunft, damit date.today() in den Mapper-Events davor liegt
+ZUKUNFT = date(2090, 6, 1)
+
+# Fixture zur Einrichtung und Aufräumung der In-Memory-Datenbank vor und nach jedem Test
+@pytest.fixture(scope="function")
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def add_vertrag(db, beginnt, beendet, status=VertragStatus.aktiv, auto=None):
+    if auto is None:
+        auto = Auto(brand="BMW", model="X5", jahr=2020, preis_pro_stunde=50, status=AutoStatus.reserviert)
+    kunde = Kunden(vorname="Max", nachname="Muster", geb_datum=date(1990, 1, 1), handy_nummer="0123", email=f"{secrets.token_hex(6)}@gmail.com")
+    db.add_all([auto, kunde])
+    db.flush()
+    vertrag = Vertrag(auto_id=auto.id, kunden_id=kunde.id, status=status, beginnt_datum=beginnt, beendet_datum=beendet)
+    db.add(vertrag)
+    db.commit()
+    return vertrag
+
+
+def rollup_tage(db, auto_id):
+    return db.scalars(
+        select(AutoAuslastung.tag).where(AutoAuslastung.auto_id == auto_id).order_by(AutoAuslastung.tag)
+    ).all()
+
+
+# Das Enddatum ist wie im restlichen System exklusiv
+def test_belegte_tage_ende_exklusiv():
+    assert belegte_tage(date(2030, 1, 30), date(2030, 2, 1)) == [date(2030, 1, 30), date(2030, 1, 31)]
+    assert belegte_tage(date(2030, 2, 1), date(2030, 2, 1)) == []
+    assert belegte_tage(date(2030, 2, 1), date(2030, 1, 30)) == []
+
+
+# Anlegen, Verschieben, Umhängen, Kündigen und Löschen halten das Rollup in derselben Transaktion aktuell
+def test_rollup_folgt_vertragsaenderungen(db):
+    vertrag = add_vertrag(db, ZUKUNFT, date(2090, 6, 3))
+    auto_id = vertrag.auto_id
+    assert rollup_tage(db, auto_id) == [date(2090, 6, 1), date(2090, 6, 2)]
+
+    vertrag.beendet_datum = date(2090, 6, 5)
+    vertrag.beginnt_datum = date(2090, 6, 3)
+    db.commit()
+    assert rollup_tage(db, auto_id) == [date(2090, 6, 3), date(2090, 6, 4)]
+
+    # Umhängen auf ein anderes Auto gibt die Tage des alten frei
+    anderes = add_vertrag(db, date(2091, 1, 1), date(2091, 1, 2)).auto_id
+    vertrag.auto_id = anderes
+    db.commit()
+    assert rollup_tage(db, auto_id) == []
+    assert rollup_tage(db, anderes) == [date(2090, 6, 3), date(2090, 6, 4), date(2091, 1, 1)]
+
+    # Beenden vor Beginn ist eine Kündigung und belegt das Auto nicht
+    vertrag.status = VertragStatus.beendet
+    db.commit()
+    assert rollup_tage(db, anderes) == [date(2091, 1, 1)]
+
+    vertrag.status = VertragStatus.aktiv
+    db.commit()
+    db.delete(vertrag)
+    db.commit()
+    assert rollup_tage(db, anderes) == [date(2091, 1, 1)]
+
+
+# Überschneidende Verträge eines Autos belegen jeden Tag nur einmal; Löschen des einen lässt die Tage des anderen stehen
+def test_ueberschneidende_vertraege(db):
+    erster = add_vertrag(db, ZUKUNFT, date(2090, 6, 5))
+    auto = db.get(Auto, erster.auto_id)
+    zweiter = add_vertrag(db, date(2090, 6, 3), date(2090, 6, 8), auto=auto)
+    assert rollup_tage(db, auto.id) == belegte_tage(ZUKUNFT, date(2090, 6, 8))
+
+    db.delete(erster)
+    db.commit()
+    assert rollup_tage(db, auto.id) == belegte_tage(date(2090, 6, 3), date(2090, 6, 8))
+
+    zweiter.status = VertragStatus.gekündigt
+    db.commit()
+    assert rollup_tage(db, auto.id) == []
+
+
+def test_gekuendigter_vertrag_belegt_nichts(db):
+    vertrag = add_vertrag(db, ZUKUNFT, date(2090, 6, 3), VertragStatus.gekündigt)
+    assert rollup_tage(db, vertrag.auto_id) == []
+
+
+# Der Job schreibt offene Verträge bis heute fort und baut fehlende Rollup-Tage nach
+def test_auslastung_fortschreiben(db):
+    heute = date(2090, 6, 10)
+    offen = add_vertrag(db, ZUKUNFT, None)  # beginnt nach date.today(), das Anlegen schreibt noch keine Tage
+    db.execute(insert(AutoAuslastung).values(auto_id=offen.auto_id, tag=date(2090, 6, 1)))
+    ohne_rollup = add_vertrag(db, date(2090, 6, 1), date(2090, 6, 3))
+    db.execute(AutoAuslastung.__table__.delete().where(AutoAuslastung.auto_id == ohne_rollup.auto_id))
+    vollstaendig = add_vertrag(db, date(2090, 7, 1), date(2090, 7, 3))
+    db.commit()
+
+    result = auslastung_fortschreiben(db, heute=heute)
+
+    assert result["tage_eingefuegt"] == 11
+    assert rollup_tage(db, offen.auto_id) == belegte_tage(ZUKUNFT, date(2090, 6, 11))
+    assert rollup_tage(db, ohne_rollup.auto_id) == [date(2090, 6, 1), date(2090, 6, 2)]
+    assert rollup_tage(db, vollstaendig.auto_id) == [date(2090, 7, 1), date(2090, 7, 2)]
+
+    # Zweiter Lauf am selben Tag ist idempotent
+    assert auslastung_fortschreiben(db, heute=heute)["tage_eingefuegt"] == 0
@@ -0,0 +1,46 @@
+import time
+from datetime import date
+import pytest
+from services.availability_index import AvailabilityIndex, CarIntervals
+
+
+def d(day: int) -> int:
+    return date(2030, 1, day).toordinal()
+
+
+# Halboffene Zeiträume [von, bis), auch bei sich überlappenden Verträgen
+def test_car_intervals_overlap():
+    car = CarIntervals([(d(10), d(12)), (d(1), d(20)), (d(25), d(27))])
+    assert car.overlaps(d(15), d(16))      # nur vom langen Vertrag abgedeckt
+    assert car.overlaps(d(26), d(30))      # letzter Miettag eines Vertrags
+    assert car.overlaps(d(24), d(26))      # erster Miettag eines Vertrags
+    assert not car.overlaps(d(20), d(25))  # Rückgabetag bis Beginn des nächsten Vertrags
+    assert not car.overlaps(d(27), d(31))  # ab dem Rückgabetag frei
+
+
+@pytest.fixture
+def index():
+    index = AvailabilityIndex(ttl_seconds=60)
+    index.loaded_at = time.monotonic()
+    index.apply(1, auto_id=7, beginnt=date(2030, 1, 1), beendet=date(2030, 1, 5), aktiv=True)
+    index.apply(2, auto_id=8, beginnt=date(2030, 1, 3), beendet=None, aktiv=True)
+    return index
+
+
+# Offene Verträge blockieren unbegrenzt, Autos ohne Verträge sind frei
+def test_free_autos(index):
+    assert index.free_autos([7, 8, 9], date(2030, 1, 4), date(2030, 1, 5)) == [9]
+    assert index.free_autos([7, 8, 9], date(2030, 1, 5), date(2031, 1, 1)) == [7, 9]
+
+
+# Beenden, Umhängen auf ein anderes Auto und Löschen aktualisieren den Index
+def test_apply_changes(index):
+    index.apply(1, auto_id=7, beginnt=date(2030, 1, 1), beendet=date(2030, 1, 5), aktiv=False)
+    assert index.is_free(7, date(2030, 1, 2), date(2030, 1, 3))
+
+    index.apply(2, auto_id=9, beginnt=date(2030, 1, 3), beendet=date(2030, 1, 4), aktiv=True)
+    assert index.is_free(8, date(2030, 1, 3), date(2030, 1, 4))
+    assert not index.is_free(9, date(2030, 1, 3), date(2030, 1, 4))
+
+    index.apply(2)
+    assert index.is_free(9, date(2030, 1, 3), date(2030, 1, 4))
@@ -0,0 +1,32 @@
+from benchmarks.bench_core import compare, load_baseline, run
+
+BENCHMARKS = {
+    "hash_password", "verify", "create_token", "decode_token",
+    "validate_vertrag_create", "validate_zahlung_create", "validate_kunden_create",
+    "berechne_mitdauer", "orm_to_auto", "orm_to_kunden", "orm_to_vertrag", "orm_to_zahlung",
+}
+
+
+def test_baseline_committed():
+    baseline = load_baseline()
+    assert baseline is not None
+    assert set(baseline["ergebnisse"]) == BENCHMARKS
+    assert all(werte["relativ"] > 0 for werte in baseline["ergebnisse"].values())
+
+
+# Über der Schwelle gilt als Regression, neue Benchmarks ohne Baseline nicht
+def test_compare_threshold():
+    baseline = {"ergebnisse": {"a": {"relativ": 1.0}, "b": {"relativ": 2.0}}}
+    aktuell = {"ergebnisse": {"a": {"relativ": 1.2}, "b": {"relativ": 3.0}, "c": {"relativ": 1.0}}}
+
+    zeilen = {zeile["name"]: zeile for zeile in compare(baseline, aktuell, schwelle=0.3)}
+
+    assert zeilen["a"] == {"name": "a", "faktor": 1.2, "regression": False}
+    assert zeilen["b"] == {"name": "b", "faktor": 1.5, "regression": True}
+    assert zeilen["c"]["faktor"] is None and not zeilen["c"]["regression"]
+
+
+def test_run_selection():
+    ergebnis = run({"schnell": lambda: None, "anderes": lambda: None}, auswahl="schnell", durchlaeufe=1)
+    assert list(ergebnis["ergebnisse"]) == ["schnell"]
+    assert ergebnis["ergebnisse"]["schnell"]["relativ"] < 1
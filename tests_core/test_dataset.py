@@ -0,0 +1,77 @@
+import hashlib
+from datetime import date
+from sqlalchemy import create_engine, text
+from benchmarks.dataset import Generator, CopyStream, generate
+
+STICHTAG = date(2026, 10, 17)
+ANZAHL = {"autos": 12, "kunden": 300, "vertraege": 1_000, "zahlungen": 2_300}
+
+
+def checksum(url: str) -> str:
+    engine = create_engine(url)
+    digest = hashlib.sha256()
+    with engine.connect() as conn:
+        for table in ("auto", "kunden", "vertrag", "zahlung"):
+            for row in conn.execute(text(f"SELECT * FROM {table} ORDER BY id")):
+                digest.update(repr(tuple(row)).encode())
+    engine.dispose()
+    return digest.hexdigest()
+
+
+# Exakte Zeilenzahlen, gültige Fremdschlüssel und keine Doppelbelegung eines Autos
+def test_generate_sqlite(tmp_path):
+    url = f"sqlite:///{tmp_path / 'scale.db'}"
+    counts = generate(url, 7, STICHTAG, ANZAHL, mit_auslastung=True)
+    assert counts == {"auto": 12, "kunden": 300, "vertrag": 1_000, "zahlung": 2_300}
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM vertrag v LEFT JOIN auto a ON a.id = v.auto_id "
+            "LEFT JOIN kunden k ON k.id = v.kunden_id WHERE a.id IS NULL OR k.id IS NULL"
+        )).scalar() == 0
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM zahlung z LEFT JOIN vertrag v ON v.id = z.vertrag_id WHERE v.id IS NULL"
+        )).scalar() == 0
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM vertrag a JOIN vertrag b ON a.auto_id = b.auto_id AND a.id < b.id "
+            "WHERE a.status != 'gekündigt' AND b.status != 'gekündigt' "
+            "AND a.beginnt_datum <= b.beendet_datum AND b.beginnt_datum <= a.beendet_datum"
+        )).scalar() == 0
+        # Status passt zum Stichtag; laufende Verträge machen das Auto "vermietet"
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM vertrag WHERE status = 'beendet' AND beendet_datum > '2026-10-17'"
+        )).scalar() == 0
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM vertrag v JOIN auto a ON a.id = v.auto_id WHERE v.status = 'aktiv' "
+            "AND v.beginnt_datum <= '2026-10-17' AND a.status != 'vermietet'"
+        )).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM auto_auslastung")).scalar() > 0
+        # Jeder Rollup-Tag ist durch einen Vertrag belegt (Enddatum exklusiv) und liegt nach dem Anlagetag des Autos
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM auto_auslastung a WHERE NOT EXISTS (SELECT 1 FROM vertrag v "
+            "WHERE v.auto_id = a.auto_id AND v.status IN ('aktiv', 'beendet') "
+            "AND v.beginnt_datum <= a.tag AND a.tag < v.beendet_datum)"
+        )).scalar() == 0
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM vertrag v JOIN auto a ON a.id = v.auto_id WHERE v.beginnt_datum < a.angelegt_am"
+        )).scalar() == 0
+    engine.dispose()
+
+
+# Gleicher Seed und Stichtag ergeben denselben Bestand, ein anderer Seed einen anderen
+def test_generate_deterministic(tmp_path):
+    urls = [f"sqlite:///{tmp_path / name}" for name in ("a.db", "b.db", "c.db")]
+    for url, seed in zip(urls, (7, 7, 8)):
+        generate(url, seed, STICHTAG, ANZAHL)
+    assert checksum(urls[0]) == checksum(urls[1])
+    assert checksum(urls[0]) != checksum(urls[2])
+
+
+def test_copy_stream_format():
+    rows = Generator(1, STICHTAG, 2, 3, 4, 5).kunden()
+    stream = CopyStream(list(rows) + [(4, "Max", "Muster", None, None, "max@example.com")])
+    content = "".join(iter(lambda: stream.read(17), ""))
+    lines = content.splitlines()
+    assert len(lines) == 4 and stream.count == 4
+    assert lines[-1] == "4\tMax\tMuster\t\\N\t\\N\tmax@example.com"
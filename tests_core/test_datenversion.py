@@ -0,0 +1,24 @@
+from sqlalchemy import create_engine, func, select
+from models.datenversion import DatenVersion
+from services.datenversion import versionen_erhoehen
+
+
+# Parallele Verbindungen zählen in getrennten Slots; die Tabellenversion ist die Summe
+def test_versionen_erhoehen_slots(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'version.db'}")
+    DatenVersion.__table__.create(engine)
+
+    with engine.connect() as erste, engine.connect() as zweite:
+        for conn, tabellen in ((erste, ["auto", "vertrag"]), (zweite, ["auto"]), (erste, ["auto"])):
+            versionen_erhoehen(conn, tabellen)
+            conn.commit()  # SQLite erlaubt nur einen Schreiber
+
+    with engine.connect() as conn:
+        slots = conn.execute(
+            select(DatenVersion.slot, DatenVersion.version).where(DatenVersion.tabelle == "auto")
+        ).all()
+        summe = conn.execute(select(func.sum(DatenVersion.version)).where(DatenVersion.tabelle == "auto")).scalar()
+    engine.dispose()
+
+    assert len(slots) == 2 and sorted(version for _, version in slots) == [1, 2]
+    assert summe == 3
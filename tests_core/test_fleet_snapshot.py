@@ -0,0 +1,100 @@
+import time
+import pytest
+from fastapi import HTTPException
+from models.auto import AutoStatus
+from schemas.pagination import SortOrder
+from services.fleet_snapshot import FleetSnapshot, similarity
+
+
+# Snapshot mit einigen Autos, ohne Datenbank (loaded_at gesetzt, damit upsert wirkt)
+@pytest.fixture
+def snapshot():
+    snapshot = FleetSnapshot(ttl_seconds=60)
+    snapshot.loaded_at = time.monotonic()
+    snapshot.upsert(1, "BMW", "X5", 2020, 50.0, AutoStatus.verfügbar)
+    snapshot.upsert(2, "BMW", "320i", 2018, 30.0, AutoStatus.verfügbar)
+    snapshot.upsert(3, "Toyota", "Corolla", 2021, 25.0, AutoStatus.vermietet)
+    snapshot.upsert(4, "Mercedes", "C200", 2022, 60.0, "verfügbar")
+    return snapshot
+
+
+# Ähnlichkeit entspricht pg_trgm: identisch = 1, unverwandt = 0
+def test_similarity():
+    assert similarity("BMW", "bmw") == 1.0
+    assert similarity("Toyota", "BMW") == 0.0
+    assert similarity("Mercedes", "Mercedez") >= 0.3
+
+
+# Suche nach Teilstring, Tippfehler, Baujahr und Status
+def test_search_filters(snapshot):
+    assert [row["id"] for row in snapshot.search("bm", None, None, None)] == [1, 2]
+    assert [row["id"] for row in snapshot.search("Mercedez", None, None, None)] == [4]
+    assert [row["id"] for row in snapshot.search(None, None, 2021, None)] == [3]
+    assert [row["id"] for row in snapshot.search("BMW", None, None, AutoStatus.vermietet)] == []
+    assert len(snapshot.search(None, None, None, None)) == 4
+
+
+# Änderungen und Löschungen aktualisieren Spalten und Indizes inkrementell
+def test_upsert_and_delete(snapshot):
+    snapshot.upsert(2, "BMW", "320i", 2018, 35.0, AutoStatus.reserviert)
+    assert snapshot.get(2)["preis_pro_stunde"] == 35.0
+    assert snapshot.get(2)["status"] == "reserviert"
+    assert [row["id"] for row in snapshot.search(None, None, None, AutoStatus.verfügbar)] == [1, 4]
+
+    snapshot.delete(1)
+    assert snapshot.get(1) is None
+    assert snapshot.search("BMW", None, None, None) == [snapshot.get(2)]
+
+
+# Seiten werden wie bei der Keyset-Paginierung über (Sortierspalte, id) gebildet
+def test_page_with_cursor(snapshot):
+    first = snapshot.page(AutoStatus.verfügbar, None, None, None, None, "preis_pro_stunde", SortOrder.desc, None, 2)
+    assert [row["id"] for row in first["items"]] == [4, 1]
+    second = snapshot.page(AutoStatus.verfügbar, None, None, None, None, "preis_pro_stunde", SortOrder.desc, first["next_cursor"], 2)
+    assert [row["id"] for row in second["items"]] == [2]
+    assert second["next_cursor"] is None
+
+    filtered = snapshot.page(AutoStatus.verfügbar, "BMW", None, 2019, None, "id", SortOrder.asc, None, 10)
+    assert [row["id"] for row in filtered["items"]] == [1]
+
+
+# Cursor mit falschem Werttyp ergibt 400
+def test_page_invalid_cursor(snapshot):
+    cursor = snapshot.page(AutoStatus.verfügbar, None, None, None, None, "brand", SortOrder.asc, None, 1)["next_cursor"]
+    with pytest.raises(HTTPException) as exc:
+        snapshot.page(AutoStatus.verfügbar, None, None, None, None, "jahr", SortOrder.asc, cursor, 1)
+    assert exc.value.status_code == 400
+
+
+# Async-Tests nur mit asyncio ausführen
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+# Datenbank-Ersatz für ensure_loaded: liefert die aktuellen Zeilen und zählt die Abfragen
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        rows = list(self.rows)
+        return type("Result", (), {"all": lambda self: rows})()
+
+
+# Eine neue Tabellenversion erzwingt ein Neuladen innerhalb der TTL, dieselbe Version nicht
+@pytest.mark.anyio
+async def test_ensure_loaded_reloads_on_new_version():
+    snapshot = FleetSnapshot(ttl_seconds=60)
+    db = FakeDB([(1, "BMW", "X5", 2020, 50.0, AutoStatus.verfügbar)])
+    await snapshot.ensure_loaded(db, 'W/"auto-1"')
+    db.rows = [(1, "BMW", "X5", 2020, 55.0, AutoStatus.verfügbar)]  # Änderung durch einen anderen Worker
+
+    await snapshot.ensure_loaded(db, 'W/"auto-1"')
+    assert db.queries == 1 and snapshot.get(1)["preis_pro_stunde"] == 50.0
+    await snapshot.ensure_loaded(db, 'W/"auto-2"')
+    assert db.queries == 2 and snapshot.get(1)["preis_pro_stunde"] == 55.0
+    await snapshot.ensure_loaded(db)  # ohne Version genügt die TTL
+    assert db.queries == 2
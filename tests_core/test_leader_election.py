@@ -0,0 +1,51 @@
+import pytest
+from core.leader_election import FileLock, LeaderElection, advisory_lock_key, build_leader_election
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return str(tmp_path / "scheduler.lock")
+
+
+# Nur ein Worker hält die Sperre; nach dessen Ausfall übernimmt ein anderer
+def test_file_lock_single_leader_and_failover(lock_path):
+    worker_a = LeaderElection(FileLock(lock_path))
+    worker_b = LeaderElection(FileLock(lock_path))
+
+    assert worker_a.ensure_leader()
+    assert not worker_b.ensure_leader()
+    assert worker_a.ensure_leader()  # Leader bleibt Leader
+
+    worker_a.release()  # entspricht dem Ende des Prozesses
+    assert worker_b.ensure_leader()
+    assert not worker_a.ensure_leader()
+    worker_b.release()
+
+
+# Jobs laufen nur beim Leader
+def test_leader_only_runs_job_once(lock_path):
+    runs = []
+    worker_a = LeaderElection(FileLock(lock_path))
+    worker_b = LeaderElection(FileLock(lock_path))
+
+    job_a = worker_a.leader_only(lambda: runs.append("a"))
+    job_b = worker_b.leader_only(lambda: runs.append("b"))
+    job_a()
+    job_b()
+
+    assert runs == ["a"]
+    worker_a.release()
+
+
+def test_build_leader_election_modes():
+    assert isinstance(build_leader_election("sqlite:///x.db").lock, FileLock)
+    assert build_leader_election("sqlite:///x.db", mode="none").ensure_leader()
+    with pytest.raises(ValueError):
+        build_leader_election("sqlite:///x.db", mode="zookeeper")
+
+
+# Schlüssel für pg_advisory_lock ist stabil und passt in bigint
+def test_advisory_lock_key():
+    key = advisory_lock_key("autogo-scheduler")
+    assert key == advisory_lock_key("autogo-scheduler")
+    assert -2**63 <= key < 2**63
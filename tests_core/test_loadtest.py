@@ -0,0 +1,35 @@
+import pytest
+from benchmarks.loadtest import EndpointStats, percentile, build_report, parse_mix, SCENARIOS
+
+
+def test_percentile_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+
+
+# Bericht pro Endpunkt und gesamt: Durchsatz, Fehlerquote, Perzentile und Statuscodes
+def test_build_report():
+    search, book = EndpointStats(), EndpointStats()
+    for ms in range(1, 11):
+        search.record(ms / 1000, 200, True)
+    book.record(0.5, 201, True)
+    book.record(0.1, 400, False)
+
+    report = build_report({"GET /search": search, "POST /book": book}, duration=2.0, meta={"seed": 1})
+
+    assert report["meta"] == {"seed": 1, "duration_s": 2.0}
+    assert report["endpoints"]["GET /search"]["throughput_rps"] == 5.0
+    assert report["endpoints"]["GET /search"]["latency_ms"]["p50"] == 5.0
+    assert report["endpoints"]["POST /book"]["error_rate"] == 0.5
+    assert report["total"]["requests"] == 12
+    assert report["total"]["status"] == {"200": 10, "201": 1, "400": 1}
+
+
+def test_parse_mix():
+    assert set(parse_mix(None)) == set(SCENARIOS)
+    assert parse_mix("search=3,login") == {"search": 3, "login": SCENARIOS["login"][0]}
+    with pytest.raises(SystemExit):
+        parse_mix("unbekannt=1")
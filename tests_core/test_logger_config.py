@@ -0,0 +1,70 @@
+import io
+import json
+import logging
+import queue
+import sys
+from core.logger_config import JsonFormatter, LazyQueueHandler, SamplingFilter, parse_sample_rates
+
+
+def make_record(name="routers.app.auto", level=logging.INFO, msg="Auto %s gefunden", args=(7,)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+# Jede n-te INFO-Meldung pro Logger wird behalten, Warnungen immer
+def test_sampling_filter():
+    sampling = SamplingFilter(default_rate=1.0, rates={"routers.app": 0.25})
+
+    kept = [sampling.filter(make_record()) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert all(sampling.filter(make_record(level=logging.WARNING)) for _ in range(3))
+    assert all(sampling.filter(make_record(name="services.auth_service")) for _ in range(3))
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("routers.app.auto=0.1, services=0.5,") == {"routers.app.auto": 0.1, "services": 0.5}
+    assert parse_sample_rates("") == {}
+
+
+# Eine JSON-Zeile mit zusammengesetzter Nachricht
+def test_json_formatter():
+    entry = json.loads(JsonFormatter().format(make_record()))
+    assert entry["msg"] == "Auto 7 gefunden"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "routers.app.auto"
+
+
+# Der aufrufende Thread setzt nur die Nachricht zusammen; JSON-Zeile und Ausgabe entstehen im Listener-Thread
+def test_queue_handler_formats_lazily_in_listener():
+    output = io.StringIO()
+    target = logging.StreamHandler(output)
+    target.setFormatter(JsonFormatter())
+    log_queue = queue.Queue()
+    handler = LazyQueueHandler(log_queue, target)
+
+    record = make_record(msg="Autos %s gefunden", args=([7],))
+    prepared = handler.prepare(record)
+    record.args[0].append(8)  # spätere Änderung am Argument erreicht den Listener nicht
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("Autos [7] gefunden", None, None)
+    assert record.args == ([7, 8],)  # Original bleibt für andere Handler unverändert
+
+    try:
+        raise ValueError("kaputt")
+    except ValueError:
+        record = make_record()
+        record.exc_info = sys.exc_info()
+    handler.handle(record)
+    queued = log_queue.queue[0]
+    assert queued.exc_info is None and "ValueError: kaputt" in queued.exc_text
+
+    handler.stop()  # leert die Queue
+    entry = json.loads(output.getvalue())
+    assert entry["msg"] == "Auto 7 gefunden"
+    assert "ValueError: kaputt" in entry["exc"]
+
+
+# Volle Queue verwirft Meldungen statt zu blockieren
+def test_queue_handler_drops_when_full():
+    handler = LazyQueueHandler(queue.Queue(maxsize=1), logging.NullHandler())
+    handler.enqueue(make_record())
+    handler.enqueue(make_record())
+    assert handler.dropped == 1
@@ -1,6 +1,7 @@
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
 from data_base import Base
 from datetime import date
 from core.security.hash import hash_password, verify
@@ -108,3 +109,26 @@ def test_user(db):
     assert user.email == "tihanibrahim@hotmail.com"  # Email stimmt überein
     assert verify("123456789tito", user.hashed_password)  # Passwortprüfung erfolgreich
     assert user.role == "customer"  # Standardrolle ist "customer" (sofern im Model definiert)
+
+
+# Optimistische Sperre: eine Session mit veralteter Version darf die Zeile nicht überschreiben
+def test_version_id_col_conflict(db):
+    auto = Auto(brand="BMW", model="X5", jahr=2020, preis_pro_stunde=50, status=AutoStatus.verfügbar)
+    db.add(auto)
+    db.commit()
+    assert auto.version == 1
+
+    other = SessionLocal()
+    try:
+        parallel = other.get(Auto, auto.id)
+        parallel.preis_pro_stunde = 60
+        other.commit()
+        assert parallel.version == 2
+    finally:
+        other.close()
+
+    auto.preis_pro_stunde = 70  # geladen mit Version 1
+    with pytest.raises(StaleDataError):
+        db.commit()
+    db.rollback()
+    assert db.get(Auto, auto.id).preis_pro_stunde == 60
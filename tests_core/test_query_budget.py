@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from core.metrics import MetricsMiddleware, MetricsRegistry, count_queries, current_request_stats, query_budget
+
+
+# Zählt alle Statements einer Engine im with-Block
+def test_count_queries():
+    engine = create_engine("sqlite:///:memory:")
+    with count_queries(engine) as counter:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert counter.count == 2
+    assert counter.statements == ["SELECT 1", "SELECT 2"]
+
+
+# Endpunkte über ihrem Budget werden als Verstoß erfasst
+def test_middleware_records_budget_violation():
+    registry = MetricsRegistry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/teuer")
+    @query_budget(1)
+    async def teuer():
+        current_request_stats.get().queries += 3  # simuliert drei SQL-Statements
+        return {}
+
+    @app.get("/guenstig")
+    @query_budget(1)
+    async def guenstig():
+        return {}
+
+    client = TestClient(app)
+    client.get("/teuer")
+    client.get("/guenstig")
+
+    assert registry.budget_violations == [{"method": "GET", "route": "/teuer", "queries": 3, "budget": 1}]
+    rendered = registry.render()
+    assert 'db_query_budget_exceeded_total{method="GET",route="/teuer"} 1' in rendered
+    assert 'db_query_budget_exceeded_total{method="GET",route="/guenstig"} 0' in rendered
+
+    # Der Zähler bleibt monoton, auch wenn die Detailliste begrenzt ist
+    for _ in range(100):
+        client.get("/teuer")
+    assert len(registry.budget_violations) == 100
+    assert 'db_query_budget_exceeded_total{method="GET",route="/teuer"} 101' in registry.render()
+
+
+# Jeder API-Endpunkt der App hat ein Query-Budget
+def test_every_endpoint_has_budget():
+    import main
+
+    missing = [
+        f"{sorted(route.methods)} {route.path}"
+        for route in main.app.routes
+        if isinstance(route, APIRoute) and not hasattr(route.endpoint, "query_budget")
+    ]
+    assert missing == []
@@ -1,4 +1,6 @@
-from core.security.hash import verify, hash_password
+import asyncio
+from passlib.context import CryptContext
+from core.security.hash import verify, hash_password, verify_and_update, calibrate_rounds, configure_rounds, current_rounds, HashingPool
 from core.security.jwt import create_token, SECRET_KEY, ALGORITHM, decode_token
 from jose import jwt
 from datetime import timedelta, datetime
@@ -58,3 +60,40 @@ def test_token_missing_fields():
         decode_token(token_missing_fields)
     # Erwartet wird ein 401 Unauthorized Fehler
     assert error.value.status_code == 401
+
+# Testet, dass ein Hash mit niedrigerem Kostenfaktor beim Verifizieren neu erstellt wird
+def test_verify_and_update_rehashes_on_cost_change():
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Test-password-1@")
+
+    is_valid, new_hash = verify_and_update("Test-password-1@", old_hash)
+    assert is_valid
+    assert new_hash is not None
+    assert new_hash.split("$")[2] == f"{current_rounds():02d}"
+
+    # Mit aktuellem Kostenfaktor ist kein Rehash nötig
+    assert verify_and_update("Test-password-1@", new_hash) == (True, None)
+
+# Testet, dass ein Hash mit höherem Kostenfaktor nicht herabgestuft wird (kein Hin und Her zwischen Workern)
+def test_verify_and_update_keeps_higher_cost():
+    original = current_rounds()
+    configure_rounds(4)
+    try:
+        stronger_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("Test-password-1@")
+        assert verify_and_update("Test-password-1@", stronger_hash) == (True, None)
+    finally:
+        configure_rounds(original)
+
+# Testet, dass die Kalibrierung innerhalb der Grenzen bleibt
+def test_calibrate_rounds_bounds():
+    assert calibrate_rounds(target_ms=0.001, min_rounds=4, max_rounds=6) == 4
+    assert calibrate_rounds(target_ms=10_000_000, min_rounds=4, max_rounds=6) == 6
+
+# Testet, dass der Hashing-Pool bei voller Warteschlange mit 503 ablehnt
+def test_hashing_pool_rejects_when_full():
+    pool = HashingPool(workers=1, max_queue=0)
+    pool.pending = 1  # Ein Auftrag ist bereits in Arbeit
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pool.run(hash_password, "Test-password-1@"))
+    assert error.value.status_code == 503
+    assert pool.stats()["rejected"] == 1
@@ -1,36 +1,46 @@
 from services.auth_service import create_user_service, login_user
 from core.security.hash import verify
 from schemas.auth_schemas import CreateRequest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import pytest
 from data_base import Base
+from models.user import User
+from passlib.context import CryptContext
 from fastapi import HTTPException
 
-DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+# Async-Tests nur mit asyncio ausführen (asyncpg/aiosqlite unterstützen kein trio)
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
 # Fixture zur Einrichtung und Aufräumung der In-Memory-Datenbank vor und nach jedem Test
 @pytest.fixture(scope="function")
-def db():
-    Base.metadata.create_all(bind=engine)  # Tabellen erstellen
+async def db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)  # Tabellen erstellen
     db = SessionLocal()
     try:
         yield db  # Datenbanksession für Test bereitstellen
     finally:
-        db.close()
-        Base.metadata.drop_all(bind=engine)  # Tabellen nach Test löschen
+        await db.close()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)  # Tabellen nach Test löschen
+        await engine.dispose()  # Verbindung (und aiosqlite-Thread) der Test-Loop schließen
 
 
 # Test für das Erstellen eines neuen Nutzers mit gültigen Daten
-def test_create_user(db):
+@pytest.mark.anyio
+async def test_create_user(db):
     request1 = CreateRequest(
         email="lolo1234@gmail.com",
         password="Test-password-1@"
     )
 
-    user1 = create_user_service(request1, db)
+    user1 = await create_user_service(request1, db)
 
     # Verifiziere, dass der Nutzer mit gehashter (nicht roher) Passwort gespeichert wurde
     assert user1.email == request1.email
@@ -44,19 +54,20 @@ def test_create_user(db):
     )
 
     with pytest.raises(HTTPException) as error:
-        create_user_service(request2, db)
+        await create_user_service(request2, db)
     assert error.value.status_code == 409  # Konflikt-Status
 
 
 # Test für das Einloggen eines Nutzers mit korrekten Zugangsdaten
-def test_login_user(db):
+@pytest.mark.anyio
+async def test_login_user(db):
     request1 = CreateRequest(
         email="lolo1234@gmail.com",
         password="Test-password-2@"
     )
-    user1 = create_user_service(request1, db)
+    user1 = await create_user_service(request1, db)
 
-    logged_in_user = login_user(
+    logged_in_user = await login_user(
         email="lolo1234@gmail.com",
         password="Test-password-2@",
         db=db
@@ -68,15 +79,16 @@ def test_login_user(db):
 
 
 # Test für Login-Versuch mit falschem Passwort, sollte HTTP 401 zurückgeben
-def test_login_user_wrong_password(db):
+@pytest.mark.anyio
+async def test_login_user_wrong_password(db):
     request1 = CreateRequest(
         email="lolo1234@gmail.com",
         password="Test-password-3@"
     )
-    create_user_service(request1, db)
+    await create_user_service(request1, db)
 
     with pytest.raises(HTTPException) as error:
-        login_user(
+        await login_user(
             email="lolo1234@gmail.com",
             password="Wrong-password@",
             db=db
@@ -85,11 +97,25 @@ def test_login_user_wrong_password(db):
 
 
 # Test für Login-Versuch mit nicht existierender Email, sollte HTTP 401 zurückgeben
-def test_login_user_nonexistent_email(db):
+@pytest.mark.anyio
+async def test_login_user_nonexistent_email(db):
     with pytest.raises(HTTPException) as error:
-        login_user(
+        await login_user(
             email="nonexistent@gmail.com",
             password="Some-password@",
             db=db
         )
     assert error.value.status_code == 401  # Unauthorized
+
+
+# Test: Beim Login wird ein Hash mit veraltetem Kostenfaktor transparent ersetzt
+@pytest.mark.anyio
+async def test_login_user_rehashes_outdated_cost(db):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Test-password-4@")
+    db.add(User(email="rehash@gmail.com", hashed_password=old_hash, role="customer"))
+    await db.commit()
+
+    user = await login_user(email="rehash@gmail.com", password="Test-password-4@", db=db)
+
+    assert user.hashed_password != old_hash
+    assert verify("Test-password-4@", user.hashed_password)
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+# Obergrenze für "import main" in einem frischen Interpreter (großzügig wegen langsamer CI-Runner)
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "3.0"))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, threading, time
+start = time.perf_counter()
+import main, data_base
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "engine_created": data_base._engine is not None or data_base._async_engine is not None,
+    "threads": threading.active_count(),
+    "driver_modules": sorted(m for m in ("psycopg2", "asyncpg", "aiosqlite", "apscheduler") if m in sys.modules),
+}))
+"""
+
+
+# Import von main darf weder Engines erstellen noch Threads starten und muss im Zeitbudget bleiben
+def test_import_main_is_cheap():
+    env = {**os.environ, "SECRET_KEY": os.getenv("SECRET_KEY", "test"), "DB_CREATE_SCHEMA": "true", "SCHEDULER_ENABLED": "true"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert not result["engine_created"]
+    assert result["threads"] == 1
+    assert result["driver_modules"] == []
+    assert result["seconds"] < IMPORT_TIME_BUDGET_SECONDS, f"import main dauerte {result['seconds']:.2f}s"
+
+
+# Lifespan legt das Schema nur bei Opt-in an, startet den Scheduler und gibt beim Beenden alles frei
+def test_lifespan_opt_in(monkeypatch):
+    from fastapi.testclient import TestClient
+    import data_base
+    import main
+
+    started = []
+    class FakeScheduler:
+        def shutdown(self, wait):
+            started.append("shutdown")
+    class FakeElection:
+        def release(self):
+            started.append("released")
+
+    monkeypatch.setattr(main, "DB_CREATE_SCHEMA", True)
+    monkeypatch.setattr(main, "SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(main, "start_scheduler", lambda: (started.append("start") or FakeScheduler(), FakeElection()))
+
+    with TestClient(main.app):
+        assert data_base._engine is not None
+        assert started == ["start"]
+
+    assert started == ["start", "shutdown", "released"]
+    assert data_base._engine is None  # Engines entsorgt, werden bei Bedarf neu erstellt
@@ -0,0 +1,77 @@
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import pytest
+from data_base import Base
+from models.user import User
+from services.user_cache import UserCache, user_cache
+
+DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Fixture zur Einrichtung und Aufräumung der In-Memory-Datenbank vor und nach jedem Test
+@pytest.fixture(scope="function")
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        user_cache.clear()
+
+
+# Treffer über ID und passende E-Mail, kein Treffer bei abweichender E-Mail
+def test_cache_hit_and_email_mismatch():
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    cache.put(User(id=1, email="a@gmail.com", role="owner"))
+
+    assert cache.get(1, "a@gmail.com").role == "owner"
+    assert cache.get(1, "b@gmail.com") is None
+    assert cache.get(1, "a@gmail.com") is None  # Eintrag wurde verworfen
+
+
+# Abgelaufene Einträge werden nicht mehr geliefert
+def test_cache_ttl_expiry():
+    cache = UserCache(ttl_seconds=0.01, max_size=10)
+    cache.put(User(id=1, email="a@gmail.com", role="owner"))
+    time.sleep(0.02)
+    assert cache.get(1, "a@gmail.com") is None
+
+
+# Der Cache bleibt begrenzt und verdrängt den am längsten ungenutzten Eintrag
+def test_cache_is_bounded():
+    cache = UserCache(ttl_seconds=60, max_size=2)
+    cache.put(User(id=1, email="a@gmail.com", role="owner"))
+    cache.put(User(id=2, email="b@gmail.com", role="owner"))
+    cache.get(1, "a@gmail.com")
+    cache.put(User(id=3, email="c@gmail.com", role="owner"))
+
+    assert cache.get(2, "b@gmail.com") is None
+    assert cache.get(1, "a@gmail.com") is not None
+    assert cache.get(3, "c@gmail.com") is not None
+
+
+# Invalidierung per E-Mail entfernt den Eintrag
+def test_cache_invalidate_by_email():
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    cache.put(User(id=1, email="a@gmail.com", role="owner"))
+    cache.invalidate(email="a@gmail.com")
+    assert cache.get(1, "a@gmail.com") is None
+
+
+# Rollenänderung über das ORM invalidiert den globalen Cache
+def test_role_change_invalidates_cache(db):
+    user = User(email="a@gmail.com", hashed_password="hash", role="customer")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+    user_cache.put(user)
+    assert user_cache.get(user.id, user.email).role == "customer"
+
+    user.role = "owner"
+    db.commit()
+    assert user_cache.get(user.id, user.email) is None
@@ -0,0 +1,85 @@
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import pytest
+from data_base import Base
+from models.auto import Auto, AutoStatus
+from models.kunden import Kunden
+from models.vertrag import Vertrag, VertragStatus
+from services.vertrag_service import berechne_mitdauer, zwischenstatus_aktualisieren
+from models.datenversion import DatenVersion
+
+DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+HEUTE = date(2030, 6, 15)
+
+# Fixture zur Einrichtung und Aufräumung der In-Memory-Datenbank vor und nach jedem Test
+@pytest.fixture(scope="function")
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def add_auto_mit_vertrag(db, auto_status, beginnt, beendet, vertrag_status=VertragStatus.aktiv):
+    auto = Auto(brand="BMW", model="X5", jahr=2020, preis_pro_stunde=50, status=auto_status)
+    kunde = Kunden(vorname="Max", nachname="Muster", geb_datum=date(1990, 1, 1), handy_nummer="0123", email=f"{id(auto)}@gmail.com")
+    db.add_all([auto, kunde])
+    db.flush()
+    vertrag = Vertrag(auto_id=auto.id, kunden_id=kunde.id, status=vertrag_status, beginnt_datum=beginnt, beendet_datum=beendet)
+    db.add(vertrag)
+    db.commit()
+    return auto, vertrag
+
+
+def test_berechne_mitdauer():
+    assert berechne_mitdauer(date(2030, 1, 1), date(2030, 1, 4)) == 3
+    with pytest.raises(ValueError):
+        berechne_mitdauer(date(2030, 1, 4), date(2030, 1, 4))
+
+
+# Alle Übergänge werden anhand der Daten gesetzt und gezählt
+def test_zwischenstatus_aktualisieren(db):
+    beginnt_heute, _ = add_auto_mit_vertrag(db, AutoStatus.reserviert, HEUTE, date(2030, 6, 20))
+    zukunft, _ = add_auto_mit_vertrag(db, AutoStatus.reserviert, date(2030, 7, 1), date(2030, 7, 5))
+    abgelaufen, vertrag_abgelaufen = add_auto_mit_vertrag(db, AutoStatus.vermietet, date(2030, 6, 1), HEUTE)
+    gekuendigt, _ = add_auto_mit_vertrag(db, AutoStatus.reserviert, date(2030, 7, 1), date(2030, 7, 5), VertragStatus.gekündigt)
+    wartung, _ = add_auto_mit_vertrag(db, AutoStatus.in_wartung, date(2030, 6, 1), date(2030, 6, 2))
+
+    result = zwischenstatus_aktualisieren(db, heute=HEUTE)
+
+    assert result["vertraege_beendet"] == 2  # abgelaufen + wartung
+    assert result["autos_vermietet"] == 1
+    assert result["autos_reserviert"] == 0
+    assert result["autos_verfuegbar"] == 2  # abgelaufen + gekündigt
+    assert result["dauer_ms"] >= 0
+
+    # Massen-UPDATEs erhöhen die Tabellenzähler (Listen-ETags) von Autos und Verträgen
+    assert {row.tabelle for row in db.query(DatenVersion)} == {"auto", "vertrag"}
+
+    db.expire_all()
+    assert beginnt_heute.status == AutoStatus.vermietet
+    assert zukunft.status == AutoStatus.reserviert
+    assert abgelaufen.status == AutoStatus.verfügbar
+    assert vertrag_abgelaufen.status == VertragStatus.beendet
+    assert gekuendigt.status == AutoStatus.verfügbar
+    assert wartung.status == AutoStatus.in_wartung
+
+    # Geänderte Zeilen erhöhen ihre Version, unveränderte nicht
+    assert beginnt_heute.version == 2 and vertrag_abgelaufen.version == 2
+    assert zukunft.version == 1 and wartung.version == 1
+
+
+# Zweiter Lauf am selben Tag ändert nichts mehr
+def test_zwischenstatus_idempotent(db):
+    add_auto_mit_vertrag(db, AutoStatus.reserviert, HEUTE, date(2030, 6, 20))
+    zwischenstatus_aktualisieren(db, heute=HEUTE)
+
+    result = zwischenstatus_aktualisieren(db, heute=HEUTE)
+    assert [result[name] for name in ("vertraege_beendet", "autos_vermietet", "autos_reserviert", "autos_verfuegbar")] == [0, 0, 0, 0]
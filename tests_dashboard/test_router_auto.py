@@ -1,6 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
 from main import app
+from data_base import get_engine
 from tests_app.helpers import set_user_role
 
 client = TestClient(app)
@@ -112,3 +114,83 @@ def test_delete_auto(role, expected_status, created_auto):
         set_user_role("owner")
         get_resp = client.get(f"/api/v1/dashboard/autos/{created_auto}")
         assert get_resp.status_code == 404
+
+# Test: Bedingte GETs liefern 304 ohne Body, bis das Auto (bzw. irgendein Auto) geändert wird
+def test_conditional_get_auto(created_auto, count_app_queries):
+    set_user_role("owner")
+    response = client.get(f"/api/v1/dashboard/autos/{created_auto}")
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"].endswith("GMT")
+
+    with count_app_queries() as queries:
+        response = client.get(f"/api/v1/dashboard/autos/{created_auto}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert queries.count == 1  # nur die Versionsabfrage
+
+    response = client.get(
+        f"/api/v1/dashboard/autos/{created_auto}",
+        headers={"If-Modified-Since": response.headers["last-modified"]},
+    )
+    assert response.status_code == 304
+
+    list_etag = client.get("/api/v1/dashboard/autos").headers["etag"]
+    assert client.get("/api/v1/dashboard/autos", headers={"If-None-Match": list_etag}).status_code == 304
+
+    # Änderungen an einem anderen Auto betreffen nur die Liste
+    other = client.post("/api/v1/dashboard/autos", json=auto_template).json()["id"]
+    assert client.get(f"/api/v1/dashboard/autos/{created_auto}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/v1/dashboard/autos", headers={"If-None-Match": list_etag}).status_code == 200
+
+    client.put(f"/api/v1/dashboard/autos/{created_auto}", json={"preis_pro_stunde": 45})
+    response = client.get(f"/api/v1/dashboard/autos/{created_auto}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["preis_pro_stunde"] == 45
+    assert response.headers["etag"] != etag
+
+    # Die Rollenprüfung läuft vor dem ETag-Vergleich
+    set_user_role("editor")
+    response = client.get(f"/api/v1/dashboard/autos/{other}", headers={"If-None-Match": "*"})
+    assert response.status_code == 403
+
+# Optimistische Sperre: PUT mit If-Match aus dem GET, veraltete Versionen ergeben 409
+def test_update_auto_if_match(created_auto):
+    set_user_role("owner")
+    etag = client.get(f"/api/v1/dashboard/autos/{created_auto}").headers["etag"]
+    assert etag == f'"auto-{created_auto}-1"'
+
+    response = client.put(f"/api/v1/dashboard/autos/{created_auto}", json={"preis_pro_stunde": 40}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    neu = response.headers["etag"]
+    assert neu == f'"auto-{created_auto}-2"'
+    assert client.get(f"/api/v1/dashboard/autos/{created_auto}").headers["etag"] == neu
+
+    # Ein zweiter Bearbeiter mit dem alten ETag überschreibt die Änderung nicht
+    response = client.put(f"/api/v1/dashboard/autos/{created_auto}", json={"preis_pro_stunde": 50}, headers={"If-Match": etag})
+    assert response.status_code == 409
+    assert response.headers["etag"] == neu
+    assert client.get(f"/api/v1/dashboard/autos/{created_auto}").json()["preis_pro_stunde"] == 40
+
+    # Schwache ETags passen bei If-Match nie, "*" immer; ohne If-Match keine Prüfung
+    assert client.put(f"/api/v1/dashboard/autos/{created_auto}", json={"jahr": 2012}, headers={"If-Match": f"W/{neu}"}).status_code == 409
+    assert client.put(f"/api/v1/dashboard/autos/{created_auto}", json={"jahr": 2012}, headers={"If-Match": "*"}).status_code == 200
+    assert client.put(f"/api/v1/dashboard/autos/{created_auto}", json={"jahr": 2013}).status_code == 200
+
+# Auch Schreibwege ohne If-Match prüfen die Version: paralleles Ändern vor dem Löschen ergibt 409 statt 500
+def test_delete_auto_parallel_geaendert(created_auto, monkeypatch):
+    from routers.dashboard import auto as auto_router
+    original = auto_router.get_auto_by_id
+
+    async def parallel_aendern(db, auto_id):
+        auto = await original(db, auto_id)
+        with get_engine().begin() as conn:
+            conn.execute(text("UPDATE auto SET version = version + 1 WHERE id = :id"), {"id": auto_id})
+        return auto
+
+    monkeypatch.setattr(auto_router, "get_auto_by_id", parallel_aendern)
+    response = client.delete(f"/api/v1/dashboard/autos/{created_auto}")
+    assert response.status_code == 409
+    monkeypatch.undo()
+
+    assert client.get(f"/api/v1/dashboard/autos/{created_auto}").status_code == 200
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import pytest
+import secrets
+from fastapi.testclient import TestClient
+from main import app
+from tests_app.helpers import set_user_role
+
+client = TestClient(app)
+
+# ========== Fixtures ==========
+
+@pytest.fixture(autouse=True)
+def clear_overrides():
+    """Setzt nach jedem Test Dependency-Overrides zurück."""
+    yield
+    app.dependency_overrides = {}
+
+@pytest.fixture
+def vertrag_id():
+    """Erstellt Auto, Kunde und Vertrag und gibt die Vertrags-ID zurück."""
+    set_user_role("owner")
+    auto = client.post("/api/v1/dashboard/autos", json={
+        "brand": "BMW", "model": "sedan", "jahr": 2010, "preis_pro_stunde": 30, "status": "verfügbar"
+    }).json()
+    kunde = client.post("/api/v1/dashboard/kunden", json={
+        "vorname": "Tihan", "nachname": "Ibrahim", "geb_datum": "2000-08-25",
+        "handy_nummer": "0995719489", "email": f"export{secrets.randbelow(100000) + 1}@gmail.com"
+    }).json()
+    response = client.post("/api/v1/dashboard/vertraege", json={
+        "auto_id": auto["id"], "kunden_id": kunde["id"], "beginnt_datum": "2031-03-01",
+        "beendet_datum": "2031-03-05", "status": "aktiv", "total_preis": 120.0
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+@pytest.fixture
+def zahlung_ids(vertrag_id):
+    """Erstellt zwei Zahlungen an unterschiedlichen Tagen."""
+    ids = []
+    for datum in ["2031-03-02", "2031-04-02"]:
+        response = client.post("/api/v1/dashboard/zahlungen", json={
+            "vertrag_id": vertrag_id, "zahlungsmethode": "karte", "datum": datum, "status": "bezahlt", "betrag": 60.0
+        })
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+# ========== Tests ==========
+
+@pytest.mark.parametrize("role, expected_status", [
+    ("owner", 200),
+    ("viewer", 200),
+    ("editor", 403),
+])
+def test_export_permissions(role, expected_status):
+    """Testet, welche Rollen exportieren dürfen."""
+    set_user_role(role)
+    response = client.get("/api/v1/dashboard/export/vertraege")
+    assert response.status_code == expected_status
+
+def test_export_zahlungen_ndjson_date_range(zahlung_ids):
+    """Testet NDJSON-Export mit Datumsfilter."""
+    set_user_role("viewer")
+    response = client.get("/api/v1/dashboard/export/zahlungen", params={
+        "format": "ndjson", "von": "2031-03-01", "bis": "2031-03-31"
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [zahlung_ids[0]]
+    assert rows[0]["status"] == "bezahlt"
+    assert rows[0]["datum"] == "2031-03-02"
+
+def test_export_vertraege_csv(vertrag_id):
+    """Testet CSV-Export mit Kopfzeile."""
+    set_user_role("owner")
+    response = client.get("/api/v1/dashboard/export/vertraege", params={"von": "2031-03-01", "bis": "2031-03-01"})
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert vertrag_id in [int(row["id"]) for row in rows]
+    assert all(row["beginnt_datum"] == "2031-03-01" for row in rows)
+
+def test_export_invalid_date_range():
+    """Testet Fehler 400, wenn 'von' nach 'bis' liegt."""
+    set_user_role("owner")
+    response = client.get("/api/v1/dashboard/export/zahlungen", params={"von": "2025-02-01", "bis": "2025-01-01"})
+    assert response.status_code == 400
@@ -0,0 +1,187 @@
+import pytest
+import secrets
+from fastapi.testclient import TestClient
+from main import app
+from tests_app.helpers import set_user_role
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def clear_overrides():
+    """Setzt nach jedem Test Dependency-Overrides zurück."""
+    yield
+    app.dependency_overrides = {}
+
+def unique_email():
+    return f"import{secrets.token_hex(6)}@gmail.com"
+
+@pytest.fixture
+def vertrag_id():
+    """Erstellt Auto, Kunde und Vertrag (Beginn 2025-06-01) und gibt die Vertrags-ID zurück."""
+    set_user_role("owner")
+    auto_id = client.post("/api/v1/dashboard/autos", json={
+        "brand": "VW", "model": "Golf", "jahr": 2020, "preis_pro_stunde": 20, "status": "verfügbar"
+    }).json()["id"]
+    kunde_id = client.post("/api/v1/dashboard/kunden", json={
+        "vorname": "Max", "nachname": "Muster", "geb_datum": "1990-01-01", "email": unique_email()
+    }).json()["id"]
+    response = client.post("/api/v1/dashboard/vertraege", json={
+        "auto_id": auto_id, "kunden_id": kunde_id, "beginnt_datum": "2025-06-01",
+        "beendet_datum": "2025-06-05", "status": "aktiv", "total_preis": 80.0
+    })
+    return response.json()["id"]
+
+
+# ========== Berechtigungen ==========
+
+@pytest.mark.parametrize(("role", "expected_status"), [
+    ("owner", 200),
+    ("editor", 403),
+    ("viewer", 403),
+])
+def test_import_permissions(role, expected_status):
+    set_user_role(role)
+    response = client.post("/api/v1/dashboard/import/autos", json=[])
+    assert response.status_code == expected_status
+
+
+# ========== Autos (JSON) ==========
+
+def test_import_autos_json_with_row_errors():
+    set_user_role("owner")
+    brand = f"Import{secrets.token_hex(3)}"
+    rows = [
+        {"brand": brand, "model": "A", "jahr": 2020, "preis_pro_stunde": 10, "status": "verfügbar"},
+        {"brand": brand, "model": "B", "jahr": "kein Jahr", "preis_pro_stunde": 10, "status": "verfügbar"},
+        {"brand": brand, "model": "C", "jahr": 2021, "preis_pro_stunde": 0, "status": "verfügbar"},
+        {"brand": brand, "model": "D", "jahr": 2022, "preis_pro_stunde": 15, "status": "in_wartung"},
+    ]
+    response = client.post("/api/v1/dashboard/import/autos", json=rows)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["eingefuegt"] == 2
+    assert [error["zeile"] for error in report["fehler"]] == [2, 3]
+    assert report["fehler"][0]["fehler"][0].startswith("jahr:")
+
+    # Importierte Autos sind sofort in der Suche (Snapshot wurde invalidiert)
+    set_user_role("customer")
+    found = client.get(f"/api/v1/autos/search?brand={brand}").json()
+    assert sorted(auto["model"] for auto in found) == ["A", "D"]
+
+def test_import_autos_atomar_rejects_all():
+    set_user_role("owner")
+    rows = [
+        {"brand": "Atomar", "model": "A", "jahr": 2020, "preis_pro_stunde": 10, "status": "verfügbar"},
+        {"brand": "Atomar", "model": "B", "jahr": 2020, "preis_pro_stunde": -1, "status": "verfügbar"},
+    ]
+    response = client.post("/api/v1/dashboard/import/autos?atomar=true", json=rows)
+    assert response.status_code == 422
+    assert response.json()["detail"]["eingefuegt"] == 0
+
+def test_import_rejects_non_array():
+    set_user_role("owner")
+    assert client.post("/api/v1/dashboard/import/autos", json={"brand": "x"}).status_code == 400
+
+
+def test_import_autos_json_stream():
+    set_user_role("owner")
+    brand = f"Stream{secrets.token_hex(3)}"
+    body = (
+        f'[ {{"brand": "{brand}", "model": "A", "jahr": 2020, "preis_pro_stunde": 12.5, "status": "verfügbar"}},\n'
+        f'  {{"brand": "{brand}", "model": "B", "jahr": 2021, "preis_pro_stunde": 30, "status": "verfügbar"}}, 42 ]'
+    ).encode()
+
+    def chunks():
+        for start in range(0, len(body), 5):  # Stücke auch mitten in Zahlen und UTF-8-Zeichen
+            yield body[start:start + 5]
+
+    response = client.post("/api/v1/dashboard/import/autos", content=chunks(), headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert response.json()["eingefuegt"] == 2
+    assert [error["zeile"] for error in response.json()["fehler"]] == [3]
+
+    set_user_role("customer")
+    found = client.get(f"/api/v1/autos/search?brand={brand}").json()
+    assert sorted(auto["preis_pro_stunde"] for auto in found) == [12.5, 30]
+
+@pytest.mark.parametrize("body", [b"", b"[1, 2", b"[1,, 2]", b"[1] 2", b"[{\"brand\": }]"])
+def test_import_rejects_invalid_json(body):
+    set_user_role("owner")
+    response = client.post("/api/v1/dashboard/import/autos", content=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+# Zu viele Zeilen und zu große Elemente werden beim Lesen abgelehnt, nicht erst nach dem Parsen des ganzen Bodys
+def test_import_json_limits(monkeypatch):
+    import services.import_service as import_service
+    monkeypatch.setattr(import_service, "IMPORT_MAX_ROWS", 2)
+    set_user_role("owner")
+
+    assert client.post("/api/v1/dashboard/import/autos", json=[{}, {}, {}]).status_code == 413
+    def unvollstaendig():
+        yield b'[{"brand": "'
+        for _ in range(4 * import_service.MAX_JSON_ELEMENT_CHARS // 4096):  # das Element wird nie fertig
+            yield b"x" * 4096
+
+    for content in (b'[{"brand": "' + b"x" * import_service.MAX_JSON_ELEMENT_CHARS + b'"}]', unvollstaendig()):
+        response = client.post("/api/v1/dashboard/import/autos", content=content, headers={"Content-Type": "application/json"})
+        assert response.status_code == 413
+        assert "Zeichen" in response.json()["detail"]
+
+
+# ========== Kunden (CSV-Stream) ==========
+
+def test_import_kunden_csv_stream():
+    set_user_role("owner")
+    existing = unique_email()
+    client.post("/api/v1/dashboard/kunden", json={
+        "vorname": "Alt", "nachname": "Kunde", "geb_datum": "1980-01-01", "email": existing
+    })
+    neu, doppelt = unique_email(), unique_email()
+    csv_body = (
+        "vorname,nachname,geb_datum,handy_nummer,email\n"
+        f'Anna,"Meier\nMüller",1991-02-03,,{neu}\n'          # Zeilenumbruch im Feld
+        f"Ben,Berg,1992-03-04,0123,{doppelt}\n"
+        f"Cem,Cetin,1993-04-05,0456,{doppelt}\n"              # doppelt in der Datei
+        f"Dana,Dorn,1994-05-06,,{existing.upper()}\n"         # existiert bereits (andere Schreibweise)
+        "Eva,Ernst,kein-datum,,eva@gmail.com\n"
+    )
+
+    def chunks():
+        data = csv_body.encode()
+        for start in range(0, len(data), 7):  # kleine Stücke, auch mitten in Zeilen und UTF-8-Zeichen
+            yield data[start:start + 7]
+
+    response = client.post(
+        "/api/v1/dashboard/import/kunden", content=chunks(), headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["eingefuegt"] == 2
+    assert [error["zeile"] for error in report["fehler"]] == [3, 4, 5]
+    assert "doppelt" in report["fehler"][0]["fehler"][0]
+    assert "existiert bereits" in report["fehler"][1]["fehler"][0]
+
+    kunden = client.get(f"/api/v1/dashboard/kunden?email={neu}").json()["items"]
+    assert kunden[0]["nachname"] == "Meier\nMüller"
+    assert kunden[0]["handy_nummer"] is None
+
+
+# ========== Zahlungen ==========
+
+def test_import_zahlungen(vertrag_id):
+    set_user_role("owner")
+    rows = [
+        {"vertrag_id": vertrag_id, "zahlungsmethode": "karte", "datum": "2025-06-02", "status": "bezahlt", "betrag": 50},
+        {"vertrag_id": vertrag_id, "zahlungsmethode": "überweisung", "datum": "2025-06-03", "status": "offen", "betrag": 30},
+        {"vertrag_id": 999999, "zahlungsmethode": "karte", "datum": "2025-06-02", "status": "bezahlt", "betrag": 10},
+        {"vertrag_id": vertrag_id, "zahlungsmethode": "karte", "datum": "2025-05-01", "status": "bezahlt", "betrag": -5},
+    ]
+    response = client.post("/api/v1/dashboard/import/zahlungen", json=rows)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["eingefuegt"] == 2
+    assert report["fehler"][0] == {"zeile": 3, "fehler": ["Vertrag mit ID 999999 nicht gefunden."]}
+    assert len(report["fehler"][1]["fehler"]) == 2  # negativer Betrag und Datum vor Vertragsbeginn
+
+    zahlungen = client.get(f"/api/v1/dashboard/zahlungen?vertrag_id={vertrag_id}").json()["items"]
+    assert sorted(z["betrag"] for z in zahlungen) == [30, 50]
@@ -135,3 +135,16 @@ def test_create_kunde_invalid_email():
     data["email"] = "not-an-email"  # Ungültiges Format
     response = client.post("/api/v1/dashboard/kunden", json=data)
     assert response.status_code == 422  # Validierungsfehler von FastAPI
+
+
+def test_view_all_kunden_constant_queries(count_app_queries):
+    """Die Kundenliste braucht unabhängig von der Seitengröße genau eine Abfrage plus die Versionsabfrage für den ETag (kein N+1)."""
+    set_user_role("owner")
+    for _ in range(3):
+        client.post("/api/v1/dashboard/kunden", json=get_kunden_template())
+
+    with count_app_queries() as small:
+        client.get("/api/v1/dashboard/kunden?limit=1")
+    with count_app_queries() as large:
+        client.get("/api/v1/dashboard/kunden?limit=50")
+    assert small.count == large.count == 2
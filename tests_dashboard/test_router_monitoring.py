@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from tests_app.helpers import set_user_role
+from core.db_pool import PoolStats
+
+client = TestClient(app)
+
+# Fixture: Setzt dependency overrides nach jedem Test zurück
+@pytest.fixture(autouse=True)
+def clear_dependency_overrides():
+    yield
+    app.dependency_overrides = {}
+
+# Test: Pool-Statistiken abrufen mit verschiedenen Nutzerrollen
+@pytest.mark.parametrize(("role", "expected_status"), [
+    ("owner", 200),
+    ("viewer", 403),
+    ("editor", 403),
+])
+def test_show_pool_stats_by_role(role, expected_status):
+    set_user_role(role)
+    response = client.get("/api/v1/dashboard/monitoring/pool")
+    assert response.status_code == expected_status
+
+    if expected_status == 200:
+        data = response.json()
+        assert set(data) == {"sync", "async"}
+        assert "pool_class" in data["sync"]
+
+# Test: Histogramm zählt Wartezeiten kumulativ und erfasst Timeouts
+def test_pool_stats_histogram():
+    stats = PoolStats()
+    stats.observe(0.0005)
+    stats.observe(0.2)
+    stats.observe(30.0, timed_out=True)
+
+    histogram = stats.histogram()
+    assert histogram["count"] == 3
+    assert histogram["timeouts"] == 1
+    assert histogram["buckets"]["0.001"] == 1
+    assert histogram["buckets"]["0.25"] == 2
+    assert histogram["buckets"]["+Inf"] == 3
+
+# Test: Name und Overflow-Grenze kommen aus der Pool-Konfiguration und bleiben nach recreate() erhalten
+def test_pool_snapshot_after_recreate(tmp_path, monkeypatch):
+    import core.db_pool as db_pool
+    from sqlalchemy import create_engine, text
+
+    monkeypatch.setattr(db_pool, "DATABASE_POOL", "queue")
+    monkeypatch.setattr(db_pool, "DB_MAX_OVERFLOW", 3)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **db_pool.build_engine_options(url, "monitoring-test"))
+    for _ in range(2):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        snapshot = db_pool.pool_snapshot(engine)
+        assert snapshot["max_overflow"] == 3
+        assert snapshot["checkout_wait"]["count"] >= 1
+        engine.pool = engine.pool.recreate()
+    assert db_pool.pool_stats["monitoring-test"].count == 2
+    engine.dispose()
+
+# Test: Hashing-Pool-Statistiken enthalten Warteschlangentiefe und Kostenfaktor
+def test_show_hashing_stats():
+    set_user_role("owner")
+    response = client.get("/api/v1/dashboard/monitoring/hashing")
+    assert response.status_code == 200
+    data = response.json()
+    assert {"queued", "in_flight", "rejected", "bcrypt_rounds"} <= set(data)
+
+# Test: Server-Timing-Header mit Anzahl der SQL-Statements und Metriken pro Route-Template
+def test_metrics_and_server_timing():
+    set_user_role("owner")
+    response = client.get("/api/v1/dashboard/kunden?limit=1")
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("app;dur=")
+    queries = int(server_timing.split('desc="')[1].split(" ")[0])
+    assert queries >= 1
+
+    client.get("/api/v1/dashboard/kunden/999999")  # 404, gezählt unter dem Template
+    client.get("/gibt-es-nicht")
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    body = metrics.text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/dashboard/kunden",le="+Inf"}' in body
+    assert 'http_requests_total{method="GET",route="/api/v1/dashboard/kunden/{kunden_id}",status="404"}' in body
+    assert 'route="unmatched"' in body
+    assert "/gibt-es-nicht" not in body
+    queries_line = next(line for line in body.splitlines() if line.startswith('db_queries_total{method="GET",route="/api/v1/dashboard/kunden"}'))
+    assert int(queries_line.split()[-1]) >= queries
@@ -1,6 +1,6 @@
 import pytest
 import secrets
-from datetime import date
+from datetime import date, timedelta
 from fastapi.testclient import TestClient
 from main import app
 from tests_app.helpers import set_user_role
@@ -103,6 +103,33 @@ def test_create_vertrag_permissions(role, expected_status, created_auto, created
     response = client.post("/api/v1/dashboard/vertraege", json=vertrag)
     assert response.status_code == expected_status
 
+# --- Vertrag erstellen: Zeitraum wird gegen aktive Verträge geprüft ---
+def test_create_vertrag_zeitraum(created_auto, created_kunde):
+    """Überschneidende Zeiträume werden abgelehnt, angrenzende sind trotz Status reserviert buchbar."""
+    set_user_role("owner")
+    auto_id, kunden_id = created_auto["id"], created_kunde["id"]
+    create_vertrag_helper(auto_id, kunden_id, date(2099, 5, 10), date(2099, 5, 20))
+
+    for beginnt, beendet in [
+        (date(2099, 5, 15), date(2099, 5, 25)),  # überschneidet das Ende
+        (date(2099, 5, 1), date(2099, 5, 11)),   # überschneidet den Beginn
+        (date(2099, 5, 12), date(2099, 5, 18)),  # liegt innerhalb
+    ]:
+        response = client.post("/api/v1/dashboard/vertraege", json=get_vertrag_template(auto_id, kunden_id, beginnt, beendet))
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Auto im gewünschten Zeitraum bereits vermietet."
+
+    # Rückgabetag des einen ist Beginn des anderen Vertrags
+    create_vertrag_helper(auto_id, kunden_id, date(2099, 5, 20), date(2099, 5, 25))
+    create_vertrag_helper(auto_id, kunden_id, date(2099, 5, 1), date(2099, 5, 10))
+    assert client.get(f"/api/v1/dashboard/autos/{auto_id}").json()["status"] == "reserviert"
+
+    # Nicht buchbarer Status bleibt gesperrt, auch für freie Zeiträume
+    assert client.put(f"/api/v1/dashboard/autos/{auto_id}", json={"status": "in_wartung"}).status_code == 200
+    response = client.post("/api/v1/dashboard/vertraege", json=get_vertrag_template(auto_id, kunden_id, date(2099, 7, 1), date(2099, 7, 5)))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Auto derzeit nicht verfügbar."
+
 # --- Vertrag aktualisieren ---
 @pytest.mark.parametrize("role, expected_status", [
     ("owner", 200),   # Owner dürfen Verträge aktualisieren
@@ -137,6 +164,23 @@ def test_get_all_vertraege_permissions(role, expected_status):
     response = client.get("/api/v1/dashboard/vertraege")
     assert response.status_code == expected_status
 
+# --- Vertrag anzeigen (ETag für If-Match) ---
+@pytest.mark.parametrize("role, expected_status", [
+    ("owner", 200),
+    ("viewer", 200),
+    ("editor", 403),
+])
+def test_get_vertrag(role, expected_status, created_vertrag):
+    """Detailansicht liefert den Zeilen-ETag, der beim Aktualisieren als If-Match dient."""
+    set_user_role(role)
+    response = client.get(f"/api/v1/dashboard/vertraege/{created_vertrag['id']}")
+    assert response.status_code == expected_status
+
+    if expected_status == 200:
+        assert response.json()["total_preis"] == 200.0
+        assert response.headers["etag"] == f'"vertrag-{created_vertrag["id"]}-1"'
+        assert client.get("/api/v1/dashboard/vertraege/999999").status_code == 404
+
 # --- Vertrag vor Beginn kündigen ---
 @pytest.mark.parametrize("role, expected_status", [
     ("owner", 200),   # Owner dürfen Vertrag vor Beginn kündigen
@@ -190,3 +234,68 @@ def test_vertrag_kundigen_after_start(role, expected_status, created_auto, creat
     assert resp_cancel.status_code == expected_status
     if expected_status == 400:
         assert resp_cancel.json().get("detail") == "Kündigung nach Vertragsbeginn ist nicht möglich."
+
+# --- Verträge nach Kunde filtern und nach Beginndatum blättern ---
+def test_get_all_vertraege_keyset_by_beginnt_datum(created_kunde):
+    """Testet Kunden-Filter und Cursor-Paginierung nach Beginndatum."""
+    set_user_role("owner")
+    for beginnt in [date(2024, 3, 1), date(2024, 1, 1), date(2024, 2, 1)]:
+        auto = client.post("/api/v1/dashboard/autos", json=get_auto_template()).json()
+        create_vertrag_helper(auto["id"], created_kunde["id"], beginnt, beginnt.replace(day=10))
+
+    params = {"kunden_id": created_kunde["id"], "sort_by": "beginnt_datum", "limit": 2}
+    first = client.get("/api/v1/dashboard/vertraege", params=params).json()
+    second = client.get("/api/v1/dashboard/vertraege", params={**params, "cursor": first["next_cursor"]}).json()
+
+    dates = [v["beginnt_datum"] for v in first["items"] + second["items"]]
+    assert dates == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert second["next_cursor"] is None
+
+# Test: Auslastung nach Marke und Monat, gelesen aus dem täglichen Rollup
+def test_auslastung_analytics(created_kunde):
+    set_user_role("owner")
+    brand = f"ANALYTICS{secrets.token_hex(4).upper()}"
+    auto_ids = []
+    for _ in range(2):
+        response = client.post("/api/v1/dashboard/autos", json={**get_auto_template(), "brand": brand})
+        assert response.status_code == 201
+        auto_ids.append(response.json()["id"])
+    create_vertrag_helper(auto_ids[0], created_kunde["id"], date(2091, 1, 30), date(2091, 2, 2))
+    # Nachträglich überschneidender Vertrag auf demselben Auto: gemeinsame Tage zählen nur einmal
+    zweiter = create_vertrag_helper(auto_ids[0], created_kunde["id"], date(2091, 2, 2), date(2091, 2, 3))
+    response = client.put(f"/api/v1/dashboard/vertraege/{zweiter['id']}",
+                          json={"beginnt_datum": "2091-01-31", "beendet_datum": "2091-02-02"})
+    assert response.status_code == 200
+
+    set_user_role("viewer")
+    params = {"von": "2091-01-01", "bis": "2091-02-28", "gruppierung": "brand"}
+    response = client.get("/api/v1/dashboard/analytics/auslastung", params={**params, "periode": "monat"})
+    assert response.status_code == 200
+    eintraege = [e for e in response.json() if e["gruppe"] == brand]
+    assert [(e["periode_start"], e["belegte_tage"], e["verfuegbare_tage"]) for e in eintraege] == [
+        ("2091-01-01", 2, 62),
+        ("2091-02-01", 1, 56),  # Enddatum 02.02. ist exklusiv
+    ]
+
+    response = client.get("/api/v1/dashboard/analytics/auslastung", params={**params, "periode": "gesamt"})
+    gesamt = next(e for e in response.json() if e["gruppe"] == brand)
+    assert gesamt["fahrzeuge"] == 2
+    assert gesamt["belegte_tage"] == 3
+    assert gesamt["auslastung"] == round(3 / 118, 4)
+
+    # Vergangene Perioden zählen nur die damals vorhandenen Autos: beide wurden heute angelegt
+    heute = date.today()
+    params = {"von": str(heute - timedelta(days=9)), "bis": str(heute), "gruppierung": "brand"}
+    response = client.get("/api/v1/dashboard/analytics/auslastung", params=params)
+    gesamt = next(e for e in response.json() if e["gruppe"] == brand)
+    assert (gesamt["fahrzeuge"], gesamt["verfuegbare_tage"]) == (2, 2)
+    params = {"von": str(heute - timedelta(days=9)), "bis": str(heute - timedelta(days=1)), "gruppierung": "brand"}
+    response = client.get("/api/v1/dashboard/analytics/auslastung", params=params)
+    assert brand not in {e["gruppe"] for e in response.json()}
+
+    response = client.get("/api/v1/dashboard/analytics/auslastung", params={"von": "2091-02-01", "bis": "2091-01-01"})
+    assert response.status_code == 400
+
+    set_user_role("editor")
+    response = client.get("/api/v1/dashboard/analytics/auslastung", params=params)
+    assert response.status_code == 403
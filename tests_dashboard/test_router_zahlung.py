@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from main import app
 import secrets
+from sqlalchemy import text
+from data_base import get_engine
 from tests_app.helpers import set_user_role
 
 client = TestClient(app)
@@ -168,3 +170,159 @@ def test_delete_zahlung_not_found():
     set_user_role("owner")
     response = client.delete("/api/v1/dashboard/zahlungen/999999")
     assert response.status_code == 404
+
+def test_list_zahlungen_keyset_pagination(vertrag_id, zahlung_template):
+    """Testet seitenweises Abrufen per Cursor, gefiltert nach Vertrag und sortiert nach Betrag."""
+    set_user_role("owner")
+    for betrag in [300.0, 100.0, 200.0]:
+        zahlung_data = zahlung_template.copy()
+        zahlung_data["vertrag_id"] = vertrag_id
+        zahlung_data["betrag"] = betrag
+        assert client.post("/api/v1/dashboard/zahlungen", json=zahlung_data).status_code == 201
+
+    params = {"vertrag_id": vertrag_id, "sort_by": "betrag", "limit": 2}
+    first = client.get("/api/v1/dashboard/zahlungen", params=params).json()
+    assert [z["betrag"] for z in first["items"]] == [100.0, 200.0]
+    assert first["next_cursor"] is not None
+
+    second = client.get("/api/v1/dashboard/zahlungen", params={**params, "cursor": first["next_cursor"]}).json()
+    assert [z["betrag"] for z in second["items"]] == [300.0]
+    assert second["next_cursor"] is None
+
+def test_list_zahlungen_filter_and_desc_order(vertrag_id, zahlung_template):
+    """Testet Status-Filter und absteigende Sortierung nach ID."""
+    set_user_role("owner")
+    for status in ["offen", "bezahlt", "bezahlt"]:
+        zahlung_data = zahlung_template.copy()
+        zahlung_data["vertrag_id"] = vertrag_id
+        zahlung_data["status"] = status
+        assert client.post("/api/v1/dashboard/zahlungen", json=zahlung_data).status_code == 201
+
+    response = client.get("/api/v1/dashboard/zahlungen", params={
+        "vertrag_id": vertrag_id, "status": "bezahlt", "order": "desc"
+    })
+    items = response.json()["items"]
+    assert len(items) == 2
+    assert all(z["status"] == "bezahlt" for z in items)
+    assert items[0]["id"] > items[1]["id"]
+
+def test_list_zahlungen_invalid_cursor():
+    """Testet Fehler 400 bei ungültigem Cursor."""
+    set_user_role("owner")
+    response = client.get("/api/v1/dashboard/zahlungen", params={"cursor": "kein-cursor"})
+    assert response.status_code == 400
+
+# Test: Salden zählen nur bezahlte Zahlungen und erscheinen in der Liste offener Salden
+def test_salden(vertrag_id, kunde_id, zahlung_template):
+    set_user_role("owner")
+    for status, betrag in [("bezahlt", 50.0), ("bezahlt", 20.0), ("offen", 30.0)]:
+        zahlung = {**zahlung_template, "vertrag_id": vertrag_id, "status": status, "betrag": betrag}
+        assert client.post("/api/v1/dashboard/zahlungen", json=zahlung).status_code == 201
+
+    set_user_role("viewer")
+    response = client.get(f"/api/v1/dashboard/vertraege/{vertrag_id}/saldo")
+    assert response.status_code == 200
+    assert response.json() == {"vertrag_id": vertrag_id, "kunden_id": kunde_id, "total_preis": 120.0, "bezahlt": 70.0, "offen": 50.0}
+
+    response = client.get(f"/api/v1/dashboard/kunden/{kunde_id}/saldo")
+    assert response.status_code == 200
+    assert response.json()["offen"] == 50.0
+    assert [v["vertrag_id"] for v in response.json()["vertraege"]] == [vertrag_id]
+
+    # Alle Seiten der offenen Salden durchlaufen
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 50, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/dashboard/salden/offen", params=params).json()
+        ids += [item["vertrag_id"] for item in page["items"]]
+        assert all(item["offen"] > 0 for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert vertrag_id in ids
+    assert ids == sorted(ids)
+
+    # Vollständig bezahlt: nicht mehr in der Liste
+    set_user_role("owner")
+    zahlung = {**zahlung_template, "vertrag_id": vertrag_id, "status": "bezahlt", "betrag": 50.0}
+    assert client.post("/api/v1/dashboard/zahlungen", json=zahlung).status_code == 201
+    page = client.get("/api/v1/dashboard/salden/offen", params={"limit": 10000}).json()
+    assert vertrag_id not in [item["vertrag_id"] for item in page["items"]]
+
+def test_salden_not_found():
+    set_user_role("owner")
+    assert client.get("/api/v1/dashboard/vertraege/999999/saldo").status_code == 404
+    assert client.get("/api/v1/dashboard/kunden/999999/saldo").status_code == 404
+    set_user_role("editor")
+    assert client.get("/api/v1/dashboard/salden/offen").status_code == 403
+
+# Test: Der schnelle Listenpfad liefert dasselbe JSON wie das response_model und behält den ETag
+def test_list_zahlungen_fast_path_matches_schema(vertrag_id, zahlung_template):
+    from schemas.pagination import Page
+    from schemas.zahlung import Zahlung
+
+    set_user_role("owner")
+    for betrag in (10.5, 20.0):
+        zahlung = {**zahlung_template, "vertrag_id": vertrag_id, "betrag": betrag}
+        assert client.post("/api/v1/dashboard/zahlungen", json=zahlung).status_code == 201
+
+    response = client.get("/api/v1/dashboard/zahlungen", params={"vertrag_id": vertrag_id, "limit": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "etag" in response.headers
+    data = response.json()
+    assert Page[Zahlung].model_validate(data).model_dump(mode="json") == data
+    assert data["items"][0]["betrag"] == 10.5
+    assert data["next_cursor"] is not None
+
+# Test: Alle Zahlungsmethoden (auch paypal und klarna) erscheinen in der Liste mit den Werten des Schemas
+def test_list_zahlungen_all_methods(vertrag_id, zahlung_template):
+    from schemas.pagination import Page
+    from schemas.zahlung import Zahlung, ZahlungsmethodeEnum
+
+    set_user_role("owner")
+    methoden = [methode.value for methode in ZahlungsmethodeEnum]
+    for methode in methoden:
+        zahlung = {**zahlung_template, "vertrag_id": vertrag_id, "zahlungsmethode": methode}
+        response = client.post("/api/v1/dashboard/zahlungen", json=zahlung)
+        assert response.status_code == 201
+        assert response.json()["zahlungsmethode"] == methode
+
+    data = client.get("/api/v1/dashboard/zahlungen", params={"vertrag_id": vertrag_id}).json()
+    assert [item["zahlungsmethode"] for item in data["items"]] == methoden
+    assert Page[Zahlung].model_validate(data).model_dump(mode="json") == data
+
+def test_update_zahlung_if_match(vertrag_id, zahlung_template, monkeypatch):
+    """Detail-GET liefert den ETag für If-Match; veraltete oder parallel geänderte Zahlungen ergeben 409."""
+    set_user_role("owner")
+    zahlung_id = client.post("/api/v1/dashboard/zahlungen", json={**zahlung_template, "vertrag_id": vertrag_id}).json()["id"]
+
+    set_user_role("viewer")
+    response = client.get(f"/api/v1/dashboard/zahlungen/{zahlung_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert client.get(f"/api/v1/dashboard/zahlungen/{zahlung_id}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/v1/dashboard/zahlungen/999999", headers={"If-None-Match": "*"}).status_code == 404
+
+    set_user_role("editor")
+    response = client.put(f"/api/v1/dashboard/zahlungen/{zahlung_id}", json={"betrag": 10.0}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"zahlung-{zahlung_id}-2"'
+    assert client.put(f"/api/v1/dashboard/zahlungen/{zahlung_id}", json={"betrag": 20.0}, headers={"If-Match": etag}).status_code == 409
+
+    # Paralleler Schreiber zwischen Laden und Commit: UPDATE ... WHERE version = 2 trifft keine Zeile
+    from routers.dashboard import zahlung as zahlung_router
+    original = zahlung_router.validate_zahlung_update
+
+    async def parallel_aendern(db, zahlung_update):
+        with get_engine().begin() as conn:
+            conn.execute(text("UPDATE zahlung SET version = version + 1 WHERE id = :id"), {"id": zahlung_id})
+        await original(db, zahlung_update)
+
+    monkeypatch.setattr(zahlung_router, "validate_zahlung_update", parallel_aendern)
+    response = client.put(f"/api/v1/dashboard/zahlungen/{zahlung_id}", json={"betrag": 30.0})
+    assert response.status_code == 409
+    monkeypatch.undo()
+
+    set_user_role("viewer")
+    assert client.get(f"/api/v1/dashboard/zahlungen/{zahlung_id}").json()["betrag"] == 10.0